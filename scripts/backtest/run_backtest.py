@@ -0,0 +1,125 @@
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lightgbm'))
+from common.features import LGBM_ADVANCED_SPEC, LGBM_READY_SPEC
+from common.panel import DATE_COL, TICKER_COL, run_tasks, split_tickers
+from common.storage import read_table, write_table
+from tuning import load_params
+from walk_forward import lightgbm_block, make_schedule, prophet_ticker, refit_blocks, score, ticker_scalers
+
+# Paths
+MERGED_FILE = 'data/processed/merged_sentiment_stock'
+LGBM_READY = 'data/processed/lgbm_ready'
+LGBM_ADVANCED = 'data/processed/lgbm_advanced_ready'
+PARAMS_FILE = 'outputs/tuning/lightgbm_best_params.json'  # Written by tune_lightgbm.py
+PRED_OUTPUT = 'outputs/backtest/walk_forward_preds'
+RESULTS_OUTPUT = 'outputs/backtest/walk_forward_results'
+
+MIN_TRAIN = 30     # Dates of history before the first origin
+STEP = 1           # Dates between origins
+WINDOW = None      # Training window in dates; None expands
+REFIT_EVERY = 5    # Folds per refit; LightGBM keeps boosting on new rows in between
+UPDATE_ROUNDS = 20
+MAX_WORKERS = None  # None uses every core
+
+READY_FEATURES = ['lag_close_1', 'lag_sentiment_1', 'roll_mean_3', 'roll_std_3']
+NON_FEATURES = ['Date', TICKER_COL, 'target', 'Close_norm', 'Sentiment_norm']
+DEFAULT_PARAMS = {'learning_rate': 0.1, 'max_depth': 5, 'n_estimators': 150, 'num_leaves': 15}  # As lightgbm_final_model.py
+
+# name -> (dataset, features or None for every non-target column, params or 'tuned')
+LIGHTGBM_VARIANTS = {
+    'lightgbm_final': (LGBM_READY, READY_FEATURES, 'tuned'),
+    'lightgbm_sentiment': (LGBM_READY, READY_FEATURES, {}),
+    'lightgbm_nosentiment': (LGBM_READY, ['lag_close_1', 'roll_mean_3', 'roll_std_3'], {}),
+    'lightgbm_advanced': (LGBM_ADVANCED, None, {}),
+}
+# name -> regressor; both fit Close on the merged panel and are scored, like LightGBM, in Close_norm units.
+# Prophet standardizes regressors on the rows it is fit on, so the raw sentiment needs no scaling.
+PROPHET_VARIANTS = {'prophet_vanilla': None, 'prophet_roberta': 'roberta_positive_avg'}
+# The per-ticker min-max normalized tables hold full-history extremes; each fold is re-normalized with
+# what was known at its origin (see walk_forward.lightgbm_block)
+SPECS = {LGBM_READY: LGBM_READY_SPEC, LGBM_ADVANCED: LGBM_ADVANCED_SPEC}
+
+
+def lightgbm_data(path, merged):
+    """A LightGBM dataset with the date each row's next-day target belongs to."""
+    df = read_table(path)
+    df[DATE_COL] = pd.to_datetime(df[DATE_COL])
+    next_dates = merged[[TICKER_COL, DATE_COL]].assign(
+        target_date=merged.groupby(TICKER_COL)[DATE_COL].shift(-1))
+    return df.merge(next_dates, on=[TICKER_COL, DATE_COL], how='inner').dropna(subset=['target_date'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the Prophet and LightGBM variants.")
+    parser.add_argument('--models', nargs='+', choices=list(LIGHTGBM_VARIANTS) + list(PROPHET_VARIANTS),
+                        default=list(LIGHTGBM_VARIANTS) + list(PROPHET_VARIANTS))
+    parser.add_argument('--min-train', type=int, default=MIN_TRAIN, help="dates before the first origin")
+    parser.add_argument('--step', type=int, default=STEP, help="dates between origins")
+    parser.add_argument('--window', type=int, default=WINDOW, help="sliding training window in dates")
+    parser.add_argument('--refit-every', type=int, default=REFIT_EVERY, help="folds per refit")
+    parser.add_argument('--no-warm-start', action='store_true', help="refit cold and reuse LightGBM models unchanged between refits")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+
+    print("Loading merged sentiment + price data...")
+    merged = read_table(MERGED_FILE)
+    merged[DATE_COL] = pd.to_datetime(merged[DATE_COL])
+    merged = merged.sort_values([TICKER_COL, DATE_COL], kind='stable').reset_index(drop=True)
+    schedule = make_schedule(merged[DATE_COL], args.min_train, args.step, args.window, args.refit_every)
+    blocks = refit_blocks(schedule)
+    print(f" {len(schedule)} origins from {schedule['origin'].min():%Y-%m-%d}, {len(blocks)} refits per model")
+
+    # Prophet series are the slowest tasks, so they go to the pool first
+    tasks = []
+    frames = split_tickers(merged)
+    scalers = ticker_scalers(merged)
+    for name in [m for m in args.models if m in PROPHET_VARIANTS]:
+        regressor = PROPHET_VARIANTS[name]
+        columns = ['ds', 'y'] + ([regressor] if regressor else [])
+        for ticker, frame in frames.items():
+            df = frame.assign(ds=frame[DATE_COL], y=frame['Close'])[columns]
+            tasks.append((prophet_ticker, {'name': name, 'ticker': ticker, 'df': df, 'schedule': schedule,
+                                           'regressor': regressor, 'warm_start': not args.no_warm_start,
+                                           'scale': scalers[ticker]['Close']}))
+
+    datasets = {}
+    for name in [m for m in args.models if m in LIGHTGBM_VARIANTS]:
+        path, features, params = LIGHTGBM_VARIANTS[name]
+        if path not in datasets:
+            datasets[path] = lightgbm_data(path, merged)
+        data = datasets[path]
+        features = features or [c for c in data.columns if c not in NON_FEATURES + ['target_date']]
+        params = load_params(PARAMS_FILE, DEFAULT_PARAMS) if params == 'tuned' else params
+        for block in blocks:
+            # A block only ever sees targets before its last fold ends
+            visible = data[data['target_date'] < block['end'].max()]
+            tasks.append((lightgbm_block, {'name': name, 'data': visible, 'features': features, 'params': params,
+                                           'block': block, 'warm_start': not args.no_warm_start,
+                                           'update_rounds': UPDATE_ROUNDS, 'spec': SPECS[path],
+                                           'scalers': scalers}))
+
+    print(f"Running {len(tasks)} walk-forward tasks in parallel...")
+    start = time.perf_counter()
+    preds = pd.concat(run_tasks(tasks, args.workers), ignore_index=True)
+    print(f" {len(preds)} forecasts in {time.perf_counter() - start:.1f}s")
+
+    scale = merged.groupby(TICKER_COL)['Close'].agg(['min', 'max'])
+    results = score(preds, scale)
+    summary = score(preds, scale, keys=('model',)).sort_values('mae')
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    write_table(preds, PRED_OUTPUT)
+    write_table(results, RESULTS_OUTPUT)
+    print(f" Forecasts saved to {PRED_OUTPUT}")
+    print(f" Results per model, ticker and fold saved to {RESULTS_OUTPUT}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from common.incremental import new_scaler, rebase_columns
+from common.panel import DATE_COL, TICKER_COL
+from common.prophet_fit import fit_prophet, stan_init
+from common.telemetry import span
+
+PRED_COLUMNS = ['model', TICKER_COL, 'fold', 'origin', DATE_COL, 'horizon', 'y_true', 'y_pred', 'y_ref']
+
+
+def make_schedule(dates, min_train, step=1, window=None, refit_every=1):
+    """One row per fold: [fold, origin, end, train_start, refit].
+
+    Origins are every `step`-th date after the first `min_train`. A fold scores
+    target dates in [origin, end), so consecutive folds tile the remaining
+    history. `window` (in dates) slides the training start; None expands it.
+    Models are refit on every `refit_every`-th fold and carried over otherwise.
+    """
+    dates = pd.DatetimeIndex(sorted(pd.unique(pd.to_datetime(dates))))
+    positions = np.arange(min_train, len(dates), step)
+    if len(positions) == 0:
+        raise ValueError(f"Need more than {min_train} dates for a walk-forward backtest, got {len(dates)}")
+    ends = [dates[p + step] if p + step < len(dates) else dates[-1] + pd.Timedelta(days=1) for p in positions]
+    starts = [dates[max(0, p - window)] if window else dates[0] for p in positions]
+    return pd.DataFrame({'fold': np.arange(len(positions)), 'origin': dates[positions], 'end': ends,
+                         'train_start': starts, 'refit': np.arange(len(positions)) % refit_every == 0})
+
+
+def refit_blocks(schedule):
+    """Split a schedule into runs of folds that start with a refit; each run is one sequential task."""
+    block_id = schedule['refit'].cumsum()
+    return [block for _, block in schedule.groupby(block_id, sort=True)]
+
+
+def ticker_scalers(frame):
+    """Per-ticker min-max scalers (see common.incremental.new_scaler) of the raw columns in `frame`."""
+    return {ticker: new_scaler(rows) for ticker, rows in frame.groupby(TICKER_COL, sort=True)}
+
+
+def rescale(df, spec, old, new, extra_columns=()):
+    """Re-express each ticker's normalized columns (and `spec` features) from scalers `old` to `new`, in place.
+
+    `extra_columns` are in Close_norm units, like the prediction columns. Tickers missing from either are left as is.
+    """
+    for ticker in sorted(new.keys() & old.keys()):
+        mask = df[TICKER_COL] == ticker
+        for raw, bounds in new[ticker].items():
+            rebase_columns(df, mask, spec, raw, old[ticker][raw], bounds, extra_columns if raw == 'Close' else ())
+    return df
+
+
+def lightgbm_block(name, data, features, params, block, warm_start=True, update_rounds=20, spec=(), scalers=None):
+    """Walk one pooled LightGBM model through a block of folds.
+
+    `data` holds every ticker's rows with a `target_date` (the date `target`
+    refers to). Training uses rows whose target is known before the origin; a
+    fold scores the rows whose target falls in [origin, end), one step ahead
+    with the observed features. Between refits the model either continues
+    boosting on the rows that became known (`warm_start`) or is reused as is.
+
+    `scalers` are the full-history per-ticker scalers `data` was normalized
+    with. Given them, the block re-normalizes `data` (columns and `spec`
+    features) with the min/max of the rows dated before its first origin, so
+    no fold sees later extremes, and reports forecasts back in the full-history
+    units that score() expects. Tickers without earlier rows are not forecast.
+    """
+    if scalers is not None:
+        past = ticker_scalers(data[data[DATE_COL] < block['origin'].min()])
+        data = rescale(data[data[TICKER_COL].isin(past)].copy(), spec, scalers, past)
+    data = data.sort_values('target_date', kind='stable').reset_index(drop=True)
+    target_dates = data['target_date'].to_numpy()
+    X, y = data[features], data['target'].to_numpy()
+    out, model, known = [], None, 0
+
+    for fold in block.itertuples(index=False):
+        lo = np.searchsorted(target_dates, np.datetime64(fold.train_start), 'left')
+        origin = np.searchsorted(target_dates, np.datetime64(fold.origin), 'left')
+        end = np.searchsorted(target_dates, np.datetime64(fold.end), 'left')
+        if model is None:
+            model = lgb.LGBMRegressor(n_jobs=1, verbose=-1, **params)
+            with span('fit', model=name, rows=origin - lo):
+                model.fit(X.iloc[lo:origin], y[lo:origin])
+        elif warm_start and origin > known:
+            update = lgb.LGBMRegressor(n_jobs=1, verbose=-1, **{**params, 'n_estimators': update_rounds})
+            with span('fit', model=name, rows=origin - known, warm=True):
+                update.fit(X.iloc[known:origin], y[known:origin], init_model=model.booster_)
+            model = update
+        known = origin
+        if end > origin:
+            test = data.iloc[origin:end]
+            with span('predict', model=name, rows=end - origin):
+                y_pred = model.predict(X.iloc[origin:end])
+            out.append(pd.DataFrame({'model': name, TICKER_COL: test[TICKER_COL].to_numpy(), 'fold': fold.fold,
+                                     'origin': fold.origin, DATE_COL: test['target_date'].to_numpy(),
+                                     'horizon': 1, 'y_true': y[origin:end], 'y_pred': y_pred,
+                                     'y_ref': test['Close_norm'].to_numpy()}))
+    if not out:
+        return pd.DataFrame(columns=PRED_COLUMNS)
+    out = pd.concat(out, ignore_index=True)
+    return rescale(out, [], past, scalers, ['y_true', 'y_pred', 'y_ref']) if scalers is not None else out
+
+
+def prophet_ticker(name, ticker, df, schedule, regressor=None, warm_start=True, scale=None):
+    """Walk one ticker's Prophet model through every fold.
+
+    `df` is the ticker's [ds, y(, regressor)] history in date order. A fitted
+    model forecasts every later fold until the next refit, so `horizon` counts
+    trading days since the end of its training data. The regressor is held at
+    its last value known at each origin, as the forecast scripts do. With
+    `warm_start` each refit starts from the previous fit's parameters.
+    Given `scale`, the (min, max) of the ticker's full-history Close, `y` is
+    the raw price and forecasts are reported min-max scaled by it.
+    """
+    ds = df['ds'].to_numpy()
+    out, model, fit_end = [], None, 0
+    for fold in schedule.itertuples(index=False):
+        lo = np.searchsorted(ds, np.datetime64(fold.train_start), 'left')
+        origin = np.searchsorted(ds, np.datetime64(fold.origin), 'left')
+        end = np.searchsorted(ds, np.datetime64(fold.end), 'left')
+        if fold.refit or model is None:
+            if origin - lo < 2:
+                continue
+            # Each refit starts from the previous fold's parameters
+            init = stan_init(model) if model is not None and warm_start else None
+            model = fit_prophet(df.iloc[lo:origin], [regressor] if regressor else [], init)
+            fit_end = origin
+        if end <= origin:
+            continue
+        future = df.iloc[origin:end][['ds']].reset_index(drop=True)
+        if regressor:
+            future[regressor] = df[regressor].iloc[origin - 1]
+        with span('predict', model=name, rows=len(future)):
+            y_pred = model.predict(future)['yhat'].to_numpy()
+        out.append(pd.DataFrame({'model': name, TICKER_COL: ticker, 'fold': fold.fold, 'origin': fold.origin,
+                                 DATE_COL: future['ds'].to_numpy(), 'horizon': np.arange(origin, end) - fit_end + 1,
+                                 'y_true': df['y'].iloc[origin:end].to_numpy(), 'y_pred': y_pred,
+                                 'y_ref': df['y'].iloc[origin - 1]}))
+    if not out:
+        return pd.DataFrame(columns=PRED_COLUMNS)
+    out = pd.concat(out, ignore_index=True)
+    if scale is not None:
+        lo, hi = scale
+        out[['y_true', 'y_pred', 'y_ref']] = (out[['y_true', 'y_pred', 'y_ref']] - lo) / ((hi - lo) or 1.0)
+    return out
+
+
+def score(preds, scale=None, keys=('model', TICKER_COL, 'fold')):
+    """MAE, RMSE, MAPE and directional accuracy per `keys` group.
+
+    Errors are in the normalized units the models predict. MAPE is taken in
+    price terms when `scale` gives each ticker's (min, max) Close, since
+    min-max scaled prices reach zero.
+    """
+    preds = preds.copy()
+    err = preds['y_pred'] - preds['y_true']
+    preds['abs_err'], preds['sq_err'] = err.abs(), err ** 2
+    true, pred = preds['y_true'], preds['y_pred']
+    if scale is not None:
+        lo = preds[TICKER_COL].map(scale['min'])
+        width = preds[TICKER_COL].map(scale['max']) - lo
+        true, pred = lo + true * width, lo + pred * width
+    preds['ape'] = (pred - true).abs() / true.abs().where(true != 0)
+    # Did the forecast move the same way as the price from the last known value?
+    preds['hit'] = np.sign(preds['y_pred'] - preds['y_ref']) == np.sign(preds['y_true'] - preds['y_ref'])
+
+    aggs = {'origin': ('origin', 'first')} if 'fold' in keys else {}
+    out = preds.groupby(list(keys), sort=True).agg(
+        **aggs, n=('y_true', 'size'), mae=('abs_err', 'mean'), rmse=('sq_err', 'mean'),
+        mape=('ape', 'mean'), directional_accuracy=('hit', 'mean'))
+    out['rmse'] = np.sqrt(out['rmse'])
+    out['mape'] *= 100
+    return out.reset_index()
@@ -0,0 +1,140 @@
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from stages import BENCHMARKS, measure
+
+# Times every pipeline stage on deterministic synthetic data and compares against a stored baseline.
+#   python scripts/benchmark/run_benchmarks.py                        # default size, all stages
+#   python scripts/benchmark/run_benchmarks.py --tickers 100 --days 500 --stages feature_building lightgbm_fit
+#   python scripts/benchmark/run_benchmarks.py --save-baseline        # accept this run as the new baseline
+HISTORY_FILE = 'outputs/benchmarks/history.json'
+BASELINE_FILE = 'outputs/benchmarks/baseline.json'
+
+TICKERS = 25
+DAYS = 250
+TWEETS_PER_DAY = 20   # Per ticker
+SCORE_TWEETS = 256    # Tweets sent through the sentiment model; CPU inference is far slower than the rest
+HORIZON = 30
+REPEAT = 3            # Timed runs per stage; the median is recorded
+TOLERANCE = 0.20      # Slower or larger than baseline by more than this fraction is a regression
+MIN_DELTA_S = 0.05    # Ignore slowdowns smaller than this, which are timer noise on fast stages
+
+
+def size_key(size):
+    return ','.join(f'{k}={v}' for k, v in sorted(size.items()))
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_stage(name, size, repeat):
+    # A fresh interpreter per stage, so peak RSS and import costs don't leak between stages
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+        return pool.submit(measure, name, size, repeat).result()
+
+
+def load_json(path, default):
+    if not os.path.exists(path):
+        return default
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_json(obj, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(obj, f, indent=2)
+
+
+def regressions(results, baseline, tolerance=TOLERANCE):
+    """One message per stage that got slower or larger than its baseline by more than `tolerance`."""
+    found = []
+    for name, result in results.items():
+        base = baseline['results'].get(name)
+        if base is None or base.get('model') != result.get('model'):
+            continue
+        if result['wall_s'] > base['wall_s'] * (1 + tolerance) and result['wall_s'] - base['wall_s'] > MIN_DELTA_S:
+            found.append(f"{name}: wall time {base['wall_s']:.3f}s -> {result['wall_s']:.3f}s")
+        if result['peak_rss_mb'] > base['peak_rss_mb'] * (1 + tolerance):
+            found.append(f"{name}: peak RSS {base['peak_rss_mb']:.0f} MB -> {result['peak_rss_mb']:.0f} MB")
+    return found
+
+
+def change(value, base):
+    return f"{(value / base - 1) * 100:+.0f}%" if base else ''
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every pipeline stage on synthetic data.")
+    parser.add_argument('--stages', nargs='+', choices=list(BENCHMARKS), default=list(BENCHMARKS))
+    parser.add_argument('--tickers', type=int, default=TICKERS)
+    parser.add_argument('--days', type=int, default=DAYS)
+    parser.add_argument('--tweets-per-day', type=int, default=TWEETS_PER_DAY, help="per ticker")
+    parser.add_argument('--score-tweets', type=int, default=SCORE_TWEETS, help="tweets scored by the model")
+    parser.add_argument('--repeat', type=int, default=REPEAT)
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE)
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the baseline for its size")
+    args = parser.parse_args()
+
+    size = {'tickers': args.tickers, 'days': args.days, 'tweets_per_day': args.tweets_per_day,
+            'score_tweets': args.score_tweets, 'horizon': HORIZON}
+    print(f"Benchmarking {len(args.stages)} stages on {args.tickers} tickers x {args.days} days x "
+          f"{args.tweets_per_day} tweets/day ({args.repeat} runs each)...")
+    results = {}
+    for name in args.stages:
+        results[name] = run_stage(name, size, args.repeat)
+        r = results[name]
+        print(f"  {name:<18} {r['wall_s']:8.3f}s  {r['throughput']:12.1f} {r['unit']}/s  "
+              f"{r['peak_rss_mb']:7.0f} MB peak")
+
+    run = {'run_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'), 'commit': git_commit(),
+           'machine': {'platform': platform.platform(), 'python': platform.python_version(),
+                       'cpus': os.cpu_count()},
+           'size': size, 'results': results}
+    history = load_json(HISTORY_FILE, [])
+    history.append(run)
+    save_json(history, HISTORY_FILE)
+    print(f" Run appended to {HISTORY_FILE} ({len(history)} runs)")
+
+    # One baseline per size, since timings at different sizes are not comparable
+    baselines = load_json(BASELINE_FILE, {})
+    key = size_key(size)
+    baseline = baselines.get(key)
+    if baseline is None or args.save_baseline:
+        # Stages not rerun keep their earlier baseline
+        previous = baseline['results'] if baseline else {}
+        baselines[key] = {**run, 'results': {**previous, **results}}
+        save_json(baselines, BASELINE_FILE)
+        print(f" Baseline for {key} saved to {BASELINE_FILE}")
+        return
+
+    print(f"Comparing with the baseline from {baseline['run_at']} (commit {baseline['commit']}):")
+    for name, r in results.items():
+        base = baseline['results'].get(name)
+        if base:
+            print(f"  {name:<18} wall {change(r['wall_s'], base['wall_s']):>6}  "
+                  f"peak RSS {change(r['peak_rss_mb'], base['peak_rss_mb']):>6}")
+    found = regressions(results, baseline, args.tolerance)
+    if found:
+        print(f"{len(found)} regression(s) beyond {args.tolerance:.0%}:")
+        for message in found:
+            print(f"  {message}")
+        sys.exit(1)
+    print(" No regressions")
+
+
+if __name__ == '__main__':
+    main()
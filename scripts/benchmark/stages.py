@@ -0,0 +1,216 @@
+import atexit
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sentiment'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'dashboard'))
+from attribution import daily_roberta_sentiment
+from common.features import LGBM_ADVANCED_SPEC, build_features
+from common.market_calendar import trading_sessions
+from common.panel import DATE_COL, TICKER_COL, merge_panel
+from common.storage import write_table
+from dashboard_store import OVERVIEW_POINTS, SERIES_COLUMNS, downsample, query_metrics, query_series
+from synthetic import SEED, WORDS, synthetic_panel, synthetic_prices, synthetic_scores, synthetic_tweets
+from tweet_stream import DailyAggregator
+
+# torch, LightGBM and Prophet are imported by the benchmarks that use them, so other stages' RSS leaves them out
+
+# run() is the timed work; everything before it (data generation, model loading) is setup
+Workload = namedtuple('Workload', ['run', 'items', 'unit', 'info'])
+
+SCORE_COLUMNS = ['roberta_negative', 'roberta_neutral', 'roberta_positive']  # roberta_engine's, without importing torch
+CHUNK_SIZE = 20000  # As roberta_sentiment.py
+BATCH_SIZE = 64
+LGBM_PARAMS = {'learning_rate': 0.1, 'max_depth': 5, 'n_estimators': 150, 'num_leaves': 15}  # As lightgbm_final_model.py
+REGRESSOR = 'Sentiment_norm'
+SECTORS = 11  # Synthetic tickers are dealt round-robin into this many sectors
+
+
+def load_scorer(batch_size=BATCH_SIZE):
+    """(scorer, model name): the RoBERTa sentiment model if it is in the local cache, else the same
+    architecture with random weights, so scoring is benchmarked offline either way."""
+    os.environ.setdefault('HF_HUB_OFFLINE', '1')
+    from roberta_engine import MODEL_NAME, RobertaScorer
+    try:
+        return RobertaScorer(MODEL_NAME, batch_size), MODEL_NAME
+    except (OSError, ValueError):
+        return random_scorer(RobertaScorer, batch_size), 'roberta-base (random weights)'
+
+
+def random_scorer(scorer_class, batch_size):
+    import torch
+    from roberta_engine import TorchBackend
+    from tokenizers import Tokenizer, models, pre_tokenizers, processors
+    from transformers import PreTrainedTokenizerFast, RobertaConfig, RobertaForSequenceClassification
+
+    torch.manual_seed(SEED)
+    vocab = {token: i for i, token in enumerate(['<s>', '<pad>', '</s>', '<unk>', *WORDS])}
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token='<unk>'))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.post_processor = processors.TemplateProcessing(single='<s> $A </s>',
+                                                             special_tokens=[('<s>', 0), ('</s>', 2)])
+    # Skip RobertaScorer.__init__ (which downloads) but keep its batching and padding in score()
+    scorer = scorer_class.__new__(scorer_class)
+    scorer.model_name, scorer.batch_size, scorer.max_length = None, batch_size, 512
+    scorer.tokenizer = PreTrainedTokenizerFast(tokenizer_object=tokenizer, bos_token='<s>', eos_token='</s>',
+                                               unk_token='<unk>', pad_token='<pad>')
+    scorer.backend = TorchBackend(RobertaForSequenceClassification(RobertaConfig(num_labels=3)))
+    return scorer
+
+
+def scored_tweets(size):
+    tweets = synthetic_tweets(size['tickers'], size['days'], size['tweets_per_day'])
+    return pd.concat([tweets, pd.DataFrame(synthetic_scores(len(tweets)), columns=SCORE_COLUMNS)], axis=1)
+
+
+def tweet_scoring(size):
+    tweets = synthetic_tweets(size['tickers'], size['days'], size['tweets_per_day'])
+    texts = tweets['Tweet'].sample(min(size['score_tweets'], len(tweets)), random_state=SEED).tolist()
+    scorer, model = load_scorer()
+    return Workload(lambda: scorer.score(texts), len(texts), 'tweets', {'model': model})
+
+
+def daily_aggregation(size):
+    tweets = scored_tweets(size)
+    chunks = [tweets.iloc[i:i + CHUNK_SIZE] for i in range(0, len(tweets), CHUNK_SIZE)]
+    prices = synthetic_prices(size['tickers'], size['days'])
+    tickers = sorted(prices[TICKER_COL].unique())
+    sessions = trading_sessions(prices[DATE_COL])
+
+    root = tempfile.mkdtemp(prefix='stockcast-bench-')
+    atexit.register(shutil.rmtree, root, ignore_errors=True)
+    sector_file = f'{root}/ticker_sectors.csv'
+    pd.DataFrame({TICKER_COL: tickers, 'Sector': [f'sector_{i % SECTORS}' for i in range(len(tickers))]}).to_csv(
+        sector_file, index=False)
+
+    def run():
+        # Streaming session stats as roberta_sentiment.py, then the cashtag attribution and merge
+        # save_merged_sentiment.py does
+        daily = DailyAggregator(SCORE_COLUMNS, sessions=sessions)
+        for chunk in chunks:
+            daily.update(chunk)
+        daily.to_frame()
+        return merge_panel(prices, daily_roberta_sentiment(tweets, tickers, sessions, sector_file))
+    return Workload(run, len(tweets), 'tweets', {})
+
+
+def feature_building(size):
+    panel = synthetic_panel(size['tickers'], size['days'])
+    return Workload(lambda: build_features(panel, LGBM_ADVANCED_SPEC), len(panel), 'rows', {})
+
+
+def lightgbm_data(size):
+    df = build_features(synthetic_panel(size['tickers'], size['days']), LGBM_ADVANCED_SPEC)
+    features = [f.name for f in LGBM_ADVANCED_SPEC if f.kind != 'lead']
+    return df[features], df['target']
+
+
+def lightgbm_fit(size):
+    import lightgbm as lgb
+    X, y = lightgbm_data(size)
+    return Workload(lambda: lgb.LGBMRegressor(verbose=-1, **LGBM_PARAMS).fit(X, y), len(X), 'rows', {})
+
+
+def lightgbm_predict(size):
+    import lightgbm as lgb
+    X, y = lightgbm_data(size)
+    model = lgb.LGBMRegressor(verbose=-1, **LGBM_PARAMS).fit(X, y)
+    return Workload(lambda: model.predict(X), len(X), 'rows', {})
+
+
+def prophet_frames(size):
+    panel = synthetic_panel(size['tickers'], size['days'])
+    panel = panel.rename(columns={DATE_COL: 'ds', 'Close_norm': 'y'})
+    return [frame[['ds', 'y', REGRESSOR]].reset_index(drop=True) for _, frame in panel.groupby(TICKER_COL)]
+
+
+def prophet_fit(size):
+    from common.prophet_fit import fit_prophet
+    frames = prophet_frames(size)
+    return Workload(lambda: [fit_prophet(df, [REGRESSOR]) for df in frames], len(frames), 'series', {})
+
+
+def prophet_predict(size):
+    from common.prophet_fit import fit_prophet
+    frames = prophet_frames(size)
+    fitted = [(fit_prophet(df, [REGRESSOR]), df) for df in frames]
+
+    def run():
+        # As forecast_all_tickers.py: the regressor is held at its last known value
+        for model, df in fitted:
+            future = model.make_future_dataframe(periods=size['horizon'])
+            future = future.merge(df[['ds', REGRESSOR]], on='ds', how='left')
+            future[REGRESSOR] = future[REGRESSOR].ffill()
+            model.predict(future)
+    return Workload(run, len(fitted), 'series', {})
+
+
+def dashboard_loading(size):
+    prices = synthetic_prices(size['tickers'], size['days'])
+    rng = np.random.default_rng(SEED)
+    parts = [prices.assign(model='actual', horizon=0, value=prices['Close'])]
+    for model in ('prophet', 'lightgbm'):
+        noise = rng.normal(1.0, 0.02, size=len(prices))
+        parts.append(prices.assign(model=model, horizon=1, value=prices['Close'] * noise,
+                                   lower=prices['Close'] * noise * 0.95, upper=prices['Close'] * noise * 1.05))
+    series = pd.concat(parts, ignore_index=True).assign(level=0)[SERIES_COLUMNS]
+    overview = downsample(series, OVERVIEW_POINTS, keys=(TICKER_COL, 'model')).assign(level=1)
+    metrics = series[series['horizon'] > 0].groupby(['model', TICKER_COL, 'horizon']).size().rename('n').reset_index()
+
+    root = tempfile.mkdtemp(prefix='stockcast-bench-')
+    atexit.register(shutil.rmtree, root, ignore_errors=True)
+    series_file, metrics_file = f'{root}/series', f'{root}/metrics'
+    write_table(pd.concat([series, overview], ignore_index=True), series_file)
+    write_table(metrics, metrics_file)
+
+    tickers = sorted(prices[TICKER_COL].unique())
+    dates = prices[DATE_COL].sort_values().unique()
+    start, end = dates[len(dates) // 2], dates[-1]
+
+    def run():
+        # What the dashboard reads when a ticker is picked: overview, a zoomed range and its metrics
+        for ticker in tickers:
+            query_series(ticker, series_file=series_file)
+            query_series(ticker, start=start, end=end, series_file=series_file)
+            query_metrics(ticker, metrics_file=metrics_file)
+    return Workload(run, 3 * len(tickers), 'queries', {})
+
+
+BENCHMARKS = {
+    'tweet_scoring': tweet_scoring,
+    'daily_aggregation': daily_aggregation,
+    'feature_building': feature_building,
+    'lightgbm_fit': lightgbm_fit,
+    'lightgbm_predict': lightgbm_predict,
+    'prophet_fit': prophet_fit,
+    'prophet_predict': prophet_predict,
+    'dashboard_loading': dashboard_loading,
+}
+
+
+def measure(name, size, repeat=3):
+    """Set up benchmark `name` at `size` and time its work `repeat` times.
+
+    Meant to run in a fresh process, so peak RSS covers this stage alone.
+    """
+    start = time.perf_counter()
+    work = BENCHMARKS[name](size)
+    setup = time.perf_counter() - start
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        work.run()
+        times.append(time.perf_counter() - start)
+    wall = float(np.median(times))
+    return {'wall_s': wall, 'min_s': min(times), 'setup_s': setup,
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            'items': work.items, 'unit': work.unit, 'throughput': work.items / wall if wall > 0 else None,
+            **work.info}
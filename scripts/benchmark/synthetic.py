@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+
+from common.panel import DATE_COL, TICKER_COL, normalize_per_ticker, sort_panel
+
+# Everything here is drawn from a seeded generator, so a given size always yields the same data offline
+SEED = 0
+START_DATE = '2021-01-04'
+WORDS = ('stock buy sell hold calls puts earnings guidance beat miss rally dip moon crash bullish bearish '
+         'short squeeze dividend split upgrade downgrade target price volume breakout support resistance '
+         'chart trend week today tomorrow market open close gap red green long position shares options '
+         'fed rates inflation revenue margin growth ceo launch delivery demand supply recall lawsuit').split()
+
+
+def ticker_names(n):
+    """n distinct ticker-like names: AAA, AAB, ..."""
+    letters = np.array(list('ABCDEFGHIJKLMNOPQRSTUVWXYZ'))
+    idx = np.arange(n)
+    return [''.join(letters[[i // 676 % 26, i // 26 % 26, i % 26]]) for i in idx]
+
+
+def trading_days(days):
+    return pd.bdate_range(START_DATE, periods=days)
+
+
+def synthetic_prices(tickers, days, seed=SEED):
+    """[Date, Stock Name, Close]: a geometric random walk per ticker over business days."""
+    rng = np.random.default_rng(seed)
+    names, dates = ticker_names(tickers), trading_days(days)
+    start = rng.uniform(10, 500, size=(tickers, 1))
+    returns = rng.normal(0.0005, 0.02, size=(tickers, days))
+    close = start * np.exp(np.cumsum(returns, axis=1))
+    return pd.DataFrame({DATE_COL: np.tile(dates, tickers), TICKER_COL: np.repeat(names, days),
+                         'Close': close.ravel()})
+
+
+def synthetic_tweets(tickers, days, tweets_per_day, seed=SEED):
+    """[Date, Tweet, Stock Name] like the raw tweet archive: UTC timestamps and 5-40 word texts with a cashtag."""
+    rng = np.random.default_rng(seed + 1)
+    names, dates = ticker_names(tickers), trading_days(days)
+    n = tickers * days * tweets_per_day
+    ticker_idx = np.repeat(np.arange(tickers), days * tweets_per_day)
+    day_idx = np.tile(np.repeat(np.arange(days), tweets_per_day), tickers)
+    seconds = rng.integers(0, 86400, size=n)
+    timestamps = dates[day_idx] + pd.to_timedelta(seconds, unit='s')
+
+    lengths = rng.integers(5, 41, size=n)
+    words = np.array(WORDS)[rng.integers(0, len(WORDS), size=lengths.sum())]
+    bounds = np.concatenate([[0], np.cumsum(lengths)])
+    cashtags = np.array([f'${t}' for t in names])[ticker_idx]
+    texts = [f"{tag} {' '.join(words[a:b])}" for tag, a, b in zip(cashtags, bounds[:-1], bounds[1:])]
+    return pd.DataFrame({DATE_COL: timestamps.tz_localize('UTC').astype(str), 'Tweet': texts,
+                         TICKER_COL: np.array(names)[ticker_idx]})
+
+
+def synthetic_scores(n, seed=SEED):
+    """(n, 3) negative/neutral/positive probabilities, as the sentiment scorer returns."""
+    rng = np.random.default_rng(seed + 2)
+    return rng.dirichlet([1.0, 2.0, 1.5], size=n).astype(np.float32)
+
+
+def synthetic_panel(tickers, days, seed=SEED):
+    """A merged_sentiment_stock-like panel: Close, roberta_positive_avg and their per-ticker min-max columns."""
+    rng = np.random.default_rng(seed + 3)
+    panel = synthetic_prices(tickers, days, seed)
+    panel['roberta_positive_avg'] = rng.beta(2, 3, size=len(panel))
+    panel = normalize_per_ticker(panel, ['Close', 'roberta_positive_avg'], ['Close_norm', 'Sentiment_norm'])
+    return sort_panel(panel)
@@ -0,0 +1,179 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+from common.panel import DATE_COL, TICKER_COL
+from common.telemetry import span
+
+# kind is one of: lag, lead, mean, std, min, max, ewm.
+# window is the shift for lag/lead, the window length for rolling stats and the span for ewm.
+Feature = namedtuple('Feature', ['name', 'source', 'kind', 'window'])
+
+ROLLING_KINDS = ('mean', 'std', 'min', 'max')
+
+
+def lag(source, periods, name):
+    return Feature(name, source, 'lag', periods)
+
+
+def lead(source, periods, name):
+    return Feature(name, source, 'lead', periods)
+
+
+def rolling(source, window, stat, name):
+    return Feature(name, source, stat, window)
+
+
+def ewm(source, span, name):
+    return Feature(name, source, 'ewm', span)
+
+
+def expand(source, kind, windows, prefix):
+    """Many features of one kind, e.g. expand('Close_norm', 'lag', range(1, 31), 'lag_close')."""
+    return [Feature(f'{prefix}_{w}', source, kind, w) for w in windows]
+
+
+# Specs for the datasets the LightGBM scripts consume
+SENTIMENT_AVG_SPEC = [
+    rolling('Sentiment_norm', 3, 'mean', 'sentiment_avg_3'),
+    rolling('Sentiment_norm', 5, 'mean', 'sentiment_avg_5'),
+]
+
+LGBM_READY_SPEC = [
+    lag('Close_norm', 1, 'lag_close_1'),
+    lag('Sentiment_norm', 1, 'lag_sentiment_1'),
+    rolling('Close_norm', 3, 'mean', 'roll_mean_3'),
+    rolling('Close_norm', 3, 'std', 'roll_std_3'),
+    lead('Close_norm', 1, 'target'),
+]
+
+LGBM_ADVANCED_SPEC = SENTIMENT_AVG_SPEC + (
+    expand('Close_norm', 'lag', range(1, 4), 'lag_close')
+    + expand('Sentiment_norm', 'lag', range(1, 4), 'lag_sentiment')
+    + [rolling('Close_norm', 3, 'mean', 'roll_mean_3'),
+       rolling('Close_norm', 3, 'std', 'roll_std_3'),
+       lead('Close_norm', 1, 'target')]
+)
+
+
+def history_needed(spec):
+    """Rows of trailing history a spec reads to compute its newest row."""
+    return max([f.window for f in spec if f.kind == 'lag']
+               + [f.window - 1 for f in spec if f.kind in ROLLING_KINDS] + [0])
+
+
+def _rolling(X, window, stat):
+    out = np.full(X.shape, np.nan)
+    if window > len(X):
+        return out
+    if stat == 'mean':
+        # Cumulative-sum trick: O(n) regardless of window length
+        clean = np.where(np.isnan(X), 0.0, X)
+        csum = np.vstack([np.zeros((1, X.shape[1])), np.cumsum(clean, axis=0)])
+        nans = np.vstack([np.zeros((1, X.shape[1])), np.cumsum(np.isnan(X), axis=0)])
+        sums = csum[window:] - csum[:-window]
+        has_nan = (nans[window:] - nans[:-window]) > 0
+        out[window - 1:] = np.where(has_nan, np.nan, sums / window)
+        return out
+    # (n - window + 1, columns, window) view, no copy
+    view = sliding_window_view(X, window, axis=0)
+    if stat == 'std':
+        out[window - 1:] = view.std(axis=-1, ddof=1) if window > 1 else np.nan
+    elif stat == 'min':
+        out[window - 1:] = view.min(axis=-1)
+    elif stat == 'max':
+        out[window - 1:] = view.max(axis=-1)
+    else:
+        raise ValueError(f"Unknown rolling stat: {stat}")
+    return out
+
+
+def _ewm(X, window, starts, ends):
+    # Recursive y_t = (1 - a) * y_{t-1} + a * x_t (pandas adjust=False), restarted per ticker
+    alpha = 2.0 / (window + 1.0)
+    out = np.empty(X.shape)
+    for start, end in zip(starts, ends):
+        block = X[start:end]
+        if np.isnan(block).any():
+            # lfilter would carry a NaN forward for good; pandas skips it and decays the older weight across the gap
+            out[start:end] = pd.DataFrame(block).ewm(span=window, adjust=False).mean().to_numpy()
+            continue
+        zi = (1 - alpha) * block[:1]
+        out[start:end] = lfilter([alpha], [1.0, alpha - 1.0], block, axis=0, zi=zi)[0]
+    return out
+
+
+def compute_features(X, codes, spec, sources):
+    """Evaluate `spec` over the (rows, sources) float matrix `X`.
+
+    Rows must be sorted by group then time; `codes` holds each row's group id.
+    Windows are computed over the whole matrix at once and then masked where
+    they would reach into the previous group.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    n = len(X)
+    col = {s: i for i, s in enumerate(sources)}
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if n else np.array([], dtype=int)
+    ends = np.r_[starts[1:], n]
+    sizes = ends - starts
+    pos = np.arange(n) - np.repeat(starts, sizes)
+    remaining = np.repeat(sizes, sizes) - 1 - pos
+
+    out = np.full((n, len(spec)), np.nan)
+    # Group features by (kind, window) so each pass covers every source column at once
+    passes = {}
+    for j, f in enumerate(spec):
+        passes.setdefault((f.kind, f.window), []).append(j)
+
+    for (kind, window), idx in passes.items():
+        src = [col[spec[j].source] for j in idx]
+        block = X[:, src]
+        if kind == 'lag':
+            res = np.full(block.shape, np.nan)
+            if window < n:
+                res[window:] = block[:n - window]
+            res[pos < window] = np.nan
+        elif kind == 'lead':
+            res = np.full(block.shape, np.nan)
+            if window < n:
+                res[:n - window] = block[window:]
+            res[remaining < window] = np.nan
+        elif kind in ROLLING_KINDS:
+            res = _rolling(block, window, kind)
+            res[pos < window - 1] = np.nan
+        elif kind == 'ewm':
+            res = _ewm(block, window, starts, ends)
+        else:
+            raise ValueError(f"Unknown feature kind: {kind}")
+        out[:, idx] = res
+    return out
+
+
+def build_features(df, spec, ticker_col=TICKER_COL, date_col=DATE_COL, dropna=True, date_major=True):
+    """Append every feature in `spec` to `df`, computed per ticker in one vectorized pass.
+
+    Output keeps the input columns followed by the spec's features in spec order.
+    With date_major=True rows come back sorted by (date, ticker), so a
+    chronological shuffle=False split holds out the latest days of every ticker.
+    """
+    with span('features', rows=len(df), features=len(spec)):
+        df = df.copy()
+        df[date_col] = pd.to_datetime(df[date_col])
+        keys = [ticker_col, date_col] if ticker_col in df.columns else [date_col]
+        df = df.sort_values(keys, kind='stable').reset_index(drop=True)
+        codes = (pd.factorize(df[ticker_col])[0] if ticker_col in df.columns
+                 else np.zeros(len(df), dtype=np.int64))
+
+        sources = list(dict.fromkeys(f.source for f in spec))
+        values = compute_features(df[sources].to_numpy(dtype=np.float64), codes, spec, sources)
+        features = pd.DataFrame(values, columns=[f.name for f in spec], index=df.index)
+        df = pd.concat([df.drop(columns=[c for c in features.columns if c in df.columns]), features], axis=1)
+
+        if dropna:
+            df = df.dropna()
+        if date_major and ticker_col in df.columns:
+            df = df.sort_values([date_col, ticker_col], kind='stable')
+    return df.reset_index(drop=True)
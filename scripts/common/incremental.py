@@ -0,0 +1,122 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from common.panel import DATE_COL, TICKER_COL
+
+# Raw column -> the per-ticker min-max normalized column derived from it. The sector
+# column only exists with a sector file; a state tracks the ones its build had.
+NORMALIZED = {'Close': 'Close_norm', 'roberta_positive_avg': 'Sentiment_norm',
+              'sector_roberta_positive_avg': 'Sector_Sentiment_norm'}
+
+
+def load_state(path):
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(state, path):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def bootstrap_state(merged, tail_rows, emitted):
+    """Build the tail state from a full build of merged_sentiment_stock.
+
+    `emitted` maps dataset name -> {ticker: last date already written}.
+    """
+    merged = merged.sort_values([TICKER_COL, DATE_COL])
+    state = {'tail_rows': tail_rows, 'tickers': {}}
+    for ticker, rows in merged.groupby(TICKER_COL):
+        state['tickers'][ticker] = {
+            'scaler': new_scaler(rows),
+            'tail': take_tail(rows, tail_rows),
+            'last_date': rows[DATE_COL].max().strftime('%Y-%m-%d'),
+            'emitted': {name: dates.get(ticker) for name, dates in emitted.items()},
+        }
+    return state
+
+
+def tail_frame(ticker, ticker_state):
+    tail = pd.DataFrame(ticker_state['tail'])
+    tail[DATE_COL] = pd.to_datetime(tail[DATE_COL])
+    tail.insert(1, TICKER_COL, ticker)
+    return tail
+
+
+def new_scaler(rows):
+    """Per-column [min, max] of the normalized columns present in `rows`; NaN values are skipped."""
+    return {raw: [float(rows[raw].min()), float(rows[raw].max())] for raw in NORMALIZED if raw in rows.columns}
+
+
+def normalize(df, scaler):
+    for raw, (lo, hi) in scaler.items():
+        # A NaN range (no finite value yet) leaves the column NaN, as normalize_per_ticker does
+        df[NORMALIZED[raw]] = (df[raw] - lo) / ((hi - lo) or 1.0)
+    return df
+
+
+def widen_scaler(scaler, rows):
+    """New per-column [min, max] after seeing `rows`, plus which columns moved."""
+    widened, moved = {}, []
+    for raw, (lo, hi) in scaler.items():
+        # fmin/fmax ignore NaN, so columns with gaps (sector spillover) widen like a skipna min/max
+        new_lo = float(np.fmin(lo, rows[raw].min()))
+        new_hi = float(np.fmax(hi, rows[raw].max()))
+        widened[raw] = [new_lo, new_hi]
+        if not np.array_equal([new_lo, new_hi], [lo, hi], equal_nan=True):
+            moved.append(raw)
+    return widened, moved
+
+
+def rebase_columns(df, mask, spec, raw, old, new, extra_columns=()):
+    """Re-express normalized columns derived from `raw` under a widened scaler, in place.
+
+    Min-max scaling is affine, so every lag/lead/rolling mean/min/max/EWMA of the
+    normalized series transforms the same way as the series itself, and rolling
+    std only picks up the scale factor. That lets history be rebased without
+    recomputing any feature from raw prices.
+    """
+    (old_lo, old_hi), (new_lo, new_hi) = old, new
+    old_span, new_span = (old_hi - old_lo) or 1.0, (new_hi - new_lo) or 1.0
+    scale = old_span / new_span
+    shift = (old_lo - new_lo) / new_span
+
+    norm = NORMALIZED[raw]
+    affine = [norm] + [f.name for f in spec if f.source == norm and f.kind != 'std'] + list(extra_columns)
+    scaled_only = [f.name for f in spec if f.source == norm and f.kind == 'std']
+    affine = [c for c in affine if c in df.columns]
+    scaled_only = [c for c in scaled_only if c in df.columns]
+    if affine:
+        df.loc[mask, affine] = df.loc[mask, affine].to_numpy() * scale + shift
+    if scaled_only:
+        df.loc[mask, scaled_only] = df.loc[mask, scaled_only].to_numpy() * scale
+    return df
+
+
+def last_dates(df):
+    dates = pd.to_datetime(df[DATE_COL])
+    return {t: d.strftime('%Y-%m-%d') for t, d in dates.groupby(df[TICKER_COL]).max().items()}
+
+
+def is_new(rows, emitted):
+    """Rows dated after the last date already written for their ticker."""
+    cutoff = rows[TICKER_COL].map(emitted).fillna('0001-01-01')
+    return rows[DATE_COL].dt.strftime('%Y-%m-%d').to_numpy() > cutoff.to_numpy()
+
+
+def take_tail(rows, n):
+    rows = rows.sort_values(DATE_COL).tail(n)
+    return {DATE_COL: rows[DATE_COL].dt.strftime('%Y-%m-%d').tolist(),
+            **{raw: rows[raw].astype(float).tolist() for raw in NORMALIZED if raw in rows.columns}}
+
+
+def complete(rows, columns):
+    return rows[np.isfinite(rows[columns].to_numpy(dtype=np.float64)).all(axis=1)]
@@ -0,0 +1,141 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from common.registry import REGISTRY_DIR, data_hash, load_meta, load_model, save_model
+from common.telemetry import count, span
+
+# How a registered model absorbs newly appended training rows between full refits:
+#   'continue'  boost UPDATE_ROUNDS more trees on the recent rows (init_model)
+#   'refit'     keep the trees, refresh their leaf values on the recent rows
+#   'full'      always refit from scratch (the old behaviour)
+UPDATE_MODE = 'continue'
+FULL_REFIT_EVERY = 20   # Updates in a row before a scheduled full refit
+UPDATE_ROUNDS = 10
+UPDATE_WINDOW = 60      # Recent rows an update trains on (at least all new rows)
+REFIT_DECAY = 0.9       # Weight refit() keeps on the old leaf values
+DRIFT_CHECK_EVERY = 5  # Every this many updates, a full refit on the same rows is trained to check the update
+DRIFT_TOLERANCE = 0.10  # An update this much worse than that refit on the holdout is replaced by it
+DRIFT_LOG = 'outputs/monitoring/lightgbm_drift.jsonl'
+
+DESCRIPTIONS = {'reused': 'loaded unchanged', 'continue': 'continued boosting on the new rows',
+                'refit': 'refreshed leaf values on the recent rows', 'full': 'fit from scratch'}
+
+
+def _mae(model, valid):
+    X, y = valid
+    return float(np.mean(np.abs(model.predict(X) - np.asarray(y))))
+
+
+def _train_params(params, n_jobs):
+    # LGBMRegressor keyword names are valid lgb.train aliases, apart from the round count
+    train_params = {'objective': 'regression', 'verbose': -1, **(params or {})}
+    train_params.pop('n_estimators', None)
+    if n_jobs is not None:
+        train_params['num_threads'] = n_jobs
+    return train_params
+
+
+def _fit_full(name, X, y, params, n_jobs):
+    import lightgbm as lgb
+    model = lgb.LGBMRegressor(**(params or {}), n_jobs=n_jobs, verbose=-1)
+    with span('fit', model=name, rows=len(X), how='full'):
+        model.fit(X, y)
+    return model
+
+
+def update_booster(booster, X, y, n_new, mode=UPDATE_MODE, params=None, n_jobs=None):
+    """`booster` brought up to date with the last `n_new` rows of (X, y), in time independent of the history.
+
+    Both modes train on the newest max(n_new, UPDATE_WINDOW) rows only.
+    """
+    import lightgbm as lgb
+    window = max(n_new, UPDATE_WINDOW)
+    X_recent, y_recent = X.iloc[-window:], y.iloc[-window:]
+    if mode == 'refit':
+        return booster.refit(X_recent, y_recent, decay_rate=REFIT_DECAY)
+    return lgb.train(_train_params(params, n_jobs), lgb.Dataset(X_recent, y_recent),
+                     num_boost_round=UPDATE_ROUNDS, init_model=booster)
+
+
+def log_drift(record, path=DRIFT_LOG):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # One short append per record, so per-ticker workers can share the file
+    with open(path, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+
+def fit_or_update(name, X_train, y_train, train_dates, params=None, valid=None, mode=UPDATE_MODE,
+                  full_refit_every=FULL_REFIT_EVERY, drift_check_every=DRIFT_CHECK_EVERY, n_jobs=None,
+                  registry_dir=REGISTRY_DIR):
+    """(model, how) for registry name `name`, doing as little training as the data allows.
+
+    how is 'reused' when the registered model was trained on exactly this data;
+    'continue' or 'refit' when the training rows only grew at the end since the
+    registered version, which is then updated on the recent rows (see
+    update_booster); and 'full' for a fit from scratch. A full refit also happens
+    after `full_refit_every` updates in a row, or when the features, params or
+    earlier rows changed. Every `drift_check_every`-th update is also checked
+    against a full refit on the same rows: if the update's MAE on `valid` (X, y)
+    is more than DRIFT_TOLERANCE above the refit's, the refit replaces it.
+    Updates in between are unchecked. Every check logs both models' MAE and
+    whether the update was kept or replaced to DRIFT_LOG.
+    New models are registered as the latest version of `name`.
+    """
+    features = list(X_train.columns)
+    train_hash = data_hash(pd.concat([X_train, y_train], axis=1))
+    params_json = json.loads(json.dumps(params or {}))
+    previous = load_meta(name, registry_dir=registry_dir)
+    if previous is not None and previous['data_hash'] == train_hash and previous['params'] == params_json:
+        count('lightgbm_reused')
+        return load_model(name, previous['version'], registry_dir)[0], 'reused'
+
+    # Only rows appended after the registered version's training rows can be absorbed by an update
+    n_old = previous['n_train'] if previous is not None else 0
+    grown = (previous is not None and mode != 'full' and previous['params'] == params_json
+             and previous['features'] == features and 0 < n_old < len(X_train)
+             and data_hash(pd.concat([X_train.iloc[:n_old], y_train.iloc[:n_old]], axis=1)) == previous['data_hash'])
+    lineage = previous.get('update', {}) if grown else {}
+    updates = lineage.get('updates_since_full', 0) + 1
+
+    model, how = None, 'full'
+    if grown:
+        base = load_model(name, previous['version'], registry_dir)[0]
+        with span('fit', model=name, rows=len(X_train) - n_old, how=mode):
+            updated = update_booster(base, X_train, y_train, len(X_train) - n_old, mode, params, n_jobs)
+        full_version = lineage.get('full_version', previous['version'])
+        check = valid is not None and updates % drift_check_every == 0
+        if updates < full_refit_every and not check:
+            model, how = updated, mode
+        else:
+            # The baseline is a refit on today's rows, not the older rows the last full refit saw
+            model = _fit_full(name, X_train, y_train, params, n_jobs)
+            drifted = False
+            if valid is not None:
+                updated_mae, full_mae = _mae(updated, valid), _mae(model, valid)
+                drifted = updated_mae > full_mae * (1 + DRIFT_TOLERANCE)
+            if updates < full_refit_every and not drifted:
+                model, how = updated, mode
+            if valid is not None:
+                log_drift({'name': name, 'reason': 'drift' if drifted else 'scheduled' if how == 'full' else 'check',
+                           'decision': 'replaced' if how == 'full' else 'kept_update', 'mode': mode,
+                           'updates_since_full': updates - 1, 'updated_mae': updated_mae, 'full_mae': full_mae,
+                           'train_end': str(pd.Series(train_dates).max())})
+
+    if model is None:
+        model = _fit_full(name, X_train, y_train, params, n_jobs)
+
+    metrics = {}
+    if valid is not None:
+        errors = model.predict(valid[0]) - np.asarray(valid[1])
+        metrics = {'mae': float(np.mean(np.abs(errors))), 'rmse': float(np.sqrt(np.mean(errors ** 2)))}
+    if how == 'full':
+        update = {'how': 'full', 'updates_since_full': 0}
+    else:
+        update = {'how': how, 'updates_since_full': updates, 'full_version': full_version,
+                  'base_version': previous['version']}
+    save_model(name, model, features, train_dates, metrics, train_hash, params, registry_dir, extra={'update': update})
+    count(f'lightgbm_{how}')
+    return model, how
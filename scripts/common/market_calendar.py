@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+
+# Every ticker we track trades on NYSE/Nasdaq hours
+EXCHANGE_TZ = 'America/New_York'
+SESSION_CLOSE = pd.Timedelta(hours=16)
+DATE_COL = 'Date'
+
+
+def load_sessions(path, date_col=DATE_COL):
+    """Trading days in a price file (the days any ticker has a bar), as the local market calendar."""
+    dates = pd.read_csv(path, usecols=[date_col])[date_col]
+    return trading_sessions(dates)
+
+
+def trading_sessions(dates):
+    """Sorted unique session dates (tz-naive midnight) from a column of bar dates."""
+    dates = pd.to_datetime(pd.Series(dates))
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    return pd.DatetimeIndex(np.unique(dates.dt.normalize().to_numpy()))
+
+
+def session_dates(timestamps, sessions, tz=EXCHANGE_TZ, close=SESSION_CLOSE):
+    """The trading session each timestamp's information reaches the market in.
+
+    Timestamps (UTC if naive) are converted to exchange time. Anything before the
+    close on a session day belongs to that session; after-hours, weekend and
+    holiday timestamps roll forward to the next session. Timestamps outside the
+    calendar (before its first or after its last session), or any timestamp when
+    the calendar is empty, get NaT. Done with one vectorized searchsorted over
+    the sorted calendar, no per-row work.
+    """
+    timestamps = pd.Series(timestamps)
+    local = pd.to_datetime(timestamps, utc=True).dt.tz_convert(tz).dt.tz_localize(None)
+    # Shifting by the time left after the close turns "after the close" into "the next calendar day"
+    effective = (local + (pd.Timedelta(days=1) - close)).dt.normalize().to_numpy()
+    sessions = pd.DatetimeIndex(sessions).to_numpy()
+    pos = np.searchsorted(sessions, effective, side='left')
+    aligned = np.full(len(effective), np.datetime64('NaT'), dtype=sessions.dtype)
+    if len(sessions):
+        known = (pos < len(sessions)) & (effective >= sessions[0]) & ~np.isnat(effective)
+        aligned[known] = sessions[pos[known]]
+    return pd.Series(aligned, index=timestamps.index, name=timestamps.name)
+
+
+def tweet_days(dates, sessions=None):
+    """Day each tweet counts towards: its trading session with a `sessions` calendar, else its UTC calendar day."""
+    if sessions is not None:
+        return session_dates(dates, sessions)
+    return pd.to_datetime(pd.Series(dates), utc=True).dt.tz_localize(None).dt.normalize()
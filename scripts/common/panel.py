@@ -0,0 +1,102 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pandas as pd
+
+from common.market_calendar import tweet_days
+from common.telemetry import span
+
+TICKER_COL = 'Stock Name'
+DATE_COL = 'Date'
+KEYS = [TICKER_COL, DATE_COL]
+
+
+def load_prices(path, columns=('Close',)):
+    """Load the yfinance panel as [Date, Stock Name, *columns] with day-resolution dates."""
+    with span('load', path=path) as s:
+        df = pd.read_csv(path, usecols=[DATE_COL, TICKER_COL, *columns])
+        df[DATE_COL] = pd.to_datetime(df[DATE_COL]).dt.normalize()
+        s.set(rows=len(df))
+    return sort_panel(df[[DATE_COL, TICKER_COL, *columns]])
+
+
+def daily_sentiment(tweets, value_col, out_col, weight_col=None, sessions=None):
+    """Average tweet-level scores per (ticker, day), or per day if tweets carry no ticker.
+
+    With `weight_col`, the average is weighted by it (e.g. the duplicate weights
+    roberta_sentiment.py writes, so a spam flood counts as one tweet). With
+    `sessions`, tweets are grouped by the trading session they precede (see
+    common/market_calendar.py) instead of their UTC calendar day.
+    """
+    with span('aggregate', rows=len(tweets)):
+        tweets = tweets[[c for c in (DATE_COL, TICKER_COL, value_col, weight_col) if c in tweets.columns]].copy()
+        tweets[DATE_COL] = tweet_days(tweets[DATE_COL], sessions)
+        tweets = tweets.dropna(subset=[DATE_COL])
+        keys = KEYS if TICKER_COL in tweets.columns else [DATE_COL]
+        if weight_col is None:
+            daily = tweets.groupby(keys)[value_col].mean().rename(out_col).reset_index()
+        else:
+            tweets['_weight'] = tweets[weight_col].where(tweets[value_col].notna())
+            tweets['_weighted'] = tweets[value_col] * tweets[weight_col]
+            sums = tweets.groupby(keys)[['_weighted', '_weight']].sum()
+            daily = (sums['_weighted'] / sums['_weight']).rename(out_col).reset_index()
+    return daily
+
+
+def merge_panel(prices, sentiment):
+    """Inner-join prices and sentiment on (ticker, date).
+
+    Market-wide sentiment (no ticker column) is broadcast to every ticker on that date.
+    """
+    on = KEYS if TICKER_COL in sentiment.columns else [DATE_COL]
+    if on == [DATE_COL]:
+        print("Sentiment has no ticker column; broadcasting daily sentiment to every ticker")
+    with span('merge') as s:
+        merged = sort_panel(pd.merge(prices, sentiment, on=on, how='inner'))
+        s.set(rows=len(merged))
+    return merged
+
+
+def normalize_per_ticker(df, columns, out_columns):
+    """Min-max scale each column within its ticker's own history."""
+    grouped = df.groupby(TICKER_COL)[list(columns)]
+    lo = grouped.transform('min')
+    width = grouped.transform('max') - lo
+    scaled = (df[list(columns)] - lo) / width.where(width != 0, 1.0)
+    df[list(out_columns)] = scaled.to_numpy()
+    return df
+
+
+def sort_panel(df, by_date_first=False, date_col=DATE_COL):
+    order = [date_col, TICKER_COL] if by_date_first else [TICKER_COL, date_col]
+    return df.sort_values(order, kind='stable').reset_index(drop=True)
+
+
+def split_tickers(panel, date_col=DATE_COL):
+    """{ticker: that ticker's rows in date order}."""
+    panel = sort_panel(panel, date_col=date_col)
+    return {ticker: frame.reset_index(drop=True) for ticker, frame in panel.groupby(TICKER_COL, sort=True)}
+
+
+def run_per_ticker(func, panel, max_workers=None, **kwargs):
+    """Call func(ticker, frame, **kwargs) for every ticker on a process pool.
+
+    `panel` is a panel DataFrame or an already split {ticker: frame} dict. `func` must be importable by the workers (module-level). Results come back
+    as {ticker: result} in ticker order. max_workers=1 runs serially in-process.
+    """
+    frames = split_tickers(panel) if isinstance(panel, pd.DataFrame) else panel
+    task = partial(func, **kwargs)
+    if max_workers == 1:
+        return {ticker: task(ticker, frame) for ticker, frame in frames.items()}
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = {ticker: pool.submit(task, ticker, frame) for ticker, frame in frames.items()}
+        return {ticker: future.result() for ticker, future in futures.items()}
+
+
+def run_tasks(tasks, max_workers=None):
+    """Run (func, kwargs) tasks on a process pool, results in task order; max_workers=1 runs serially."""
+    if max_workers == 1:
+        return [func(**kwargs) for func, kwargs in tasks]
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        futures = [pool.submit(func, **kwargs) for func, kwargs in tasks]
+        return [future.result() for future in futures]
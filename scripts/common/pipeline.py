@@ -0,0 +1,270 @@
+import ast
+import csv
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timezone
+
+from common.storage import csv_path, dataset_path
+from common.telemetry import span
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# script is relative to scripts/; inputs/outputs are files or extension-less table
+# paths (see common.storage), relative to the directory the pipeline runs from
+Stage = namedtuple('Stage', ['name', 'script', 'inputs', 'outputs'])
+
+
+def _paths(path):
+    # A table path stands for whichever of its Parquet dataset / CSV export exist
+    if os.path.splitext(path)[1]:
+        return [path]
+    return [p for p in (dataset_path(path), csv_path(path)) if os.path.exists(p)]
+
+
+def path_exists(path):
+    return os.path.exists(path) if os.path.splitext(path)[1] else bool(_paths(path))
+
+
+def _files(path):
+    for p in _paths(path):
+        if os.path.isdir(p):
+            for root, dirs, names in os.walk(p):
+                dirs.sort()
+                for name in sorted(names):
+                    yield os.path.join(root, name)
+        elif os.path.exists(p):
+            yield p
+
+
+class FileHasher:
+    """Content hashes, memoized on (size, mtime) so unchanged files are not re-read."""
+
+    def __init__(self, memo=None):
+        self.memo = memo if memo is not None else {}
+
+    def file(self, path):
+        st = os.stat(path)
+        key = [st.st_size, st.st_mtime_ns]
+        cached = self.memo.get(path)
+        if cached and cached[:2] == key:
+            return cached[2]
+        h = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                h.update(block)
+        self.memo[path] = key + [h.hexdigest()]
+        return h.hexdigest()
+
+    def path(self, path):
+        files = list(_files(path))
+        if not files:
+            return 'missing'
+        h = hashlib.blake2b(digest_size=16)
+        for f in files:
+            # Fragment names are random; only their location inside the table matters
+            rel = os.path.relpath(f, path if os.path.isdir(path) else os.path.dirname(f))
+            h.update(os.path.dirname(rel).encode() + b'\0' + self.file(f).encode())
+        return h.hexdigest()
+
+
+def local_modules(script):
+    """Repo-local modules `script` imports, followed transitively."""
+    seen, todo = [], [script]
+    while todo:
+        path = todo.pop()
+        if path in seen:
+            continue
+        seen.append(path)
+        with open(path, encoding='utf-8') as f:
+            tree = ast.parse(f.read(), filename=path)
+        for node in ast.walk(tree):
+            names = []
+            if isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+                names = [node.module]
+            elif isinstance(node, ast.Import):
+                names = [a.name for a in node.names]
+            for name in names:
+                parts = name.split('.')
+                for base in (os.path.dirname(path), SCRIPTS_DIR):
+                    candidate = os.path.join(base, *parts) + '.py'
+                    if os.path.exists(candidate):
+                        todo.append(candidate)
+                        break
+    return sorted(seen)
+
+
+def build_graph(stages):
+    """Map each stage to the stages producing its inputs; raise on duplicates and cycles."""
+    producers = {}
+    for stage in stages:
+        for out in stage.outputs:
+            if out in producers:
+                raise ValueError(f"{out} is produced by both {producers[out]} and {stage.name}")
+            producers[out] = stage.name
+    deps = {s.name: sorted({producers[i] for i in s.inputs if i in producers} - {s.name}) for s in stages}
+
+    state = {}
+
+    def visit(name, trail):
+        if state.get(name) == 'done':
+            return
+        if state.get(name) == 'active':
+            raise ValueError(f"Dependency cycle: {' -> '.join(trail + [name])}")
+        state[name] = 'active'
+        for dep in deps[name]:
+            visit(dep, trail + [name])
+        state[name] = 'done'
+
+    for name in deps:
+        visit(name, [])
+    return deps
+
+
+def upstream(deps, targets):
+    wanted, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(deps[name])
+    return wanted
+
+
+class PipelineRunner:
+    """Run stages in dependency order, concurrently where the DAG allows.
+
+    A stage is skipped when the hash of its code (script plus the local modules
+    it imports) and of every input is unchanged since its last successful run
+    and its outputs are still on disk. Because upstream outputs are hashed by
+    content, a stage that re-runs but writes identical outputs does not force
+    its dependents to re-run.
+    """
+
+    def __init__(self, stages, state_file, log_dir, runs_file, jobs=None):
+        self.stages = {s.name: s for s in stages}
+        self.deps = build_graph(stages)
+        self.state_file = state_file
+        self.log_dir = log_dir
+        self.runs_file = runs_file
+        self.jobs = jobs or min(4, os.cpu_count() or 1)
+        self.state = self._load_state()
+        self.hasher = FileHasher(self.state.setdefault('files', {}))
+
+    def _load_state(self):
+        if os.path.exists(self.state_file):
+            with open(self.state_file) as f:
+                return json.load(f)
+        return {'stages': {}, 'files': {}}
+
+    def _save_state(self):
+        os.makedirs(os.path.dirname(self.state_file) or '.', exist_ok=True)
+        tmp = f"{self.state_file}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.state_file)
+
+    def stage_key(self, stage):
+        h = hashlib.blake2b(digest_size=16)
+        for module in local_modules(os.path.join(SCRIPTS_DIR, stage.script)):
+            h.update(os.path.relpath(module, SCRIPTS_DIR).encode() + self.hasher.file(module).encode())
+        for path in sorted(stage.inputs):
+            h.update(path.encode() + b'\0' + self.hasher.path(path).encode())
+        return h.hexdigest()
+
+    def _decide(self, stage, force):
+        """Return (action, key): 'run', 'skip', 'keep' or 'missing'.
+
+        A stage whose inputs are not on disk (e.g. the raw tweet archive is not
+        checked out) keeps whatever outputs it produced earlier; dependents then
+        check their own inputs.
+        """
+        outputs_present = all(path_exists(p) for p in stage.outputs)
+        if not all(path_exists(p) for p in stage.inputs):
+            return ('keep' if any(path_exists(p) for p in stage.outputs) else 'missing'), None
+        key = self.stage_key(stage)
+        last = self.state['stages'].get(stage.name, {})
+        if not force and last.get('key') == key and outputs_present:
+            return 'skip', key
+        return 'run', key
+
+    def _execute(self, stage):
+        os.makedirs(self.log_dir, exist_ok=True)
+        log_path = os.path.join(self.log_dir, f"{stage.name}.log")
+        env = dict(os.environ, MPLBACKEND='Agg')
+        start = time.perf_counter()
+        # Stage scripts inherit STOCKCAST_RUN_ID, so their telemetry files share the pipeline's run id
+        with open(log_path, 'w') as log, span('stage', stage=stage.name) as s:
+            proc = subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, stage.script)],
+                                  env=env, stdout=log, stderr=subprocess.STDOUT)
+            s.set(returncode=proc.returncode)
+        return proc.returncode, time.perf_counter() - start, log_path
+
+    def _record(self, rows):
+        os.makedirs(os.path.dirname(self.runs_file) or '.', exist_ok=True)
+        new = not os.path.exists(self.runs_file)
+        with open(self.runs_file, 'a', newline='') as f:
+            writer = csv.writer(f)
+            if new:
+                writer.writerow(['run_at', 'stage', 'status', 'seconds'])
+            writer.writerows(rows)
+
+    def run(self, targets=None, force=False, dry_run=False):
+        """Bring `targets` (default: every stage) up to date; returns {stage: (status, seconds)}."""
+        wanted = upstream(self.deps, targets or list(self.stages))
+        pending = {name: set(self.deps[name]) & wanted for name in wanted}
+        results, running = {}, {}
+        run_at = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+            while pending or running:
+                for name in sorted(n for n, waiting in pending.items() if not waiting):
+                    if len(running) >= self.jobs:
+                        break
+                    del pending[name]
+                    if any(results[d][0] in ('failed', 'blocked') for d in self.deps[name] if d in results):
+                        results[name] = ('blocked', 0.0)
+                        print(f"  {name}: blocked by a failed upstream stage")
+                        self._release(pending, name)
+                        continue
+                    action, key = self._decide(self.stages[name], force)
+                    if dry_run and (action == 'run' or any(results.get(d, ('',))[0] == 'would run'
+                                                           for d in self.deps[name])):
+                        action = 'would run'
+                    if action != 'run':
+                        results[name] = (action, 0.0)
+                        print(f"  {name}: {action}")
+                        self._release(pending, name)
+                        continue
+                    print(f"  {name}: running {self.stages[name].script}")
+                    running[pool.submit(self._execute, self.stages[name])] = (name, key)
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, key = running.pop(future)
+                    code, seconds, log_path = future.result()
+                    if code == 0:
+                        results[name] = ('ran', seconds)
+                        self.state['stages'][name] = {'key': key, 'seconds': round(seconds, 3), 'finished_at': run_at}
+                        print(f"  {name}: done in {seconds:.1f}s")
+                    else:
+                        results[name] = ('failed', seconds)
+                        print(f"  {name}: FAILED after {seconds:.1f}s (see {log_path})")
+                    self._release(pending, name)
+                    self._save_state()
+
+        if not dry_run:
+            self._save_state()
+            self._record([[run_at, name, status, f"{seconds:.3f}"] for name, (status, seconds) in sorted(results.items())])
+        return results
+
+    @staticmethod
+    def _release(pending, name):
+        for waiting in pending.values():
+            waiting.discard(name)
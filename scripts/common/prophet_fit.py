@@ -0,0 +1,79 @@
+import json
+import logging
+
+from common.registry import REGISTRY_DIR, data_hash, list_models, load_if_current, load_meta, load_model, save_model
+from common.telemetry import count, span
+
+SCALAR_PARAMS = ('k', 'm', 'sigma_obs')
+VECTOR_PARAMS = ('delta', 'beta')
+
+
+def quiet_stan():
+    # cmdstanpy resets its logger to DEBUG on first use unless configured through get_logger()
+    from cmdstanpy.utils import get_logger
+    get_logger().setLevel(logging.WARNING)
+
+
+def stan_init(model):
+    """A fitted model's MAP parameters (k, m, sigma_obs, delta, beta) as a Stan init for the next fit."""
+    init = {name: float(model.params[name][0][0]) for name in SCALAR_PARAMS}
+    init.update({name: model.params[name][0].copy() for name in VECTOR_PARAMS})
+    return init
+
+
+def fit_prophet(df, regressors=(), init=None):
+    """Fit Prophet on [ds, y, *regressors], starting the optimizer from `init` when given.
+
+    Parameters are in Prophet's scaled units (y over its max), so an init from
+    an earlier fit of the same or a similar series starts close to the optimum.
+    Prophet falls back to its default for any init whose shape no longer fits,
+    e.g. delta when a short history has fewer changepoints.
+    """
+    from prophet import Prophet
+    quiet_stan()
+    model = Prophet()
+    for regressor in regressors:
+        model.add_regressor(regressor)
+    columns = ['ds', 'y', *regressors]
+    with span('fit', model='prophet', rows=len(df), warm=init is not None):
+        if init is None:
+            return model.fit(df[columns])
+        return model.fit(df[columns], init=init)
+
+
+def fit_series(name, df, regressors=(), fallback_init=None, registry_dir=REGISTRY_DIR):
+    """(model, how) for registry name `name`, fitting only when the history changed.
+
+    how is 'reused' when the registered model was trained on this exact data,
+    'warm' when the fit started from the previous version's parameters (or
+    `fallback_init`, e.g. another ticker's fit) and 'cold' otherwise. New fits
+    are registered as the latest version of `name`.
+    """
+    regressors = list(regressors)
+    columns = ['ds', 'y', *regressors]
+    params = {'regressors': regressors} if regressors else None
+    train_hash = data_hash(df[columns])
+    cached = load_if_current(name, train_hash, params, registry_dir)
+    if cached is not None:
+        count('prophet_reused')
+        return cached[0], 'reused'
+
+    init = fallback_init
+    previous = load_meta(name, registry_dir=registry_dir)
+    if previous is not None and previous['params'] == json.loads(json.dumps(params or {})):
+        init = stan_init(load_model(name, previous['version'], registry_dir)[0])
+    model = fit_prophet(df, regressors, init)
+    save_model(name, model, regressors, df['ds'], {}, train_hash, params, registry_dir)
+    how = 'cold' if init is None else 'warm'
+    count(f'prophet_{how}')
+    return model, how
+
+
+def family_init(family, registry_dir=REGISTRY_DIR):
+    """stan_init of one registered `family/<ticker>` model, to seed tickers fit for the first time (or None)."""
+    for meta in list_models(registry_dir):
+        prefix, _, ticker = meta['name'].partition('/')
+        if prefix == family and ticker:
+            return stan_init(load_model(meta['name'], meta['version'], registry_dir)[0])
+    return None
+
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import uuid
+from datetime import datetime, timezone
+
+import pandas as pd
+
+from common.telemetry import timed
+
+REGISTRY_DIR = 'models'
+LATEST_FILE = 'LATEST'
+META_FILE = 'meta.json'
+MODEL_FILES = {'lightgbm': 'model.txt', 'prophet': 'model.json'}
+
+
+def data_hash(df):
+    """Content hash of a training frame (values and column names, not the index)."""
+    df = df.copy()
+    for col in df.select_dtypes(include=['datetime', 'datetimetz']).columns:
+        # Parquet and CSV round-trips can yield different datetime units for the same dates
+        df[col] = df[col].dt.as_unit('ns')
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps([str(c) for c in df.columns]).encode('utf-8'))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def _model_dir(name, registry_dir):
+    # Names may be nested, e.g. 'prophet_vanilla/TSLA'
+    return os.path.join(registry_dir, *name.split('/'))
+
+
+def _kind(model):
+    module = type(model).__module__
+    if module.startswith('lightgbm'):
+        return 'lightgbm'
+    if module.startswith('prophet'):
+        return 'prophet'
+    raise TypeError(f"Cannot register a {type(model).__name__}")
+
+
+def _write_model(model, kind, path):
+    if kind == 'lightgbm':
+        booster = getattr(model, 'booster_', model)
+        booster.save_model(path)
+    else:
+        from prophet.serialize import model_to_json
+        with open(path, 'w') as f:
+            f.write(model_to_json(model))
+
+
+def _read_model(kind, path):
+    if kind == 'lightgbm':
+        import lightgbm as lgb
+        return lgb.Booster(model_file=path)
+    from prophet.serialize import model_from_json
+    with open(path) as f:
+        return model_from_json(f.read())
+
+
+def _library_version(kind):
+    if kind == 'lightgbm':
+        import lightgbm
+        return lightgbm.__version__
+    import prophet
+    return prophet.__version__
+
+
+def _date_range(dates):
+    if dates is None or len(dates) == 0:
+        return None, None
+    dates = pd.to_datetime(pd.Series(dates))
+    return dates.min().strftime('%Y-%m-%d'), dates.max().strftime('%Y-%m-%d')
+
+
+@timed('save_model')
+def save_model(name, model, features, train_dates, metrics, data_hash, params=None, registry_dir=REGISTRY_DIR,
+               extra=None):
+    """Serialize a fitted LightGBM model/Booster or Prophet model as a new version of `name`.
+
+    Returns the version id; the version becomes the one load_model() returns by default.
+    `extra` holds further JSON fields for the metadata, e.g. how the model was updated.
+    """
+    kind = _kind(model)
+    version = f"{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+    model_dir = _model_dir(name, registry_dir)
+    version_dir = os.path.join(model_dir, version)
+    os.makedirs(version_dir)
+    _write_model(model, kind, os.path.join(version_dir, MODEL_FILES[kind]))
+
+    start, end = _date_range(train_dates)
+    meta = {
+        'name': name, 'version': version, 'kind': kind,
+        'created_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'features': list(features), 'train_start': start, 'train_end': end,
+        'n_train': 0 if train_dates is None else len(train_dates),
+        'metrics': {k: float(v) for k, v in (metrics or {}).items()},
+        'params': params or {}, 'data_hash': data_hash,
+        'library_version': _library_version(kind),
+        **(extra or {}),
+    }
+    with open(os.path.join(version_dir, META_FILE), 'w') as f:
+        json.dump(meta, f, indent=2, default=str)
+
+    # Point LATEST at the new version only once it is complete
+    tmp = os.path.join(model_dir, f"{LATEST_FILE}.{uuid.uuid4().hex}")
+    with open(tmp, 'w') as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(model_dir, LATEST_FILE))
+    return version
+
+
+def load_meta(name, version=None, registry_dir=REGISTRY_DIR):
+    """Metadata of `version` (default: latest) of `name`, or None if it is not registered."""
+    model_dir = _model_dir(name, registry_dir)
+    if version is None:
+        latest = os.path.join(model_dir, LATEST_FILE)
+        if not os.path.exists(latest):
+            return None
+        with open(latest) as f:
+            version = f.read().strip()
+    path = os.path.join(model_dir, version, META_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+@timed('load_model')
+def load_model(name, version=None, registry_dir=REGISTRY_DIR):
+    """(model, meta) for `version` (default: latest) of `name`; LightGBM models load as a Booster."""
+    meta = load_meta(name, version, registry_dir)
+    if meta is None:
+        raise FileNotFoundError(f"No registered model '{name}' in {registry_dir}")
+    path = os.path.join(_model_dir(name, registry_dir), meta['version'], MODEL_FILES[meta['kind']])
+    return _read_model(meta['kind'], path), meta
+
+
+def load_if_current(name, data_hash, params=None, registry_dir=REGISTRY_DIR):
+    """The latest (model, meta) of `name` if it was trained on the same data and params, else None."""
+    meta = load_meta(name, registry_dir=registry_dir)
+    if meta is None or meta['data_hash'] != data_hash or meta['params'] != json.loads(json.dumps(params or {})):
+        return None
+    return load_model(name, meta['version'], registry_dir)
+
+
+def list_models(registry_dir=REGISTRY_DIR):
+    """Metadata of the latest version of every registered model."""
+    rows = []
+    for root, dirs, files in os.walk(registry_dir):
+        dirs.sort()
+        if LATEST_FILE in files:
+            meta = load_meta(os.path.relpath(root, registry_dir).replace(os.sep, '/'), registry_dir=registry_dir)
+            if meta is not None:
+                rows.append(meta)
+    return rows
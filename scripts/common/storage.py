@@ -0,0 +1,224 @@
+import json
+import os
+import shutil
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from common.panel import DATE_COL, TICKER_COL
+from common.telemetry import span
+
+# Set STOCKCAST_EXPORT_CSV=1 to also write a .csv next to every table
+EXPORT_CSV = os.environ.get('STOCKCAST_EXPORT_CSV', '0') == '1'
+MONTH_COL = 'month'
+ORDER_KEY = b'stockcast_row_order'
+
+_WRITE_OPTIONS = ds.ParquetFileFormat().make_write_options(compression='zstd')
+
+
+def dataset_path(path):
+    return f"{path}.parquet"
+
+
+def csv_path(path):
+    return f"{path}.csv"
+
+
+def exists(path):
+    return os.path.exists(dataset_path(path)) or os.path.exists(csv_path(path))
+
+
+def _row_order(df, date_col):
+    # Panels are written either date-major or ticker-major; remember which
+    if TICKER_COL not in df.columns or date_col not in df.columns or len(df) < 2:
+        return b'date'
+    tickers = df[TICKER_COL].to_numpy()
+    dates = pd.to_datetime(df[date_col]).to_numpy()
+    same = tickers[1:] == tickers[:-1]
+    ticker_major = (tickers[1:] >= tickers[:-1]).all() and (dates[1:][same] >= dates[:-1][same]).all()
+    return b'ticker' if ticker_major else b'date'
+
+
+def _to_arrow(df, date_col, partition_cols, order):
+    df = df.copy()
+    if date_col in df.columns:
+        df[date_col] = pd.to_datetime(df[date_col])
+    if partition_cols and MONTH_COL in partition_cols and MONTH_COL not in df.columns:
+        # Month partitions are derived from the (UTC) date column
+        dates = df[date_col].dt.tz_convert('UTC') if df[date_col].dt.tz is not None else df[date_col]
+        df[MONTH_COL] = dates.dt.strftime('%Y-%m')
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    return table.replace_schema_metadata({**table.schema.metadata, ORDER_KEY: order})
+
+
+def _write_fragment(df, path, partition_cols, date_col, order):
+    ds.write_dataset(
+        _to_arrow(df, date_col, partition_cols, order), dataset_path(path), format='parquet',
+        partitioning=list(partition_cols) if partition_cols else None, partitioning_flavor='hive',
+        file_options=_WRITE_OPTIONS, existing_data_behavior='overwrite_or_ignore',
+        basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+    )
+
+
+def write_table(df, path, partition_cols=(TICKER_COL,), date_col=DATE_COL, export_csv=None):
+    """Replace the table at `path` (no extension) with a zstd Parquet dataset.
+
+    Tables are hive-partitioned by ticker by default; pass partition_cols=('month',)
+    to partition tweets by calendar month instead. Partition columns that are not
+    present in `df` are skipped.
+    """
+    partition_cols = [c for c in (partition_cols or ()) if c in df.columns or c == MONTH_COL]
+    with span('save', path=path, rows=len(df)):
+        shutil.rmtree(dataset_path(path), ignore_errors=True)
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        _write_fragment(df, path, partition_cols, date_col, _row_order(df, date_col))
+        if EXPORT_CSV if export_csv is None else export_csv:
+            df.to_csv(csv_path(path), index=False)
+
+
+def append_table(df, path, partition_cols=(TICKER_COL,), date_col=DATE_COL):
+    """Add rows to an existing table without rewriting it.
+
+    Parquet tables get new fragment files; CSV-only tables are appended in the
+    column order of their header.
+    """
+    if os.path.exists(dataset_path(path)):
+        partition_cols = [c for c in (partition_cols or ()) if c in df.columns or c == MONTH_COL]
+        _write_fragment(df[table_columns(path)], path, partition_cols, date_col, _metadata(path).get(ORDER_KEY, b'date'))
+    if os.path.exists(csv_path(path)):
+        rows = df.copy()
+        if date_col in rows.columns:
+            rows[date_col] = pd.to_datetime(rows[date_col]).dt.strftime('%Y-%m-%d')
+        header = pd.read_csv(csv_path(path), nrows=0).columns
+        rows[list(header)].to_csv(csv_path(path), mode='a', header=False, index=False)
+    elif not os.path.exists(dataset_path(path)):
+        write_table(df, path, partition_cols, date_col)
+
+
+class ChunkedTableWriter:
+    """Write a table chunk by chunk: the first chunk replaces it, later ones append."""
+
+    def __init__(self, path, partition_cols=(TICKER_COL,), date_col=DATE_COL):
+        self.path = path
+        self.partition_cols = partition_cols
+        self.date_col = date_col
+        self.rows = 0
+
+    def write(self, chunk):
+        if self.rows == 0:
+            write_table(chunk, self.path, self.partition_cols, self.date_col)
+        else:
+            append_table(chunk, self.path, self.partition_cols, self.date_col)
+        self.rows += len(chunk)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+def _dataset(path):
+    return ds.dataset(dataset_path(path), format='parquet', partitioning='hive')
+
+
+def _metadata(path):
+    return _dataset(path).schema.metadata or {}
+
+
+def table_columns(path):
+    """Column names in their original write order."""
+    if not os.path.exists(dataset_path(path)):
+        return list(pd.read_csv(csv_path(path), nrows=0).columns)
+    schema = _dataset(path).schema
+    names = [n for n in schema.names if n != MONTH_COL]
+    if schema.metadata and b'pandas' in schema.metadata:
+        order = [c['name'] for c in json.loads(schema.metadata[b'pandas'])['columns']]
+        names = [n for n in order if n in names] + [n for n in names if n not in order]
+    return names
+
+
+def _scalar(value, field_type):
+    ts = pd.Timestamp(value)
+    tz = getattr(field_type, 'tz', None)
+    if tz and ts.tzinfo is None:
+        ts = ts.tz_localize('UTC')
+    elif not tz and ts.tzinfo is not None:
+        ts = ts.tz_convert('UTC').tz_localize(None)
+    return pa.scalar(ts, type=field_type)
+
+
+def read_table(path, columns=None, start=None, end=None, tickers=None, date_col=DATE_COL):
+    """Load a table, reading only `columns` and rows in [start, end] for `tickers`.
+
+    On Parquet datasets the date range and ticker filters are pushed down to
+    partition and row-group pruning. Falls back to `<path>.csv` when no dataset
+    has been written yet.
+    """
+    with span('load', path=path) as s:
+        df = _read_table(path, columns, start, end, tickers, date_col)
+        s.set(rows=len(df))
+    return df
+
+
+def _read_table(path, columns, start, end, tickers, date_col):
+    if not os.path.exists(dataset_path(path)):
+        return _read_csv(path, columns, start, end, tickers, date_col)
+
+    dataset = _dataset(path)
+    schema = dataset.schema
+    predicate = None
+
+    def both(expr):
+        return expr if predicate is None else predicate & expr
+
+    if start is not None:
+        predicate = both(ds.field(date_col) >= _scalar(start, schema.field(date_col).type))
+    if end is not None:
+        predicate = both(ds.field(date_col) <= _scalar(end, schema.field(date_col).type))
+    if MONTH_COL in schema.names:
+        # Prune whole month partitions before touching row groups
+        if start is not None:
+            predicate = both(ds.field(MONTH_COL) >= pd.Timestamp(start).strftime('%Y-%m'))
+        if end is not None:
+            predicate = both(ds.field(MONTH_COL) <= pd.Timestamp(end).strftime('%Y-%m'))
+    if tickers is not None:
+        predicate = both(ds.field(TICKER_COL).isin(list(tickers)))
+
+    names = list(columns) if columns is not None else table_columns(path)
+    df = dataset.to_table(columns=names, filter=predicate).to_pandas()
+    if TICKER_COL in df.columns:
+        df[TICKER_COL] = df[TICKER_COL].astype(str)
+    # Fragments come back in partition order; restore the order the table was written in
+    keys = (TICKER_COL, date_col) if schema.metadata and schema.metadata.get(ORDER_KEY) == b'ticker' else (date_col, TICKER_COL)
+    sort_by = [c for c in keys if c in df.columns]
+    return df.sort_values(sort_by, kind='stable').reset_index(drop=True) if sort_by else df
+
+
+def _read_csv(path, columns, start, end, tickers, date_col):
+    usecols = None
+    if columns is not None:
+        # Filter columns are read even when they are not requested
+        needed = [date_col] * (start is not None or end is not None) + [TICKER_COL] * (tickers is not None)
+        usecols = list(dict.fromkeys(list(columns) + needed))
+    df = pd.read_csv(csv_path(path), usecols=usecols)
+    if date_col in df.columns:
+        df[date_col] = pd.to_datetime(df[date_col])
+    if start is not None:
+        df = df[df[date_col] >= _naive_like(start, df[date_col])]
+    if end is not None:
+        df = df[df[date_col] <= _naive_like(end, df[date_col])]
+    if tickers is not None:
+        df = df[df[TICKER_COL].isin(list(tickers))]
+    if columns is not None:
+        df = df[list(columns)]
+    return df.reset_index(drop=True)
+
+
+def _naive_like(value, series):
+    ts = pd.Timestamp(value)
+    if series.dt.tz is not None and ts.tzinfo is None:
+        return ts.tz_localize('UTC')
+    return ts
@@ -0,0 +1,288 @@
+import atexit
+import cProfile
+import functools
+import json
+import os
+import pstats
+import resource
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+# Off unless STOCKCAST_TELEMETRY=1; disabled spans and counters return before doing any work.
+#   STOCKCAST_TELEMETRY=1                    JSON events per span to data/state/telemetry/<script>/<run>.jsonl,
+#                                            a summary line per run in data/state/telemetry/runs.jsonl
+#   STOCKCAST_PROFILE=cprofile               also profile the whole run with cProfile (<run>.prof)
+#   STOCKCAST_PROFILE=sample[:ms]            also sample the main thread's stack every ms (default 10) and
+#                                            write collapsed stacks (<run>.stacks) for flame graphs
+#   STOCKCAST_RUN_ID=<id>                    group several scripts under one run id (the pipeline sets it)
+TELEMETRY_DIR = os.environ.get('STOCKCAST_TELEMETRY_DIR', 'data/state/telemetry')
+ENABLED = os.environ.get('STOCKCAST_TELEMETRY', '0') == '1'
+PROFILE = os.environ.get('STOCKCAST_PROFILE', '') if ENABLED else ''
+TOP_FUNCTIONS = 15
+
+_state = threading.local()
+
+
+def _peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _plain(value):
+    # numpy scalars become Python numbers; anything else (timestamps, paths) its string form
+    return value.item() if hasattr(value, 'item') else str(value)
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **fields):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """A timed block; extra fields (rows, model, ...) can be added with set() before it ends."""
+
+    def __init__(self, recorder, name, fields):
+        self.recorder = recorder
+        self.name = name
+        self.fields = fields
+
+    def set(self, **fields):
+        self.fields.update(fields)
+
+    def __enter__(self):
+        stack = _state.__dict__.setdefault('stack', [])
+        self.parent = stack[-1] if stack else None
+        stack.append(self.name)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        _state.stack.pop()
+        self.recorder.emit({'event': 'span', 'name': self.name, 'parent': self.parent, 'seconds': round(seconds, 6),
+                            'peak_rss_mb': round(_peak_rss_mb(), 1), 'ok': exc_type is None, **self.fields})
+        return False
+
+
+class StackSampler(threading.Thread):
+    """py-spy style sampler: counts the main thread's call stack every `interval` seconds."""
+
+    def __init__(self, interval):
+        super().__init__(daemon=True, name='telemetry-sampler')
+        self.interval = interval
+        self.thread_id = threading.main_thread().ident
+        self.stacks = Counter()
+        self._done = threading.Event()
+
+    def run(self):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                stack.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._done.set()
+        self.join()
+
+    def hot_spots(self, n=TOP_FUNCTIONS):
+        """Functions most often on top of the stack, as (function, share of samples)."""
+        leaves = Counter()
+        for stack, count in self.stacks.items():
+            leaves[stack.rsplit(';', 1)[-1]] += count
+        total = sum(leaves.values()) or 1
+        return [(f, round(c / total, 4)) for f, c in leaves.most_common(n)]
+
+    def write(self, path):
+        # Brendan Gregg's collapsed format: flamegraph.pl and speedscope read it directly
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Recorder:
+    """Writes one JSON line per event, straight to the run's file.
+
+    Lines go out with a single O_APPEND write, so worker processes started by
+    the script (run_tasks, run_per_ticker) add theirs to the same file.
+    """
+
+    def __init__(self, script, run_id, directory=TELEMETRY_DIR, worker=False):
+        self.script = script
+        self.run_id = run_id
+        self.pid = os.getpid()
+        self.worker = worker
+        self.start = time.perf_counter()
+        self.started_at = _now()
+        self.counters = Counter()
+        run_dir = os.path.join(directory, script)
+        os.makedirs(run_dir, exist_ok=True)
+        self.directory = directory
+        self.prefix = os.path.join(run_dir, run_id)
+        self.fd = os.open(f"{self.prefix}.jsonl", os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        self.profiler = None
+        self.sampler = None
+
+    def emit(self, event):
+        line = json.dumps({'ts': _now(), 'run': self.run_id, 'script': self.script, 'pid': os.getpid(), **event},
+                          default=_plain)
+        os.write(self.fd, (line + '\n').encode())
+
+    def start_profiling(self, mode):
+        kind, _, arg = mode.partition(':')
+        if kind == 'cprofile':
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        elif kind == 'sample':
+            self.sampler = StackSampler((float(arg) if arg else 10.0) / 1000)
+            self.sampler.start()
+
+    def in_worker(self):
+        return self.worker or os.getpid() != self.pid
+
+    def add(self, name, n):
+        # Workers have no exit hook to report totals from, so their counts go to the file as they happen
+        if self.in_worker():
+            self.emit({'event': 'count', 'name': name, 'n': n})
+        else:
+            self.counters[name] += n
+
+    def _collect(self):
+        # Every process's spans and worker counts for this run, read back from the shared file
+        spans = defaultdict(lambda: {'calls': 0, 'seconds': 0.0, 'max_seconds': 0.0, 'rows': 0})
+        counters = Counter(self.counters)
+        with open(f"{self.prefix}.jsonl") as f:
+            for line in f:
+                event = json.loads(line)
+                if event.get('event') == 'count':
+                    counters[event['name']] += event['n']
+                if event.get('event') != 'span':
+                    continue
+                s = spans[event['name']]
+                s['calls'] += 1
+                s['seconds'] += event['seconds']
+                s['max_seconds'] = max(s['max_seconds'], event['seconds'])
+                s['rows'] += event.get('rows') or 0
+        spans = {name: {k: round(v, 6) if isinstance(v, float) else v for k, v in s.items()}
+                 for name, s in sorted(spans.items(), key=lambda item: -item[1]['seconds'])}
+        return spans, dict(sorted(counters.items()))
+
+    def summary(self):
+        spans, counters = self._collect()
+        summary = {'event': 'summary', 'started_at': self.started_at,
+                   'seconds': round(time.perf_counter() - self.start, 6),
+                   'peak_rss_mb': round(_peak_rss_mb(), 1), 'spans': spans, 'counters': counters}
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(f"{self.prefix}.prof")
+            stats = pstats.Stats(self.profiler)
+            summary['hot_spots'] = [
+                {'function': f"{os.path.basename(file)}:{line}({func})", 'calls': nc, 'tottime': round(tt, 6),
+                 'cumtime': round(ct, 6)}
+                for (file, line, func), (_, nc, tt, ct, _) in
+                sorted(stats.stats.items(), key=lambda item: -item[1][2])[:TOP_FUNCTIONS]]
+        if self.sampler is not None:
+            self.sampler.stop()
+            self.sampler.write(f"{self.prefix}.stacks")
+            summary['hot_spots'] = self.sampler.hot_spots()
+        return summary
+
+    def close(self):
+        if self.in_worker():
+            return
+        summary = self.summary()
+        self.emit(summary)
+        os.close(self.fd)
+        with open(os.path.join(self.directory, 'runs.jsonl'), 'a') as f:
+            f.write(json.dumps({'run': self.run_id, 'script': self.script, **summary}, default=_plain) + '\n')
+        print_summary(summary, self.run_id, file=sys.stderr)
+
+
+def print_summary(summary, run_id, file=sys.stdout):
+    print(f"Telemetry for run {run_id}: {summary['seconds']:.1f}s, peak RSS {summary['peak_rss_mb']:.0f} MB",
+          file=file)
+    for name, s in summary['spans'].items():
+        rows = f"  {s['rows']} rows" if s['rows'] else ''
+        print(f"  {name:<16} {s['calls']:5d} calls {s['seconds']:9.3f}s (max {s['max_seconds']:.3f}s){rows}",
+              file=file)
+    for name, value in summary['counters'].items():
+        print(f"  {name:<16} {value}", file=file)
+
+
+_recorder = None
+
+
+def _start():
+    global _recorder
+    import multiprocessing
+    if multiprocessing.parent_process() is not None and 'STOCKCAST_TELEMETRY_SCRIPT' in os.environ:
+        # A spawned worker: its spans go to the parent script's run file, the parent writes the summary
+        _recorder = Recorder(os.environ['STOCKCAST_TELEMETRY_SCRIPT'], os.environ['STOCKCAST_RUN_ID'], worker=True)
+        return
+    script = os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0] or 'python'
+    run_id = os.environ.get('STOCKCAST_RUN_ID') or f"{datetime.now(timezone.utc):%Y%m%dT%H%M%SZ}-{os.getpid()}"
+    os.environ.update(STOCKCAST_RUN_ID=run_id, STOCKCAST_TELEMETRY_SCRIPT=script)
+    _recorder = Recorder(script, run_id)
+    if PROFILE:
+        _recorder.start_profiling(PROFILE)
+    atexit.register(_recorder.close)
+
+
+def enabled():
+    return _recorder is not None
+
+
+def span(name, **fields):
+    """Time a block as `name`: `with span('fit', model='prophet') as s: ...; s.set(rows=n)`."""
+    if _recorder is None:
+        return _NULL_SPAN
+    return Span(_recorder, name, fields)
+
+
+def timed(name=None, **fields):
+    """Decorator form of span(); the span is named after the function unless `name` is given."""
+    def decorate(func):
+        label = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _recorder is None:
+                return func(*args, **kwargs)
+            with Span(_recorder, label, dict(fields)):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def count(name, n=1):
+    """Add `n` to a counter in the run summary (e.g. cache hits)."""
+    if _recorder is not None:
+        _recorder.add(name, n)
+
+
+def event(name, **fields):
+    """A one-off structured event, e.g. which models were refit."""
+    if _recorder is not None:
+        _recorder.emit({'event': name, **fields})
+
+
+if ENABLED:
+    _start()
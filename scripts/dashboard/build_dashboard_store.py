@@ -0,0 +1,150 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+from datetime import datetime, timezone
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backtest'))
+from common.panel import DATE_COL, TICKER_COL
+from common.pipeline import FileHasher
+from common.storage import dataset_path, exists, read_table, write_table
+from dashboard_store import (ACTUAL, MANIFEST_FILE, METRICS_FILE, OVERVIEW_POINTS, SERIES_COLUMNS, SERIES_FILE,
+                             downsample)
+from walk_forward import score
+
+# Pipeline outputs the store is built from; any that are missing are left out
+PRICE_FILE = 'data/processed/prophet_ready'
+MERGED_FILE = 'data/processed/merged_sentiment_stock'
+PROPHET_PANEL = 'outputs/forecasts/prophet_panel_forecast'
+LGBM_PANEL = 'outputs/forecasts/lightgbm_panel_preds'
+MULTI_HORIZON = 'outputs/forecasts/lightgbm_multihorizon_forecast'
+BACKTEST_PREDS = 'outputs/backtest/walk_forward_preds'
+SOURCES = [PRICE_FILE, MERGED_FILE, PROPHET_PANEL, LGBM_PANEL, MULTI_HORIZON, BACKTEST_PREDS]
+
+# Models predicting min-max normalized Close; the store keeps everything in price terms, so
+# they are left out when the merged table (their price scale) is missing
+NORMALIZED_MODELS = ('roberta_prophet', 'lightgbm', 'backtest')
+
+
+def to_price(df, scale, columns=('value', 'lower', 'upper')):
+    lo = df[TICKER_COL].map(scale['min'])
+    width = df[TICKER_COL].map(scale['max']) - lo
+    for col in columns:
+        df[col] = lo + df[col] * width
+    return df
+
+
+def series_frame(ticker_col, date_col, value, model, horizon=0, lower=None, upper=None, df=None):
+    return pd.DataFrame({TICKER_COL: df[ticker_col].to_numpy(), 'model': model, 'level': 0, 'horizon': horizon,
+                         DATE_COL: pd.to_datetime(df[date_col]).to_numpy(), 'value': df[value].to_numpy(),
+                         'lower': df[lower].to_numpy() if lower else float('nan'),
+                         'upper': df[upper].to_numpy() if upper else float('nan')})
+
+
+def next_dates(merged):
+    # Next-day predictions belong to the following trading day of their ticker
+    return merged[[TICKER_COL, DATE_COL]].assign(target_date=merged.groupby(TICKER_COL)[DATE_COL].shift(-1))
+
+
+def collect(scale, merged):
+    """Every series in the store; `scale` and `merged` are None when the merged table is missing."""
+    parts = []
+    if exists(PRICE_FILE):
+        prices = read_table(PRICE_FILE, date_col='ds')
+        parts.append(series_frame(TICKER_COL, 'ds', 'y', ACTUAL, df=prices))
+
+    if exists(PROPHET_PANEL):
+        prophet = read_table(PROPHET_PANEL, date_col='ds')
+        last_price = read_table(PRICE_FILE, columns=[TICKER_COL, 'ds'], date_col='ds').groupby(TICKER_COL)['ds'].max()
+        last_merged = merged.groupby(TICKER_COL)[DATE_COL].max() if merged is not None else None
+        for model, frame in prophet.groupby('model', sort=True):
+            if merged is None and model.startswith(NORMALIZED_MODELS):
+                continue
+            # In-sample fit is horizon 0; the future part counts days past the model's last training date
+            last = frame[TICKER_COL].map(last_merged if model.startswith(NORMALIZED_MODELS) else last_price)
+            horizon = (frame['ds'] - last).dt.days.clip(lower=0).to_numpy()
+            part = series_frame(TICKER_COL, 'ds', 'yhat', model, horizon, 'yhat_lower', 'yhat_upper', frame)
+            parts.append(to_price(part, scale) if model.startswith(NORMALIZED_MODELS) else part)
+
+    if merged is None:
+        return parts
+
+    if exists(LGBM_PANEL):
+        preds = read_table(LGBM_PANEL).merge(next_dates(merged), on=[TICKER_COL, DATE_COL], how='inner')
+        parts.append(to_price(series_frame(TICKER_COL, 'target_date', 'y_pred', 'lightgbm_panel', 1,
+                                           df=preds.dropna(subset=['target_date'])), scale))
+
+    if exists(MULTI_HORIZON):
+        paths = read_table(MULTI_HORIZON)
+        for method, frame in paths.groupby('method', sort=True):
+            parts.append(to_price(series_frame(TICKER_COL, DATE_COL, 'y_pred', f'lightgbm_{method}',
+                                               frame['horizon'].to_numpy(), df=frame), scale))
+
+    if exists(BACKTEST_PREDS):
+        backtest = read_table(BACKTEST_PREDS)
+        # One line per model: the shortest-horizon forecast made for each date
+        backtest = backtest.sort_values('horizon', kind='stable').drop_duplicates(['model', TICKER_COL, DATE_COL])
+        for model, frame in backtest.groupby('model', sort=True):
+            parts.append(to_price(series_frame(TICKER_COL, DATE_COL, 'y_pred', f'backtest_{model}',
+                                               frame['horizon'].to_numpy(), df=frame), scale))
+    return parts
+
+
+def main():
+    print("Loading pipeline outputs...")
+    merged, scale = None, None
+    if exists(MERGED_FILE):
+        merged = read_table(MERGED_FILE)
+        merged[DATE_COL] = pd.to_datetime(merged[DATE_COL])
+        scale = merged.groupby(TICKER_COL)['Close'].agg(['min', 'max'])
+    else:
+        print(f" {MERGED_FILE} is missing; leaving out the sentiment and LightGBM series")
+    parts = collect(scale, merged)
+    if not parts:
+        sys.exit("None of the store's sources exist yet; run the pipeline first")
+    series = pd.concat(parts, ignore_index=True)[SERIES_COLUMNS].sort_values([TICKER_COL, 'model', DATE_COL],
+                                                                            kind='stable')
+
+    # Level 1: every (ticker, model) line reduced once for the full-history view
+    print(f"Downsampling {len(series)} points to an overview level...")
+    overview = downsample(series, OVERVIEW_POINTS, keys=(TICKER_COL, 'model')).assign(level=1)
+    store = pd.concat([series, overview], ignore_index=True)
+
+    metrics = pd.DataFrame()
+    if exists(BACKTEST_PREDS) and scale is not None:
+        # Backtest accuracy per model, ticker and horizon
+        metrics = score(read_table(BACKTEST_PREDS), scale, keys=('model', TICKER_COL, 'horizon'))
+
+    write_table(store, SERIES_FILE)
+    if metrics.empty:
+        shutil.rmtree(dataset_path(METRICS_FILE), ignore_errors=True)
+    else:
+        write_table(metrics, METRICS_FILE)
+
+    # The version changes whenever a source output changes, which invalidates the dashboard's caches
+    hasher = FileHasher()
+    sources = {path: hasher.path(path) for path in SOURCES}
+    manifest = {
+        'version': hashlib.blake2b(json.dumps(sources, sort_keys=True).encode(), digest_size=16).hexdigest(),
+        'built_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+        'sources': sources,
+        'tickers': {t: sorted(g['model'].unique()) for t, g in series.groupby(TICKER_COL, sort=True)},
+        'date_range': [series[DATE_COL].min().strftime('%Y-%m-%d'), series[DATE_COL].max().strftime('%Y-%m-%d')],
+        'max_horizon': int(series['horizon'].max()),
+    }
+    with open(MANIFEST_FILE, 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    print(f" Store with {len(series)} points ({len(overview)} overview) for "
+          f"{len(manifest['tickers'])} tickers saved to {SERIES_FILE}")
+    if not metrics.empty:
+        print(f" Metrics saved to {METRICS_FILE}")
+    print(f" Manifest saved to {MANIFEST_FILE}")
+
+
+if __name__ == '__main__':
+    main()
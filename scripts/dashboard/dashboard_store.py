@@ -0,0 +1,96 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from common.panel import DATE_COL, TICKER_COL
+from common.storage import exists, read_table
+
+STORE_DIR = 'outputs/dashboard'
+SERIES_FILE = f'{STORE_DIR}/series'
+METRICS_FILE = f'{STORE_DIR}/metrics'
+MANIFEST_FILE = f'{STORE_DIR}/manifest.json'
+
+MAX_POINTS = 1000       # Per trace; about the pixel width of a wide chart
+OVERVIEW_POINTS = 500   # Precomputed level for the unfiltered (full history) view
+ACTUAL = 'actual'
+
+# horizon 0 is observed or in-sample; forecasts count trading days ahead of the last known value
+SERIES_COLUMNS = [TICKER_COL, 'model', 'level', 'horizon', DATE_COL, 'value', 'lower', 'upper']
+
+
+def lttb(x, y, n_out):
+    """Indices of the Largest-Triangle-Three-Buckets downsample of (x, y) to `n_out` points.
+
+    Keeps the first and last point and, per bucket, the point forming the
+    largest triangle with the previously kept point and the next bucket's mean,
+    so peaks and troughs survive the reduction.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        cx, cy = x[nxt_lo:nxt_hi].mean(), y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.nanargmax(area)) if np.isfinite(area).any() else lo
+        keep[i + 1] = a
+    return keep
+
+
+def downsample(series, n_out, keys=('model',)):
+    """LTTB each `keys` group of a date-sorted series frame to at most `n_out` rows."""
+    parts = []
+    for _, group in series.groupby(list(keys), sort=False):
+        group = group.dropna(subset=['value'])
+        if len(group) > n_out:
+            x = group[DATE_COL].to_numpy().astype('datetime64[s]').astype(np.int64)
+            group = group.iloc[lttb(x, group['value'].to_numpy(), n_out)]
+        parts.append(group)
+    return pd.concat(parts, ignore_index=True) if parts else series.iloc[:0]
+
+
+def load_manifest(manifest_file=MANIFEST_FILE):
+    """The store's manifest ({version, sources, tickers: {ticker: models}, ...}), or None before the first build."""
+    if not os.path.exists(manifest_file):
+        return None
+    with open(manifest_file) as f:
+        return json.load(f)
+
+
+def query_series(ticker, models=None, start=None, end=None, max_horizon=None, max_points=MAX_POINTS,
+                 series_file=SERIES_FILE):
+    """One ticker's series for `models` in [start, end], at most `max_points` per model.
+
+    Without a date range the precomputed overview level is read; otherwise the
+    full-resolution rows in range are downsampled here, so the chart never
+    receives more points than it can draw.
+    """
+    if not exists(series_file):
+        return pd.DataFrame(columns=SERIES_COLUMNS)
+    level = 1 if start is None and end is None else 0
+    df = read_table(series_file, start=start, end=end, tickers=[ticker])
+    df = df[df['level'] == level]
+    if models is not None:
+        df = df[df['model'].isin(list(models))]
+    if max_horizon is not None:
+        df = df[df['horizon'] <= max_horizon]
+    df = df.sort_values(['model', DATE_COL], kind='stable')
+    return downsample(df, max_points) if level == 0 else df.reset_index(drop=True)
+
+
+def query_metrics(ticker=None, models=None, metrics_file=METRICS_FILE):
+    if not exists(metrics_file):
+        return pd.DataFrame()
+    df = read_table(metrics_file, tickers=None if ticker is None else [ticker])
+    if models is not None:
+        df = df[df['model'].isin(list(models))]
+    return df.reset_index(drop=True)
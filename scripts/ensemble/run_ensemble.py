@@ -0,0 +1,152 @@
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backtest'))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lightgbm'))
+from common.features import build_features
+from common.panel import DATE_COL, TICKER_COL, run_tasks, split_tickers
+from common.storage import read_table, write_table
+from run_backtest import (DEFAULT_PARAMS, LIGHTGBM_VARIANTS, NON_FEATURES, PARAMS_FILE, PROPHET_VARIANTS, SPECS)
+from stacking import fold_key, load_cached, prophet_fold, save_cached, walk_forward_meta, wide
+from tuning import load_params
+from walk_forward import lightgbm_block, make_schedule, score, ticker_scalers
+
+# Paths
+MERGED_FILE = 'data/processed/merged_sentiment_stock'
+PRED_OUTPUT = 'outputs/ensemble/ensemble_preds'
+FORECAST_OUTPUT = 'outputs/ensemble/ensemble_forecast'
+WEIGHTS_OUTPUT = 'outputs/ensemble/ensemble_weights'
+METRICS_OUTPUT = 'outputs/ensemble/ensemble_metrics'
+
+MIN_TRAIN = 30      # Dates of history before the first origin
+STEP = 5            # Dates per fold; every fold refits, so base predictions can be cached per fold
+MIN_META_FOLDS = 3  # Folds of out-of-fold predictions before the meta-models start
+SHRINKAGE = 20      # Rows at which a ticker's own blend weights count as much as the pooled ones
+MAX_WORKERS = None  # None uses every core
+BASE_MODELS = list(LIGHTGBM_VARIANTS) + list(PROPHET_VARIANTS)
+# The LightGBM datasets are rebuilt from the merged panel (with run_backtest.SPECS) so the newest day
+# (unknown target) can be forecast
+
+
+def with_forecast_fold(merged, schedule):
+    """Append each ticker's next business day as an unlabeled row and a final fold that forecasts it."""
+    next_day = merged[DATE_COL].max() + pd.offsets.BDay(1)
+    last = merged.groupby(TICKER_COL, sort=True).tail(1)
+    future = pd.DataFrame({TICKER_COL: last[TICKER_COL].to_numpy(), DATE_COL: next_day})
+    panel = pd.concat([merged, future], ignore_index=True).sort_values([TICKER_COL, DATE_COL], kind='stable')
+    fold = pd.DataFrame({'fold': [len(schedule)], 'origin': [next_day], 'end': [next_day + pd.Timedelta(days=1)],
+                         'train_start': [schedule['train_start'].iloc[-1]], 'refit': [True]})
+    return panel.reset_index(drop=True), pd.concat([schedule, fold], ignore_index=True)
+
+
+def lightgbm_frame(panel, spec):
+    """Spec features per row with the date its next-day target belongs to; rows missing a feature are dropped."""
+    df = build_features(panel, spec, dropna=False, date_major=False)
+    df['target_date'] = df.groupby(TICKER_COL)[DATE_COL].shift(-1)
+    inputs = [f.name for f in spec if f.kind != 'lead']
+    return df.dropna(subset=inputs + ['target_date'])
+
+
+def base_tasks(panel, schedule, models):
+    """(name, fold, key, func, kwargs) for every base model and fold."""
+    tasks, datasets = [], {}
+    frames = split_tickers(panel)
+    # Each fold is re-normalized with the rows known at its origin (see walk_forward.lightgbm_block)
+    scalers = ticker_scalers(panel)
+    scales = {ticker: scaler['Close'] for ticker, scaler in scalers.items()}
+    for name in models:
+        for fold in schedule.itertuples(index=False):
+            block = schedule[schedule['fold'] == fold.fold]
+            if name in PROPHET_VARIANTS:
+                regressor = PROPHET_VARIANTS[name]
+                columns = ['ds', 'y'] + ([regressor] if regressor else [])
+                seen = {t: f.assign(ds=f[DATE_COL], y=f['Close'])[columns][f[DATE_COL] < fold.end]
+                        for t, f in frames.items()}
+                key = fold_key(name, fold, pd.concat(seen.values(), ignore_index=True),
+                               {'regressor': regressor, 'scales': scales})
+                tasks.append((name, fold.fold, key, prophet_fold,
+                              {'name': name, 'frames': seen, 'fold': block, 'regressor': regressor, 'scales': scales}))
+            else:
+                path, features, params = LIGHTGBM_VARIANTS[name]
+                if path not in datasets:
+                    datasets[path] = lightgbm_frame(panel, SPECS[path])
+                data = datasets[path]
+                features = features or [c for c in data.columns if c not in NON_FEATURES + ['target_date']]
+                params = load_params(PARAMS_FILE, DEFAULT_PARAMS) if params == 'tuned' else params
+                seen = data[data['target_date'] < fold.end]
+                raw = [c for c in ['Close', 'roberta_positive_avg'] if c in seen.columns]
+                key = fold_key(name, fold, seen[[TICKER_COL, 'target_date', 'target'] + raw + features],
+                               {'features': features, 'params': params, 'scalers': scalers})
+                tasks.append((name, fold.fold, key, lightgbm_block,
+                              {'name': name, 'data': seen, 'features': features, 'params': params, 'block': block,
+                               'spec': SPECS[path], 'scalers': scalers}))
+    return tasks
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Blend and stack the base models over walk-forward folds.")
+    parser.add_argument('--models', nargs='+', choices=BASE_MODELS, default=BASE_MODELS)
+    parser.add_argument('--min-train', type=int, default=MIN_TRAIN, help="dates before the first origin")
+    parser.add_argument('--step', type=int, default=STEP, help="dates per fold")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+
+    print("Loading merged sentiment + price data...")
+    merged = read_table(MERGED_FILE)
+    merged[DATE_COL] = pd.to_datetime(merged[DATE_COL])
+    merged = merged.sort_values([TICKER_COL, DATE_COL], kind='stable').reset_index(drop=True)
+    schedule = make_schedule(merged[DATE_COL], args.min_train, args.step, refit_every=1)
+    panel, schedule = with_forecast_fold(merged, schedule)
+
+    # Base predictions are cached per (model, fold, data hash); only missing ones are fit
+    tasks = base_tasks(panel, schedule, args.models)
+    cached = [load_cached(name, fold, key) for name, fold, key, _, _ in tasks]
+    missing = [task for task, preds in zip(tasks, cached) if preds is None]
+    print(f"Base predictions: {len(tasks) - len(missing)} of {len(tasks)} (model, fold) pairs cached, "
+          f"fitting {len(missing)}...")
+    start = time.perf_counter()
+    fitted = run_tasks([(func, kwargs) for _, _, _, func, kwargs in missing], args.workers)
+    for (name, fold, key, _, _), preds in zip(missing, fitted):
+        save_cached(preds, name, fold, key)
+    if missing:
+        print(f" Fit in {time.perf_counter() - start:.1f}s")
+    fitted = iter(fitted)
+    base = pd.concat([preds if preds is not None else next(fitted) for preds in cached], ignore_index=True)
+
+    # Sentiment known the day before each target, for the sentiment-aware stack
+    sentiment = panel[[TICKER_COL, DATE_COL]].assign(
+        sentiment_ref=panel.groupby(TICKER_COL)['Sentiment_norm'].shift(1))
+    sentiment['sentiment_ref'] = sentiment.groupby(TICKER_COL)['sentiment_ref'].ffill()
+    table = wide(base, args.models).merge(sentiment, on=[TICKER_COL, DATE_COL], how='left')
+
+    print(f"Training blend and stack meta-models over {table['fold'].nunique()} folds...")
+    ensemble, blend = walk_forward_meta(table, args.models, MIN_META_FOLDS, SHRINKAGE)
+    preds = pd.concat([base, ensemble], ignore_index=True)
+
+    # Metrics on the folds every model (ensembles included) forecast out of sample
+    scale = merged.groupby(TICKER_COL)['Close'].agg(['min', 'max'])
+    evaluated = preds[preds['fold'].isin(ensemble['fold'].unique()) & preds['y_true'].notna()]
+    metrics = score(evaluated, scale, keys=('model', TICKER_COL))
+    summary = score(evaluated, scale, keys=('model',)).sort_values('mae')
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    forecast_fold = schedule['fold'].iloc[-1]
+    forecast = preds[preds['fold'] == forecast_fold][[TICKER_COL, DATE_COL, 'model', 'y_pred']]
+
+    write_table(preds, PRED_OUTPUT)
+    write_table(forecast, FORECAST_OUTPUT)
+    write_table(blend.weight_table(), WEIGHTS_OUTPUT)
+    write_table(metrics, METRICS_OUTPUT)
+    print(f" Out-of-fold predictions saved to {PRED_OUTPUT}")
+    print(f" Next-day forecasts ({forecast[DATE_COL].max():%Y-%m-%d}) saved to {FORECAST_OUTPUT}")
+    print(f" Per-ticker blend weights saved to {WEIGHTS_OUTPUT}")
+    print(f" Metrics saved to {METRICS_OUTPUT}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import nnls
+from sklearn.linear_model import Ridge
+
+from common.panel import DATE_COL, TICKER_COL
+from common.registry import data_hash
+from common.storage import exists, read_table, write_table
+from walk_forward import PRED_COLUMNS, prophet_ticker
+
+CACHE_DIR = 'data/cache/base_preds'
+KEYS = [TICKER_COL, DATE_COL, 'fold']
+
+
+def fold_key(name, fold, data, config):
+    """Cache key of one base model's predictions for one fold: the data it saw plus its configuration."""
+    h = hashlib.blake2b(digest_size=12)
+    h.update(json.dumps([name, fold.fold, str(fold.train_start), str(fold.origin), str(fold.end), config],
+                        sort_keys=True, default=str).encode())
+    h.update(data_hash(data).encode())
+    return h.hexdigest()
+
+
+def cache_path(name, fold, key, cache_dir=CACHE_DIR):
+    return f"{cache_dir}/{name}/fold{fold:03d}-{key}"
+
+
+def load_cached(name, fold, key, cache_dir=CACHE_DIR):
+    path = cache_path(name, fold, key, cache_dir)
+    return read_table(path) if exists(path) else None
+
+
+def save_cached(preds, name, fold, key, cache_dir=CACHE_DIR):
+    write_table(preds, cache_path(name, fold, key, cache_dir), partition_cols=())
+
+
+def prophet_fold(name, frames, fold, regressor=None, scales=None):
+    """Every ticker's Prophet forecast for a single fold, fit cold so the result depends on the fold alone.
+
+    `scales` maps ticker -> (min, max) Close when the frames hold raw prices (see prophet_ticker).
+    """
+    parts = [prophet_ticker(name, ticker, df, fold, regressor, warm_start=False,
+                            scale=scales[ticker] if scales else None) for ticker, df in frames.items()]
+    return pd.concat(parts, ignore_index=True)
+
+
+def wide(preds, models):
+    """Base predictions as one row per (ticker, date, fold) with a column per model; rows missing a model are dropped."""
+    table = preds.pivot_table(index=KEYS, columns='model', values='y_pred', aggfunc='first')
+    truth = preds.groupby(KEYS)[['y_true', 'y_ref', 'origin']].first()
+    return table[list(models)].join(truth).dropna(subset=list(models)).reset_index()
+
+
+def nnls_weights(P, y):
+    """Non-negative blending weights summing to one (equal weights when the fit is degenerate)."""
+    w, _ = nnls(P, y)
+    return w / w.sum() if w.sum() > 0 else np.full(P.shape[1], 1.0 / P.shape[1])
+
+
+class BlendEnsemble:
+    """Per-ticker convex blend of the base models, shrunk towards the pooled blend.
+
+    A ticker with n training rows gets n / (n + shrinkage) of its own NNLS
+    weights and the rest from the weights fit on every ticker together.
+    """
+
+    def __init__(self, models, shrinkage=20):
+        self.models = list(models)
+        self.shrinkage = shrinkage
+        self.pooled = None
+        self.weights = {}
+
+    def fit(self, train):
+        self.pooled = nnls_weights(train[self.models].to_numpy(), train['y_true'].to_numpy())
+        self.weights = {}
+        for ticker, rows in train.groupby(TICKER_COL, sort=True):
+            own = nnls_weights(rows[self.models].to_numpy(), rows['y_true'].to_numpy())
+            a = len(rows) / (len(rows) + self.shrinkage)
+            self.weights[ticker] = (a * own + (1 - a) * self.pooled, len(rows))
+        return self
+
+    def predict(self, frame):
+        W = np.vstack([self.weights.get(t, (self.pooled, 0))[0] for t in frame[TICKER_COL]])
+        return (frame[self.models].to_numpy() * W).sum(axis=1)
+
+    def weight_table(self):
+        return pd.DataFrame([{TICKER_COL: t, 'model': m, 'weight': w[i], 'n_train': n}
+                             for t, (w, n) in self.weights.items() for i, m in enumerate(self.models)])
+
+
+class SentimentStack:
+    """Ridge meta-model over the base predictions and their products with the latest sentiment.
+
+    The interaction terms let the weight on each base model move with
+    sentiment, e.g. leaning on the RoBERTa-aware models on high-sentiment days.
+    """
+
+    def __init__(self, models, sentiment_col='sentiment_ref', alpha=1.0):
+        self.models = list(models)
+        self.sentiment_col = sentiment_col
+        self.model = Ridge(alpha=alpha)
+
+    def _design(self, frame):
+        P = frame[self.models].to_numpy()
+        s = frame[[self.sentiment_col]].fillna(0.5).to_numpy()  # Mid-scale when no sentiment was seen
+        return np.hstack([P, P * s])
+
+    def fit(self, train):
+        self.model.fit(self._design(train), train['y_true'].to_numpy())
+        return self
+
+    def predict(self, frame):
+        return self.model.predict(self._design(frame))
+
+
+def walk_forward_meta(table, models, min_folds=3, shrinkage=20):
+    """Ensemble predictions for each fold from meta-models trained only on earlier folds.
+
+    Returns (long predictions for 'ensemble_blend' and 'ensemble_stack', the
+    blend fit on every scored fold). Folds without a known y (the forward
+    fold) are predicted but never trained on.
+    """
+    folds = sorted(table['fold'].unique())
+    scored = table.dropna(subset=['y_true'])
+    out = []
+    for fold in folds[min_folds:]:
+        train = scored[scored['fold'] < fold]
+        test = table[table['fold'] == fold]
+        if train.empty or test.empty:
+            continue
+        blend = BlendEnsemble(models, shrinkage).fit(train)
+        stack = SentimentStack(models).fit(train)
+        for name, meta in (('ensemble_blend', blend), ('ensemble_stack', stack)):
+            out.append(test.assign(model=name, horizon=1, y_pred=meta.predict(test))[PRED_COLUMNS])
+    final = BlendEnsemble(models, shrinkage).fit(scored)
+    return pd.concat(out, ignore_index=True), final
@@ -0,0 +1,217 @@
+import os
+import sys
+
+import pandas as pd
+import lightgbm as lgb
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sentiment'))
+from attribution import TWEET_COLUMNS, daily_roberta_sentiment
+from common.features import LGBM_ADVANCED_SPEC, LGBM_READY_SPEC, SENTIMENT_AVG_SPEC, build_features, history_needed
+from common.incremental import (NORMALIZED, bootstrap_state, complete, is_new, last_dates, load_state, new_scaler,
+                                normalize, rebase_columns, save_state, tail_frame, take_tail, widen_scaler)
+from common.market_calendar import trading_sessions
+from common.panel import DATE_COL, KEYS, TICKER_COL, load_prices, merge_panel
+from common.registry import data_hash, load_meta, load_model, save_model
+from common.storage import append_table, exists, read_table, table_columns, write_table
+from common.telemetry import span
+
+# File paths
+STOCK_FILE = 'data/raw/stock_yfinance_data.csv'
+SENTIMENT_FILE = 'data/processed/roberta_sentiment_10k'
+STATE_FILE = 'data/state/incremental_state.json'
+MODEL_NAME = 'lightgbm_panel'  # Per-ticker boosters registered by train_all_tickers.py
+PRED_OUTPUT = 'outputs/forecasts/lightgbm_panel_preds'
+# Prophet forecasts are not updated here: a Prophet fit (trend changepoints, seasonality) depends on the
+# whole history, so there is no per-row update to append. The pipeline's Prophet stages refit them.
+
+# A new all-time high/low widens a ticker's min-max range, which changes every
+# normalized value in its history.
+#   'rebase': re-express stored history under the widened range (affine, no refeaturizing),
+#             so files stay identical to a full rebuild
+#   'freeze': keep the original range; new values may fall outside [0, 1]
+RESCALE_POLICY = 'rebase'
+
+# name -> (path, feature spec, written date-major)
+DATASETS = {
+    'merged_sentiment_stock': ('data/processed/merged_sentiment_stock', [], False),
+    'merged_sentiment_stock_avg': ('data/processed/merged_sentiment_stock_avg', SENTIMENT_AVG_SPEC, False),
+    'lgbm_ready': ('data/processed/lgbm_ready', LGBM_READY_SPEC, True),
+    'lgbm_advanced_ready': ('data/processed/lgbm_advanced_ready', LGBM_ADVANCED_SPEC, True),
+    'sentiment_attribution': ('data/processed/sentiment_attribution', [], False),
+}
+# NaN where a ticker has no sector peers with tweets that day; a full build keeps those rows
+NULLABLE = ['sector_roberta_positive_avg', 'Sector_Sentiment_norm']
+# The newest written row still needs its full window, plus one row to receive its target
+TAIL_ROWS = max(history_needed(spec) for _, spec, _ in DATASETS.values()) + 1
+NON_FEATURES = ['Date', TICKER_COL, 'target', 'Close_norm', 'Sentiment_norm']
+MIN_TRAIN_ROWS = 20
+
+
+def datasets():
+    # The attribution table is missing from builds older than it
+    return {name: spec for name, spec in DATASETS.items() if exists(spec[0])}
+
+
+def load_daily_sentiment(prices, since=None):
+    """Cashtag-attributed daily sentiment (with sector spillover), aggregated as save_merged_sentiment.py does.
+
+    Only tweets from `since` on are read. A tweet's session is never before its
+    UTC date, so every session after `since` gets all of its tweets.
+    """
+    tweets = read_table(SENTIMENT_FILE, columns=[c for c in table_columns(SENTIMENT_FILE) if c in TWEET_COLUMNS],
+                        start=since)
+    return daily_roberta_sentiment(tweets, sorted(prices[TICKER_COL].unique()), trading_sessions(prices[DATE_COL]))
+
+
+def bootstrap():
+    print("No incremental state for the current datasets; bootstrapping from the current full build...")
+    merged = read_table(DATASETS['merged_sentiment_stock'][0])
+    if exists(DATASETS['sentiment_attribution'][0]):
+        # The sector column's scaler and tail come from the attribution table
+        merged = merged.merge(read_table(DATASETS['sentiment_attribution'][0]), on=KEYS, how='left')
+    emitted = {name: last_dates(read_table(path, columns=[DATE_COL, TICKER_COL]))
+               for name, (path, _, _) in datasets().items()}
+    return bootstrap_state(merged, TAIL_ROWS, emitted)
+
+
+def covers(state):
+    """Whether `state` tracks every dataset on disk (states from older builds may not)."""
+    return all(name in ts['emitted'] for ts in state['tickers'].values() for name in datasets())
+
+
+def rebase_files(rebases):
+    # History only has to be rewritten when some ticker set a new extreme
+    specs = {path: spec for path, spec, _ in datasets().values()}
+    if exists(PRED_OUTPUT):
+        specs[PRED_OUTPUT] = []
+    for path, spec in specs.items():
+        df = read_table(path)
+        for ticker, raw, old, new in rebases:
+            extra = ['y_true', 'y_pred'] if raw == 'Close' else []
+            rebase_columns(df, df[TICKER_COL] == ticker, spec, raw, old, new, extra)
+        write_table(df, path)
+        print(f"  rebased {path}")
+
+
+def load_or_fit_booster(ticker, features, history, stale=False):
+    """The ticker's registered booster, or one fit on `history` when there is none or it is `stale`."""
+    name = f"{MODEL_NAME}/{ticker}"
+    registered = load_meta(name) is not None
+    if registered and not stale:
+        return load_model(name)[0]
+    # Fit on what is already on disk (rebased to the current scale)
+    rows = history[history[TICKER_COL] == ticker]
+    if len(rows) < MIN_TRAIN_ROWS:
+        if registered:
+            print(f"  {ticker}: too little history to refit; its booster still predicts on the old scale")
+            return load_model(name)[0]
+        return None
+    model = lgb.LGBMRegressor(verbose=-1)
+    with span('fit', model=name, rows=len(rows)):
+        model.fit(rows[features], rows['target'])
+    save_model(name, model, features, rows[DATE_COL], {}, data_hash(rows[features + ['target']]))
+    return model.booster_
+
+
+def predict_new_rows(rows, history, stale=()):
+    features = [c for c in rows.columns if c not in NON_FEATURES]
+    preds = []
+    for ticker, group in rows.groupby(TICKER_COL):
+        booster = load_or_fit_booster(ticker, features, history, ticker in stale)
+        if booster is None:
+            print(f"  skipping predictions for {ticker}: too little history to fit a model")
+            continue
+        with span('predict', model=f"{MODEL_NAME}/{ticker}", rows=len(group)):
+            y_pred = booster.predict(group[features])
+        preds.append(pd.DataFrame({TICKER_COL: ticker, DATE_COL: group[DATE_COL].values,
+                                   'y_true': group['target'].values, 'y_pred': y_pred}))
+    return pd.concat(preds, ignore_index=True) if preds else pd.DataFrame()
+
+
+def main():
+    state = load_state(STATE_FILE)
+    if state is None or not covers(state):
+        state = bootstrap()
+
+    print("Loading prices and daily sentiment...")
+    prices = load_prices(STOCK_FILE)
+    # Tweets before the earliest last date only feed sessions that are already written
+    known = set(prices[TICKER_COL]) <= set(state['tickers'])
+    since = min(ts['last_date'] for ts in state['tickers'].values()) if known and state['tickers'] else None
+    panel = merge_panel(prices, load_daily_sentiment(prices, since))
+    new_rows = panel[is_new(panel, {t: s['last_date'] for t, s in state['tickers'].items()})]
+    if new_rows.empty:
+        print(" Already up to date")
+        return
+    print(f"Found {len(new_rows)} new rows for {new_rows[TICKER_COL].nunique()} tickers")
+
+    # Normalize tail + new rows per ticker with the (possibly widened) scaler
+    recent, rebases = [], []
+    for ticker, rows in new_rows.groupby(TICKER_COL):
+        ts = state['tickers'].get(ticker)
+        if ts is None:
+            ts = state['tickers'][ticker] = {
+                'scaler': new_scaler(rows),
+                'tail': take_tail(rows.iloc[:0], TAIL_ROWS),
+                'last_date': None,
+                'emitted': {},
+            }
+        if RESCALE_POLICY == 'rebase':
+            widened, moved = widen_scaler(ts['scaler'], rows)
+            rebases += [(ticker, raw, ts['scaler'][raw], widened[raw]) for raw in moved]
+            ts['scaler'] = widened
+
+        tail = tail_frame(ticker, ts)
+        # New rows keep their other columns (mention_weight); tail rows are never emitted again
+        frame = pd.concat([tail, rows], ignore_index=True)
+        recent.append(normalize(frame, ts['scaler']))
+        ts['tail'] = take_tail(frame, TAIL_ROWS)
+        ts['last_date'] = frame[DATE_COL].max().strftime('%Y-%m-%d')
+    recent = pd.concat(recent, ignore_index=True)
+
+    # Only rows that were not written before and now have every column get appended. They are
+    # all built before any file is touched, so a failure here leaves the stored tables as they were.
+    emitted_rows = {}
+    for name, (path, spec, date_major) in datasets().items():
+        rows = build_features(recent, spec, dropna=False, date_major=date_major) if spec else recent
+        emitted = {t: s['emitted'].get(name) for t, s in state['tickers'].items()}
+        header = table_columns(path)
+        rows = complete(rows[is_new(rows, emitted)], [c for c in header if c not in [DATE_COL, TICKER_COL] + NULLABLE])
+        emitted_rows[name] = rows[header]
+
+    if rebases:
+        print(f"New extremes for {len(rebases)} (ticker, column) pairs; rebasing stored history...")
+        rebase_files(rebases)
+
+    # Tickers without a registered booster, or whose booster was trained before their features were
+    # rebased, get one fit on the stored history (as it stood before this update's rows)
+    sources = {f.source for f in LGBM_ADVANCED_SPEC}
+    stale = {ticker for ticker, raw, _, _ in rebases if NORMALIZED[raw] in sources}
+    refit = [t for t in recent[TICKER_COL].unique() if t in stale or load_meta(f"{MODEL_NAME}/{t}") is None]
+    history = None
+    if refit and 'lgbm_advanced_ready' in emitted_rows:
+        if stale:
+            print(f"Refitting boosters for {len(stale)} rebased tickers: {', '.join(sorted(stale))}")
+        history = read_table(DATASETS['lgbm_advanced_ready'][0], tickers=refit)
+
+    for name, rows in emitted_rows.items():
+        path = DATASETS[name][0]
+        append_table(rows, path)
+        for ticker, date in last_dates(rows).items():
+            state['tickers'][ticker]['emitted'][name] = date
+        print(f"  {path}: +{len(rows)} rows")
+
+    # Score the newly completed advanced rows with each ticker's saved booster
+    preds = pd.DataFrame()
+    if 'lgbm_advanced_ready' in emitted_rows:
+        preds = predict_new_rows(emitted_rows['lgbm_advanced_ready'], history, stale)
+    if not preds.empty:
+        append_table(preds, PRED_OUTPUT)
+        print(f"  {PRED_OUTPUT}: +{len(preds)} rows")
+
+    save_state(state, STATE_FILE)
+    print(f" Incremental update complete; state saved to {STATE_FILE}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+# LGBMRegressor's defaults, which the per-variant scripts trained with
+BASE_PARAMS = {'objective': 'regression', 'verbose': -1, 'num_threads': 1, 'seed': 42}
+NUM_ROUNDS = 100
+DATASET_PARAMS = {'verbose': -1, 'feature_pre_filter': False}
+
+# group -> column-name pattern; a feature belongs to the first group it matches, else to 'other'
+FEATURE_GROUPS = {
+    'price_lags': r'^lag_close_',
+    'price_rolling': r'^roll_',
+    'price_level': r'^Close$',
+    'sentiment_lags': r'^lag_sentiment_',
+    'sentiment_avgs': r'^sentiment_avg_',
+    'sentiment_level': r'^roberta_positive_avg$',
+}
+
+_TRAIN = None
+
+
+def feature_groups(features, patterns=FEATURE_GROUPS):
+    """{group: [features]} in `patterns` order, empty groups dropped."""
+    groups = {name: [] for name in list(patterns) + ['other']}
+    for feature in features:
+        name = next((g for g, p in patterns.items() if re.search(p, feature)), 'other')
+        groups[name].append(feature)
+    return {name: cols for name, cols in groups.items() if cols}
+
+
+def make_variants(groups, every_combination=False, named=None):
+    """{variant: features} to compare.
+
+    'all' uses every feature; by default each group is then left out
+    ('no_<group>') and used alone ('only_<group>'). every_combination=True
+    instead runs every non-empty union of groups. `named` adds fixed
+    {variant: features} subsets.
+    """
+    features = [f for cols in groups.values() for f in cols]
+    variants = {'all': features}
+    if every_combination:
+        for k in range(1, len(groups)):
+            for combo in combinations(groups, k):
+                variants['+'.join(combo)] = [f for g in combo for f in groups[g]]
+    elif len(groups) > 1:
+        for group, cols in groups.items():
+            variants[f'no_{group}'] = [f for f in features if f not in cols]
+            variants[f'only_{group}'] = cols
+    for name, cols in (named or {}).items():
+        variants[name] = [f for f in features if f in cols]
+    return variants
+
+
+def _init_worker(path):
+    global _TRAIN
+    # Loading the binary file reads the bins as they are; nothing is binned again
+    _TRAIN = lgb.Dataset(path, params=DATASET_PARAMS).construct()
+
+
+def _fit_variant(columns, X_test, params, num_rounds):
+    params = {**BASE_PARAMS, **params}
+    if len(columns) < _TRAIN.num_feature():
+        # Splits may only use the variant's features: the same trees as a Dataset of just those columns
+        params['interaction_constraints'] = [list(columns)]
+    booster = lgb.train(params, _TRAIN, num_boost_round=num_rounds)
+    return booster.predict(X_test), booster.feature_importance('gain')
+
+
+class AblationRunner:
+    """Train feature-subset variants of one LightGBM model on a shared binned Dataset.
+
+    The training matrix is binned once and saved as a LightGBM binary file that
+    every worker loads. A variant never rebuilds it: it is trained on the full
+    Dataset with its splits confined to its own columns.
+    """
+
+    def __init__(self, X_train, y_train, params=None, num_rounds=NUM_ROUNDS, max_workers=None):
+        self.features = list(X_train.columns)
+        self.params = params or {}
+        self.num_rounds = num_rounds
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._dir = tempfile.TemporaryDirectory()
+        self._path = os.path.join(self._dir.name, 'train.bin')
+        lgb.Dataset(np.asarray(X_train, dtype=np.float64), np.asarray(y_train, dtype=np.float64),
+                    feature_name=self.features, params=DATASET_PARAMS).construct().save_binary(self._path)
+        self._pool = None
+
+    def __enter__(self):
+        if self.max_workers == 1:
+            _init_worker(self._path)
+        else:
+            self._pool = ProcessPoolExecutor(self.max_workers, initializer=_init_worker, initargs=(self._path,))
+        return self
+
+    def __exit__(self, *exc):
+        if self._pool is not None:
+            self._pool.shutdown()
+        self._dir.cleanup()
+
+    def run(self, variants, X_test, y_test, groups):
+        """(one row per variant sorted by MAE, {variant: test predictions}).
+
+        mae_delta is a variant's MAE minus that of 'all' (positive: worse than
+        with every feature). gain_<group> is the group's share of the variant's
+        total split gain.
+        """
+        X = np.asarray(X_test[self.features], dtype=np.float64)
+        y = np.asarray(y_test, dtype=np.float64)
+        tasks = [([self.features.index(f) for f in cols], X, self.params, self.num_rounds)
+                 for cols in variants.values()]
+        if self._pool is None:
+            results = [_fit_variant(*t) for t in tasks]
+        else:
+            results = list(self._pool.map(_fit_variant, *zip(*tasks)))
+
+        rows, preds = [], {}
+        for (name, cols), (y_pred, gain) in zip(variants.items(), results):
+            errors = y_pred - y
+            gain = pd.Series(gain, index=self.features)
+            total = gain.sum() or 1.0
+            rows.append({'variant': name, 'n_features': len(cols), 'features': ','.join(cols),
+                         'mae': float(np.mean(np.abs(errors))), 'rmse': float(np.sqrt(np.mean(errors ** 2))),
+                         **{f'gain_{g}': float(gain[g_cols].sum() / total) for g, g_cols in groups.items()}})
+            preds[name] = y_pred
+        table = pd.DataFrame(rows)
+        reference = table.loc[table['variant'] == 'all', 'mae']
+        table.insert(5, 'mae_delta', table['mae'] - (reference.iloc[0] if len(reference) else np.nan))
+        return table.sort_values('mae', kind='stable').reset_index(drop=True), preds
@@ -1,25 +1,20 @@
-import pandas as pd
 import os
+import sys
 
-INPUT_FILE = 'data/processed/merged_sentiment_stock.csv'
-OUTPUT_FILE = 'data/processed/merged_sentiment_stock_avg.csv'
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.features import SENTIMENT_AVG_SPEC, build_features
+from common.storage import read_table, write_table
 
-print("Loading merged sentiment + price data...")
-df = pd.read_csv(INPUT_FILE)
-df['Date'] = pd.to_datetime(df['Date'])
+INPUT_FILE = 'data/processed/merged_sentiment_stock'
+OUTPUT_FILE = 'data/processed/merged_sentiment_stock_avg'
 
-# Sort by date
-df = df.sort_values('Date').reset_index(drop=True)
+print("Loading merged sentiment + price data...")
+df = read_table(INPUT_FILE)
 
-# Rolling averages of sentiment
+# Rolling averages of sentiment per ticker; rows without full windows are dropped
 print("Creating sentiment averages...")
-df['sentiment_avg_3'] = df['Sentiment_norm'].rolling(window=3).mean()
-df['sentiment_avg_5'] = df['Sentiment_norm'].rolling(window=5).mean()
-
-# Drop initial rows with NaNs
-df = df.dropna().reset_index(drop=True)
+df = build_features(df, SENTIMENT_AVG_SPEC, date_major=False)
 
 # Save
-os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-df.to_csv(OUTPUT_FILE, index=False)
+write_table(df, OUTPUT_FILE)
 print(f" Saved with sentiment averages → {OUTPUT_FILE}")
@@ -0,0 +1,94 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.features import LGBM_ADVANCED_SPEC, LGBM_READY_SPEC, history_needed
+from common.panel import DATE_COL, TICKER_COL
+from common.storage import read_table, write_table
+from multi_horizon import DirectForecaster, RecursiveForecaster, model_features, to_frame
+
+# Paths
+INPUT_FILE = 'data/processed/merged_sentiment_stock'
+FORECAST_OUTPUT = 'outputs/forecasts/lightgbm_multihorizon_forecast'
+EVAL_OUTPUT = 'outputs/forecasts/lightgbm_multihorizon_eval'
+
+HORIZON = 30  # Business days ahead, as the Prophet scripts forecast 30 days
+# Feature set -> (spec, whether raw Close/sentiment are model inputs), as in the existing LightGBM scripts
+FEATURE_SETS = {'ready': (LGBM_READY_SPEC, False), 'advanced': (LGBM_ADVANCED_SPEC, True)}
+FEATURE_SET = 'advanced'
+
+
+def fit_predict(panel, spec, features, horizon):
+    timings, paths = {}, {}
+    for method, forecaster in [('recursive', RecursiveForecaster(spec, features)),
+                               ('direct', DirectForecaster(spec, features))]:
+        start = time.perf_counter()
+        if method == 'direct':
+            forecaster.fit(panel, horizon)
+        else:
+            forecaster.fit(panel)
+        fitted = time.perf_counter()
+        paths[method] = forecaster.predict(panel, horizon)
+        timings[method] = (fitted - start, time.perf_counter() - fitted)
+    return paths, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recursive and direct multi-horizon LightGBM forecasts.")
+    parser.add_argument('--features', choices=sorted(FEATURE_SETS), default=FEATURE_SET)
+    parser.add_argument('--horizon', type=int, default=HORIZON)
+    args = parser.parse_args()
+    (spec, raw), horizon = FEATURE_SETS[args.features], args.horizon
+
+    print("Loading merged sentiment + price data...")
+    panel = read_table(INPUT_FILE)
+    panel[DATE_COL] = pd.to_datetime(panel[DATE_COL])
+    panel = panel.sort_values([TICKER_COL, DATE_COL], kind='stable').reset_index(drop=True)
+
+    # Holdout needs `horizon` rows to score plus enough history to train on
+    sizes = panel.groupby(TICKER_COL).size()
+    keep = sizes[sizes > history_needed(spec) + 2 * horizon].index
+    panel = panel[panel[TICKER_COL].isin(keep)].reset_index(drop=True)
+    features = model_features(panel, spec, raw)
+    print(f" {len(keep)} tickers, {len(features)} features ({args.features})")
+
+    # Backtest: hold out the last `horizon` rows of every ticker and forecast them from the rest
+    print(f"Backtesting {horizon}-day recursive and direct forecasts...")
+    holdout = panel.groupby(TICKER_COL, sort=True).tail(horizon)
+    history = panel.drop(holdout.index)
+    paths, timings = fit_predict(history, spec, features, horizon)
+    last_dates = history.groupby(TICKER_COL)[DATE_COL].max()
+    actual_dates = holdout.groupby(TICKER_COL)[DATE_COL].apply(list).to_dict()
+    preds = pd.concat([to_frame(*paths[m], last_dates, m, actual_dates) for m in paths], ignore_index=True)
+    preds = preds.merge(holdout[[TICKER_COL, DATE_COL, 'Close_norm']].rename(columns={'Close_norm': 'y_true'}),
+                        on=[TICKER_COL, DATE_COL], how='left')
+
+    err = preds['y_pred'] - preds['y_true']
+    metrics = (preds.assign(abs_err=err.abs(), sq_err=err ** 2)
+               .groupby(['method', 'horizon'])
+               .agg(mae=('abs_err', 'mean'), rmse=('sq_err', lambda s: np.sqrt(s.mean())))
+               .reset_index())
+    for method, (fit_s, predict_s) in timings.items():
+        m = metrics[metrics['method'] == method]
+        print(f" {method:<9} MAE h=1 {m['mae'].iloc[0]:.4f}, h={horizon} {m['mae'].iloc[-1]:.4f}, "
+              f"mean {m['mae'].mean():.4f} (fit {fit_s:.1f}s, predict {predict_s * 1000:.0f} ms)")
+    write_table(metrics, EVAL_OUTPUT)
+
+    # Forward paths from the full history
+    print(f"Forecasting {horizon} business days ahead...")
+    paths, _ = fit_predict(panel, spec, features, horizon)
+    last_dates = panel.groupby(TICKER_COL)[DATE_COL].max()
+    forecast = pd.concat([to_frame(*paths[m], last_dates, m) for m in paths], ignore_index=True)
+    write_table(forecast, FORECAST_OUTPUT)
+
+    print(f" Backtest metrics saved to {EVAL_OUTPUT}")
+    print(f" Forecasts saved to {FORECAST_OUTPUT}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,19 +1,36 @@
 import pandas as pd
-import lightgbm as lgb
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 import matplotlib.pyplot as plt
 import numpy as np
 import os
+import sys
+
+from tuning import load_params
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.storage import read_table, write_table
+from common.lgbm_fit import DESCRIPTIONS, fit_or_update
+from common.telemetry import span
 
 # File paths
-INPUT_FILE = 'data/processed/lgbm_ready.csv'
-PRED_OUTPUT = 'outputs/forecasts/lightgbm_final_preds.csv'
+INPUT_FILE = 'data/processed/lgbm_ready'
+PRED_OUTPUT = 'outputs/forecasts/lightgbm_final_preds'
 PLOT_OUTPUT = 'outputs/charts/lightgbm_final_forecast_plot.png'
+MODEL_NAME = 'lightgbm_final'  # Registry name (see common/registry.py)
+PARAMS_FILE = 'outputs/tuning/lightgbm_best_params.json'  # Written by tune_lightgbm.py
+
+# Used until tune_lightgbm.py has saved a params file
+DEFAULT_PARAMS = {'learning_rate': 0.1, 'max_depth': 5, 'n_estimators': 150, 'num_leaves': 15}
+
+# Daily runs update the registered model on the new rows and refit it from scratch on a cadence
+UPDATE_MODE = 'continue'  # 'continue', 'refit' or 'full' (see common/lgbm_fit.py)
+FULL_REFIT_EVERY = 20
+DRIFT_CHECK_EVERY = 5  # Updates between checks against a fresh full refit
 
 # Load data
 print("Loading processed data...")
-df = pd.read_csv(INPUT_FILE)
+df = read_table(INPUT_FILE)
 
 # Features (with sentiment)
 features = ['lag_close_1', 'lag_sentiment_1', 'roll_mean_3', 'roll_std_3']
@@ -24,17 +41,17 @@ y = df['target']
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, shuffle=False)
 
 # Final tuned model
-print("Training LightGBM with best hyperparameters...")
-model = lgb.LGBMRegressor(
-    learning_rate=0.1,
-    max_depth=5,
-    n_estimators=150,
-    num_leaves=15
-)
-model.fit(X_train, y_train)
+params = load_params(PARAMS_FILE, DEFAULT_PARAMS)
+# Reuse, update or refit the registered model, whichever the new rows allow (see common/lgbm_fit.py)
+print(f"Training LightGBM with best hyperparameters: {params}")
+model, how = fit_or_update(MODEL_NAME, X_train, y_train, df.loc[X_train.index, 'Date'], params,
+                           valid=(X_test, y_test), mode=UPDATE_MODE, full_refit_every=FULL_REFIT_EVERY,
+                           drift_check_every=DRIFT_CHECK_EVERY)
+print(f" {MODEL_NAME}: {DESCRIPTIONS[how]}")
 
 # Predict
-y_pred = model.predict(X_test)
+with span('predict', model=MODEL_NAME, rows=len(X_test)):
+    y_pred = model.predict(X_test)
 
 # Evaluate
 mae = mean_absolute_error(y_test, y_pred)
@@ -44,8 +61,7 @@ print(f" Final RMSE: {rmse:.4f}")
 
 # Save predictions
 pred_df = pd.DataFrame({'y_true': y_test.values, 'y_pred': y_pred})
-os.makedirs(os.path.dirname(PRED_OUTPUT), exist_ok=True)
-pred_df.to_csv(PRED_OUTPUT, index=False)
+write_table(pred_df, PRED_OUTPUT)
 
 # Plot
 plt.figure(figsize=(10, 5))
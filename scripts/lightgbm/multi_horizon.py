@@ -0,0 +1,146 @@
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+
+from common.features import build_features, compute_features, history_needed, lead
+from common.incremental import NORMALIZED
+from common.panel import DATE_COL, TICKER_COL
+from common.telemetry import timed
+
+NON_FEATURES = [DATE_COL, TICKER_COL, 'target', 'Close_norm', 'Sentiment_norm']
+TARGET_SOURCE = 'Close_norm'
+
+
+def _inputs(spec):
+    return [f for f in spec if f.kind != 'lead']
+
+
+def model_features(panel, spec, raw=True):
+    """Model inputs for `spec`, led by the panel's raw columns (Close, sentiment) when `raw` is set.
+
+    Matches the column order of the prepared datasets: lgbm_advanced_ready keeps
+    the raw columns as features, the lgbm_ready scripts only use the spec.
+    """
+    names = [f.name for f in _inputs(spec)]
+    if not raw:
+        return names
+    return [c for c in panel.columns if c not in NON_FEATURES and c not in names] + names
+
+
+def latest_rows(panel, spec, features):
+    """The newest row per ticker whose features are all available (its target is the unknown next day)."""
+    frame = build_features(panel, _inputs(spec), dropna=False, date_major=False)
+    complete = frame[np.isfinite(frame[features].to_numpy(dtype=np.float64)).all(axis=1)]
+    return complete.groupby(TICKER_COL, sort=True).tail(1).reset_index(drop=True)
+
+
+class RecursiveForecaster:
+    """One next-day model rolled forward: each prediction becomes the next step's Close_norm.
+
+    All tickers advance together. Every step recomputes the spec's features on
+    a short per-ticker tail with the vectorized feature engine and scores the
+    whole panel with a single predict call. Sentiment is held at its last value.
+    """
+
+    def __init__(self, spec, features, params=None):
+        self.spec = _inputs(spec)
+        self.features = features
+        self.params = params or {}
+        self.model = None
+
+    @timed('fit', model='lightgbm_recursive')
+    def fit(self, panel):
+        train = build_features(panel, self.spec + [lead(TARGET_SOURCE, 1, 'target')])
+        self.model = lgb.LGBMRegressor(verbose=-1, **self.params)
+        self.model.fit(train[self.features], train['target'])
+        return self
+
+    @timed('predict', model='lightgbm_recursive')
+    def predict(self, panel, horizon):
+        """(tickers, horizon) array of Close_norm forecasts starting after each ticker's last row."""
+        sources = list(dict.fromkeys([f.source for f in self.spec] + [TARGET_SOURCE]))
+        passthrough = [c for c in self.features if c not in {f.name for f in self.spec}]
+        tail_len = history_needed(self.spec) + 1
+
+        panel = panel.sort_values([TICKER_COL, DATE_COL], kind='stable')
+        tickers = sorted(panel[TICKER_COL].unique())
+        tails = panel.groupby(TICKER_COL, sort=True).tail(tail_len)
+        counts = tails.groupby(TICKER_COL, sort=True).size().reindex(tickers)
+        if (counts < tail_len).any():
+            raise ValueError(f"Every ticker needs {tail_len} rows of history: "
+                             f"{', '.join(counts[counts < tail_len].index)}")
+        n = len(tickers)
+        # (tickers, time, sources) history, newest step last
+        history = tails[sources].to_numpy(dtype=np.float64).reshape(n, tail_len, len(sources))
+        codes = np.repeat(np.arange(n), tail_len)
+        target_col = sources.index(TARGET_SOURCE)
+
+        # Raw passthrough columns: min-max scaled ones follow the forecast, the rest are held
+        stats = panel.groupby(TICKER_COL, sort=True)
+        last_raw = stats[passthrough].last().reindex(tickers) if passthrough else None
+        scale = {raw: (stats[raw].min().reindex(tickers).to_numpy(), stats[raw].max().reindex(tickers).to_numpy())
+                 for raw in passthrough if NORMALIZED.get(raw) == TARGET_SOURCE}
+
+        out = np.empty((n, horizon))
+        for step in range(horizon):
+            values = compute_features(history.reshape(n * tail_len, -1), codes, self.spec, sources)
+            X = pd.DataFrame(values.reshape(n, tail_len, -1)[:, -1, :], columns=[f.name for f in self.spec])
+            for raw in passthrough:
+                if raw in scale:
+                    lo, hi = scale[raw]
+                    X[raw] = lo + history[:, -1, target_col] * np.where(hi > lo, hi - lo, 1.0)
+                else:
+                    X[raw] = last_raw[raw].to_numpy()
+            out[:, step] = self.model.predict(X[self.features])
+
+            # Shift every ticker's window one step; sentiment (and any other source) is held
+            history = np.concatenate([history[:, 1:], history[:, -1:]], axis=1)
+            history[:, -1, target_col] = out[:, step]
+        return tickers, out
+
+
+class DirectForecaster:
+    """One model per horizon h trained on target Close_norm(t + h); predicting is one call per horizon."""
+
+    def __init__(self, spec, features, params=None):
+        self.spec = _inputs(spec)
+        self.features = features
+        self.params = params or {}
+        self.models = {}
+
+    @timed('fit', model='lightgbm_direct')
+    def fit(self, panel, horizon):
+        targets = [lead(TARGET_SOURCE, h, f'target_{h}') for h in range(1, horizon + 1)]
+        train = build_features(panel, self.spec + targets, dropna=False)
+        X = train[self.features]
+        usable = np.isfinite(X.to_numpy(dtype=np.float64)).all(axis=1)
+        for h in range(1, horizon + 1):
+            rows = usable & train[f'target_{h}'].notna().to_numpy()
+            model = lgb.LGBMRegressor(verbose=-1, **self.params)
+            model.fit(X[rows], train.loc[rows, f'target_{h}'])
+            self.models[h] = model
+        return self
+
+    @timed('predict', model='lightgbm_direct')
+    def predict(self, panel, horizon):
+        latest = latest_rows(panel, self.spec, self.features)
+        X = latest[self.features]
+        out = np.column_stack([self.models[h].predict(X) for h in range(1, horizon + 1)])
+        return latest[TICKER_COL].tolist(), out
+
+
+def to_frame(tickers, preds, last_dates, method, future_dates=None):
+    """Long [Stock Name, Date, horizon, method, y_pred] table.
+
+    Dates come from `future_dates` ({ticker: dates}) when known, else the next business days.
+    """
+    rows = []
+    for i, ticker in enumerate(tickers):
+        horizon = preds.shape[1]
+        dates = (future_dates or {}).get(ticker)
+        if dates is None or len(dates) < horizon:
+            dates = pd.bdate_range(last_dates[ticker] + pd.offsets.BDay(1), periods=horizon)
+        rows.append(pd.DataFrame({TICKER_COL: ticker, DATE_COL: pd.to_datetime(dates[:horizon]),
+                                  'horizon': np.arange(1, horizon + 1), 'method': method,
+                                  'y_pred': preds[i]}))
+    return pd.concat(rows, ignore_index=True)
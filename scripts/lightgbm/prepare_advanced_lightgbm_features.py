@@ -1,34 +1,21 @@
-import pandas as pd
 import os
+import sys
 
-# Paths
-INPUT_FILE = 'data/processed/merged_sentiment_stock_avg.csv'
-OUTPUT_FILE = 'data/processed/lgbm_advanced_ready.csv'
-
-print("Loading data with sentiment averages...")
-df = pd.read_csv(INPUT_FILE)
-df['Date'] = pd.to_datetime(df['Date'])
-df = df.sort_values('Date').reset_index(drop=True)
-
-# Lag features for price
-for i in range(1, 4):
-    df[f'lag_close_{i}'] = df['Close_norm'].shift(i)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.features import LGBM_ADVANCED_SPEC, build_features
+from common.storage import read_table, write_table
 
-# Lag features for sentiment
-for i in range(1, 4):
-    df[f'lag_sentiment_{i}'] = df['Sentiment_norm'].shift(i)
-
-# Rolling stats
-df['roll_mean_3'] = df['Close_norm'].rolling(window=3).mean()
-df['roll_std_3'] = df['Close_norm'].rolling(window=3).std()
+# Paths
+INPUT_FILE = 'data/processed/merged_sentiment_stock'
+OUTPUT_FILE = 'data/processed/lgbm_advanced_ready'
 
-# Target = next day's close price
-df['target'] = df['Close_norm'].shift(-1)
+print("Loading merged sentiment + price data...")
+df = read_table(INPUT_FILE)
 
-# Drop rows with NaNs
-df = df.dropna().reset_index(drop=True)
+# Sentiment averages, price/sentiment lags, rolling stats and target in one pass
+print("Creating advanced features...")
+df = build_features(df, LGBM_ADVANCED_SPEC)
 
 # Save
-os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-df.to_csv(OUTPUT_FILE, index=False)
+write_table(df, OUTPUT_FILE)
 print(f" Advanced features saved to {OUTPUT_FILE}")
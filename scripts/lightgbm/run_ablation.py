@@ -0,0 +1,69 @@
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+from sklearn.model_selection import train_test_split
+
+from ablation import AblationRunner, feature_groups, make_variants
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.panel import DATE_COL, TICKER_COL
+from common.storage import read_table, write_table
+from common.telemetry import span
+
+# File paths
+INPUT_FILE = 'data/processed/lgbm_advanced_ready'
+RESULTS_OUTPUT = 'outputs/ablation/lightgbm_ablation_results'
+PRED_OUTPUT = 'outputs/ablation/lightgbm_ablation_preds'
+
+TEST_SIZE = 0.2
+MAX_WORKERS = None  # None uses every core
+NON_FEATURES = ['Date', TICKER_COL, 'target', 'Close_norm', 'Sentiment_norm']
+
+# The feature sets of the former one-script-per-variant comparison; 'all' is the advanced model
+NAMED_VARIANTS = {
+    'sentiment': ['lag_close_1', 'lag_sentiment_1', 'roll_mean_3', 'roll_std_3'],
+    'no_sentiment': ['lag_close_1', 'roll_mean_3', 'roll_std_3'],
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare LightGBM feature subsets on one shared binned Dataset.")
+    parser.add_argument('--every-combination', action='store_true',
+                        help="every union of feature groups instead of leave-one-group-out and single groups")
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS)
+    args = parser.parse_args()
+
+    print("Loading advanced feature dataset...")
+    df = read_table(INPUT_FILE)
+    features = [c for c in df.columns if c not in NON_FEATURES]
+    groups = feature_groups(features)
+    variants = make_variants(groups, args.every_combination, NAMED_VARIANTS)
+
+    # Same chronological holdout as the single-variant scripts
+    train, test = train_test_split(df, test_size=TEST_SIZE, shuffle=False)
+
+    print(f"Training {len(variants)} variants over {len(groups)} feature groups "
+          f"({', '.join(groups)}) on one binned Dataset...")
+    start = time.perf_counter()
+    with span('fit', model='lightgbm_ablation', rows=len(train), variants=len(variants)):
+        with AblationRunner(train[features], train['target'], max_workers=args.workers) as runner:
+            results, preds = runner.run(variants, test[features], test['target'], groups)
+    print(f" Done in {time.perf_counter() - start:.1f}s")
+    print(results.drop(columns='features').to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    preds = pd.concat([pd.DataFrame({DATE_COL: test[DATE_COL].values, TICKER_COL: test[TICKER_COL].values,
+                                     'variant': name, 'y_true': test['target'].values, 'y_pred': y_pred})
+                       for name, y_pred in preds.items()], ignore_index=True)
+
+    # Save results
+    write_table(results, RESULTS_OUTPUT)
+    write_table(preds, PRED_OUTPUT)
+    print(f" Comparison table saved to {RESULTS_OUTPUT}")
+    print(f" Predictions saved to {PRED_OUTPUT}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+import pandas as pd
+from sklearn.metrics import mean_absolute_error, mean_squared_error
+import numpy as np
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.lgbm_fit import fit_or_update
+from common.panel import TICKER_COL, run_per_ticker
+from common.storage import read_table, write_table
+from common.telemetry import span
+
+# File paths
+INPUT_FILE = 'data/processed/lgbm_advanced_ready'
+PRED_OUTPUT = 'outputs/forecasts/lightgbm_panel_preds'
+METRICS_OUTPUT = 'outputs/forecasts/lightgbm_panel_metrics'
+
+TEST_SIZE = 0.2
+MIN_ROWS = 20  # Tickers with less history are skipped
+MAX_WORKERS = None  # None uses every core
+MODEL_NAME = 'lightgbm_panel'  # Registered per ticker as lightgbm_panel/<ticker>
+# Daily runs update each ticker's booster on its new rows and refit it from scratch on a cadence
+UPDATE_MODE = 'continue'  # 'continue', 'refit' or 'full' (see common/lgbm_fit.py)
+FULL_REFIT_EVERY = 20
+DRIFT_CHECK_EVERY = 5  # Updates between checks against a fresh full refit
+
+
+def fit_ticker(ticker, df, features, test_size=TEST_SIZE):
+    if len(df) < MIN_ROWS:
+        return None
+
+    # Chronological holdout within this ticker's own series
+    split = int(len(df) * (1 - test_size))
+    train, test = df.iloc[:split], df.iloc[split:]
+
+    name = f"{MODEL_NAME}/{ticker}"
+    # One core per ticker; the pool provides the parallelism
+    model, how = fit_or_update(name, train[features], train['target'], train['Date'],
+                               valid=(test[features], test['target']), mode=UPDATE_MODE,
+                               full_refit_every=FULL_REFIT_EVERY,
+                               drift_check_every=DRIFT_CHECK_EVERY, n_jobs=1)
+    with span('predict', model=name, rows=len(test)):
+        y_pred = model.predict(test[features])
+
+    preds = pd.DataFrame({TICKER_COL: ticker, 'Date': test['Date'].values,
+                          'y_true': test['target'].values, 'y_pred': y_pred})
+    metrics = {TICKER_COL: ticker, 'n_train': len(train), 'n_test': len(test),
+               'mae': mean_absolute_error(test['target'], y_pred),
+               'rmse': np.sqrt(mean_squared_error(test['target'], y_pred)),
+               'how': how}
+    return preds, metrics
+
+
+def main():
+    print("Loading panel feature dataset...")
+    df = read_table(INPUT_FILE)
+    features = [col for col in df.columns if col not in ['Date', TICKER_COL, 'target', 'Close_norm', 'Sentiment_norm']]
+
+    print(f"Training LightGBM for {df[TICKER_COL].nunique()} tickers in parallel...")
+    results = run_per_ticker(fit_ticker, df, max_workers=MAX_WORKERS, features=features)
+    skipped = [t for t, r in results.items() if r is None]
+    if skipped:
+        print(f" Skipped {len(skipped)} tickers with fewer than {MIN_ROWS} rows: {', '.join(skipped)}")
+    results = {t: r for t, r in results.items() if r is not None}
+
+    preds = pd.concat([p for p, _ in results.values()], ignore_index=True)
+    metrics = pd.DataFrame([m for _, m in results.values()])
+    print(metrics[[TICKER_COL, 'mae', 'rmse']].to_string(index=False))
+    print(" Models " + ", ".join(f"{how}: {n}" for how, n in metrics['how'].value_counts().items()))
+    print(f" Mean MAE across tickers:  {metrics['mae'].mean():.4f}")
+    print(f" Mean RMSE across tickers: {metrics['rmse'].mean():.4f}")
+
+    # Save predictions and per-ticker metrics
+    write_table(preds, PRED_OUTPUT)
+    write_table(metrics.drop(columns='how'), METRICS_OUTPUT)
+    print(f" Predictions saved to {PRED_OUTPUT}")
+    print(f" Metrics saved to {METRICS_OUTPUT}")
+
+
+if __name__ == '__main__':
+    main()
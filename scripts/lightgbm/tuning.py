@@ -0,0 +1,160 @@
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import TimeSeriesSplit
+
+# Parameters every candidate shares. Binning is fixed when a fold's Dataset is
+# built, so only tree/regularization parameters are searched.
+BASE_PARAMS = {'objective': 'regression', 'metric': 'l1', 'verbose': -1, 'num_threads': 1, 'seed': 42}
+DATASET_PARAMS = {'verbose': -1, 'feature_pre_filter': False}
+# Early stopping watches the first part of each validation fold; the MAE is scored on
+# the later rest, so picking the stopping round does not flatter the reported MAE
+STOP_FRACTION = 0.5
+
+# name -> (low, high, scale); names follow LGBMRegressor so saved params load directly
+SEARCH_SPACE = {
+    'num_leaves': (7, 63, 'int'),
+    'max_depth': (3, 8, 'int'),
+    'learning_rate': (0.01, 0.2, 'log'),
+    'min_child_samples': (5, 50, 'int'),
+    'colsample_bytree': (0.6, 1.0, 'float'),
+    'reg_lambda': (1e-3, 10.0, 'log'),
+}
+
+_FOLDS = None
+
+
+def sample_params(rng, space=SEARCH_SPACE):
+    params = {}
+    for name, (low, high, scale) in space.items():
+        if scale == 'int':
+            params[name] = int(rng.integers(low, high + 1))
+        elif scale == 'log':
+            params[name] = float(np.exp(rng.uniform(np.log(low), np.log(high))))
+        else:
+            params[name] = float(rng.uniform(low, high))
+    return params
+
+
+def build_folds(X, y, n_splits=5):
+    """One (train, stop, X_score, y_score) per TimeSeriesSplit fold, binned once and reused by every candidate.
+
+    Each validation fold is split in time: `stop` (the first STOP_FRACTION) is the
+    early-stopping set, and the rows after it are held out for the fold's MAE.
+    """
+    X = np.asarray(X, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    folds = []
+    for train_idx, valid_idx in TimeSeriesSplit(n_splits=n_splits).split(X):
+        cut = max(1, int(len(valid_idx) * STOP_FRACTION))
+        stop_idx, score_idx = valid_idx[:cut], valid_idx[cut:]
+        train = lgb.Dataset(X[train_idx], y[train_idx], params=DATASET_PARAMS, free_raw_data=False).construct()
+        stop = lgb.Dataset(X[stop_idx], y[stop_idx], reference=train, params=DATASET_PARAMS,
+                           free_raw_data=False).construct()
+        folds.append((train, stop, X[score_idx], y[score_idx]))
+    return folds
+
+
+def _init_worker(X, y, n_splits):
+    global _FOLDS
+    _FOLDS = build_folds(X, y, n_splits)
+
+
+def _fit_fold(params, fold, rounds, stopping_rounds):
+    train, stop, X_score, y_score = _FOLDS[fold]
+    booster = lgb.train({**BASE_PARAMS, **params}, train, num_boost_round=rounds, valid_sets=[stop],
+                        callbacks=[lgb.early_stopping(stopping_rounds, verbose=False)])
+    mae = float(np.mean(np.abs(booster.predict(X_score, num_iteration=booster.best_iteration) - y_score)))
+    # Stopped before the budget ran out: more rounds would not change the result
+    converged = booster.current_iteration() < rounds
+    return mae, booster.best_iteration, converged
+
+
+class SuccessiveHalving:
+    """Successive-halving search over time-series folds with early stopping.
+
+    Every candidate starts with `min_rounds` boosting rounds; after each rung
+    only the best 1/eta (by mean fold MAE) move on with eta times the budget,
+    up to `max_rounds`. Candidates that already early-stopped on a fold keep
+    that result instead of being refit. Fold MAEs are scored on the part of each
+    validation fold that early stopping did not see (see build_folds).
+    """
+
+    def __init__(self, X, y, n_splits=5, min_rounds=30, max_rounds=810, eta=3,
+                 stopping_rounds=20, max_workers=None):
+        self.n_splits = n_splits
+        self.min_rounds = min_rounds
+        self.max_rounds = max_rounds
+        self.eta = eta
+        self.stopping_rounds = stopping_rounds
+        self.max_workers = max_workers or min(4, os.cpu_count() or 1)
+        self._init = (np.asarray(X, dtype=np.float64), np.asarray(y, dtype=np.float64), n_splits)
+        self._pool = None
+
+    def __enter__(self):
+        if self.max_workers == 1:
+            _init_worker(*self._init)
+        else:
+            self._pool = ProcessPoolExecutor(self.max_workers, initializer=_init_worker, initargs=self._init)
+        return self
+
+    def __exit__(self, *exc):
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    def _evaluate(self, tasks):
+        if self._pool is None:
+            return [_fit_fold(*t) for t in tasks]
+        return list(self._pool.map(_fit_fold, *zip(*tasks)))
+
+    def run(self, candidates):
+        """Return (best params, best iteration, one row per candidate and rung)."""
+        memo = {}  # (candidate, fold) -> (mae, best_iteration, converged)
+        alive = list(range(len(candidates)))
+        rows, rounds, rung = [], self.min_rounds, 0
+        while True:
+            tasks, keys = [], []
+            for c in alive:
+                for fold in range(self.n_splits):
+                    if not memo.get((c, fold), (None, None, False))[2]:
+                        tasks.append((candidates[c], fold, rounds, self.stopping_rounds))
+                        keys.append((c, fold))
+            memo.update(zip(keys, self._evaluate(tasks)))
+
+            scores = {}
+            for c in alive:
+                maes, iters, _ = zip(*(memo[(c, fold)] for fold in range(self.n_splits)))
+                scores[c] = float(np.mean(maes))
+                rows.append({'candidate': c, 'rung': rung, 'rounds': rounds, 'mae': scores[c],
+                             'best_iteration': int(np.mean(iters)), 'fits': sum(k[0] == c for k in keys),
+                             **candidates[c]})
+            print(f"  rung {rung}: {len(alive)} candidate(s) at {rounds} rounds, "
+                  f"{len(tasks)} fits, best MAE {min(scores.values()):.4f}")
+
+            if len(alive) == 1 or rounds >= self.max_rounds:
+                break
+            alive = sorted(alive, key=scores.get)[:max(1, len(alive) // self.eta)]
+            rounds, rung = min(rounds * self.eta, self.max_rounds), rung + 1
+
+        best = min(alive, key=scores.get)
+        best_iteration = int(np.mean([memo[(best, fold)][1] for fold in range(self.n_splits)]))
+        return candidates[best], max(best_iteration, 1), pd.DataFrame(rows)
+
+
+def save_params(path, params, n_estimators, mae):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({'params': params, 'n_estimators': n_estimators, 'cv_mae': mae}, f, indent=2)
+
+
+def load_params(path, default):
+    """LGBMRegressor keyword arguments from a saved params file, or `default` if there is none."""
+    if not os.path.exists(path):
+        return dict(default)
+    with open(path) as f:
+        saved = json.load(f)
+    return {**saved['params'], 'n_estimators': saved['n_estimators']}
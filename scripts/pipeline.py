@@ -0,0 +1,117 @@
+import argparse
+import sys
+
+from common.pipeline import PipelineRunner, Stage
+
+# Run from the repository root:
+#   python scripts/pipeline.py                 # bring everything up to date
+#   python scripts/pipeline.py lightgbm_panel  # one stage and whatever it depends on
+STATE_FILE = 'data/state/pipeline_state.json'
+LOG_DIR = 'data/state/logs'
+RUNS_FILE = 'data/state/pipeline_runs.csv'
+
+TWEETS = 'data/raw/stock_tweets.csv'
+PRICES = 'data/raw/stock_yfinance_data.csv'
+SECTORS = 'data/external/ticker_sectors.csv'
+ROBERTA = 'data/processed/roberta_sentiment_10k'
+ROBERTA_DAILY = 'data/processed/roberta_sentiment_daily'
+MERGED = 'data/processed/merged_sentiment_stock'
+ATTRIBUTION = 'data/processed/sentiment_attribution'
+MERGED_AVG = 'data/processed/merged_sentiment_stock_avg'
+LGBM_READY = 'data/processed/lgbm_ready'
+LGBM_ADVANCED = 'data/processed/lgbm_advanced_ready'
+PROPHET_READY = 'data/processed/prophet_ready'
+TUNED_PARAMS = 'outputs/tuning/lightgbm_best_params.json'
+VANILLA_FORECAST = 'outputs/forecasts/vanilla_prophet_forecast'
+ROBERTA_FORECAST = 'outputs/forecasts/roberta_prophet_forecast'
+ABLATION_RESULTS = 'outputs/ablation/lightgbm_ablation_results'
+ABLATION_PREDS = 'outputs/ablation/lightgbm_ablation_preds'
+
+STAGES = [
+    # Sentiment
+    Stage('roberta_sentiment', 'sentiment/roberta_sentiment.py', [TWEETS, PRICES], [ROBERTA, ROBERTA_DAILY]),
+    Stage('vader_sentiment', 'sentiment/sentiment_scraper.py', [TWEETS, PRICES], ['data/processed/vader_sentiment_daily']),
+    Stage('merge_sentiment', 'sentiment/save_merged_sentiment.py', [ROBERTA, PRICES, SECTORS], [MERGED, ATTRIBUTION]),
+
+    # LightGBM branch
+    Stage('sentiment_averages', 'lightgbm/add_sentiment_averages.py', [MERGED], [MERGED_AVG]),
+    Stage('lgbm_features', 'lightgbm/prepare_lightgbm_features.py', [MERGED], [LGBM_READY]),
+    Stage('lgbm_advanced_features', 'lightgbm/prepare_advanced_lightgbm_features.py', [MERGED], [LGBM_ADVANCED]),
+    Stage('lightgbm_final', 'lightgbm/lightgbm_final_model.py', [LGBM_READY, TUNED_PARAMS],
+          ['outputs/forecasts/lightgbm_final_preds', 'outputs/charts/lightgbm_final_forecast_plot.png']),
+    Stage('lightgbm_ablation', 'lightgbm/run_ablation.py', [LGBM_ADVANCED], [ABLATION_RESULTS, ABLATION_PREDS]),
+    Stage('lightgbm_panel', 'lightgbm/train_all_tickers.py', [LGBM_ADVANCED],
+          ['outputs/forecasts/lightgbm_panel_preds', 'outputs/forecasts/lightgbm_panel_metrics']),
+    Stage('tune_lightgbm', 'lightgbm/tune_lightgbm.py', [LGBM_READY],
+          ['outputs/tuning/lightgbm_tuning_results.csv', TUNED_PARAMS]),
+    Stage('lightgbm_multihorizon', 'lightgbm/forecast_multi_horizon.py', [MERGED],
+          ['outputs/forecasts/lightgbm_multihorizon_forecast', 'outputs/forecasts/lightgbm_multihorizon_eval']),
+
+    # Prophet branch
+    Stage('prophet_data', 'prophet/prepare_prophet_data.py', [PRICES], [PROPHET_READY]),
+    Stage('prophet_vanilla', 'prophet/forecast_future.py', [PROPHET_READY],
+          [VANILLA_FORECAST, 'outputs/charts/vanilla_prophet_forecast_plot.png']),
+    Stage('prophet_changepoints', 'prophet/evaluate_and_changepoints.py', [PROPHET_READY, VANILLA_FORECAST],
+          ['outputs/charts/vanilla_prophet_changepoints.png']),
+    Stage('prophet_panel', 'prophet/forecast_all_tickers.py', [PROPHET_READY, MERGED],
+          ['outputs/forecasts/prophet_panel_forecast']),
+    Stage('prophet_roberta', 'sentiment/roberta_sentiment_forecast.py', [MERGED],
+          [ROBERTA_FORECAST, 'outputs/charts/roberta_prophet_forecast_plot.png']),
+    Stage('evaluate_roberta', 'sentiment/evaluate_roberta_forecast.py', [ROBERTA_FORECAST, MERGED], []),
+
+    # Evaluation
+    Stage('backtest', 'backtest/run_backtest.py', [MERGED, LGBM_READY, LGBM_ADVANCED, TUNED_PARAMS],
+          ['outputs/backtest/walk_forward_preds', 'outputs/backtest/walk_forward_results']),
+    Stage('ensemble', 'ensemble/run_ensemble.py', [MERGED, TUNED_PARAMS],
+          ['outputs/ensemble/ensemble_preds', 'outputs/ensemble/ensemble_forecast',
+           'outputs/ensemble/ensemble_weights', 'outputs/ensemble/ensemble_metrics']),
+
+    # Dashboard
+    Stage('dashboard_store', 'dashboard/build_dashboard_store.py',
+          [PROPHET_READY, MERGED, 'outputs/forecasts/prophet_panel_forecast',
+           'outputs/forecasts/lightgbm_panel_preds', 'outputs/forecasts/lightgbm_multihorizon_forecast',
+           'outputs/backtest/walk_forward_preds'],
+          ['outputs/dashboard/series', 'outputs/dashboard/metrics', 'outputs/dashboard/manifest.json']),
+
+    # Visualization
+    Stage('plot_roberta', 'sentiment/plot_predicted_vs_actual.py', [ROBERTA_FORECAST, MERGED],
+          ['outputs/charts/actual_vs_predicted_roberta.png']),
+    Stage('compare_lightgbm', 'visualization/compare_lightgbm_variants.py', [ABLATION_RESULTS, ABLATION_PREDS],
+          ['outputs/charts/lightgbm_model_comparison.png', 'outputs/charts/lightgbm_ablation.png']),
+    Stage('compare_prophet', 'visualization/compare_vanilla_vs_roberta.py', [VANILLA_FORECAST, ROBERTA_FORECAST, MERGED],
+          ['outputs/charts/vanilla_vs_roberta_forecast.png']),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the StockCast pipeline, skipping up-to-date stages.")
+    parser.add_argument('targets', nargs='*', help="stages to bring up to date (default: all)")
+    parser.add_argument('--force', action='store_true', help="re-run stages even if nothing changed")
+    parser.add_argument('--jobs', type=int, default=None, help="stages run concurrently (default: up to 4)")
+    parser.add_argument('--dry-run', action='store_true', help="only report what would run")
+    parser.add_argument('--list', action='store_true', help="print the stages and their dependencies")
+    args = parser.parse_args()
+
+    runner = PipelineRunner(STAGES, STATE_FILE, LOG_DIR, RUNS_FILE, jobs=args.jobs)
+    if args.list:
+        for stage in STAGES:
+            after = ', '.join(runner.deps[stage.name]) or '-'
+            print(f"{stage.name:24s} {stage.script:48s} after: {after}")
+        return
+    unknown = [t for t in args.targets if t not in runner.stages]
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(unknown)}")
+
+    print(f"Running pipeline with up to {runner.jobs} concurrent stage(s)...")
+    results = runner.run(args.targets, force=args.force, dry_run=args.dry_run)
+
+    ran = {n: s for n, (status, s) in results.items() if status == 'ran'}
+    print(f" {len(ran)} stage(s) ran, {sum(st == 'skip' for st, _ in results.values())} up to date")
+    for name, seconds in sorted(ran.items(), key=lambda kv: -kv[1]):
+        print(f"   {name:24s} {seconds:7.1f}s")
+    if any(status in ('failed', 'blocked', 'missing') for status, _ in results.values()):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,28 +1,35 @@
 import pandas as pd
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 import numpy as np
-from prophet import Prophet
 from prophet.plot import add_changepoints_to_plot
 import matplotlib.pyplot as plt
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.registry import load_model
+from common.storage import read_table
+from common.telemetry import span
 
 # File paths
-INPUT_FILE = 'data/processed/prophet_ready.csv'
-FORECAST_FILE = 'outputs/forecasts/vanilla_prophet_forecast.csv'
+INPUT_FILE = 'data/processed/prophet_ready'
+FORECAST_FILE = 'outputs/forecasts/vanilla_prophet_forecast'
 PLOT_FILE = 'outputs/charts/vanilla_prophet_changepoints.png'
+TICKER = 'TSLA'
+MODEL_NAME = f"prophet_vanilla/{TICKER}"  # Registered by forecast_future.py
 
 # Load data
-df = pd.read_csv(INPUT_FILE)
-df['ds'] = pd.to_datetime(df['ds'])
+df = read_table(INPUT_FILE, columns=['ds', 'y'], tickers=[TICKER], date_col='ds')
 
-# Train Prophet again (to access changepoints)
-print("Retraining Prophet for changepoint visualization...")
-model = Prophet()
-model.fit(df)
+# Load the fitted model (and its changepoints) instead of retraining
+print(f"Loading registered model {MODEL_NAME}...")
+model, meta = load_model(MODEL_NAME)
+print(f" Version {meta['version']}, trained on {meta['train_start']} to {meta['train_end']}")
 
 # Forecast again to get forecast object
 future = model.make_future_dataframe(periods=30)
-forecast = model.predict(future)
+with span('predict', model=MODEL_NAME, rows=len(future)):
+    forecast = model.predict(future)
 
 # Evaluation (on known range only)
 merged = pd.merge(forecast, df, on='ds')
@@ -0,0 +1,74 @@
+import pandas as pd
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.panel import TICKER_COL, run_tasks, split_tickers
+from common.prophet_fit import family_init, fit_series
+from common.storage import read_table, write_table
+from common.telemetry import span
+
+# File paths
+PRICE_FILE = 'data/processed/prophet_ready'
+SENTIMENT_FILE = 'data/processed/merged_sentiment_stock'
+FORECAST_OUTPUT = 'outputs/forecasts/prophet_panel_forecast'
+
+PERIODS = 30
+MAX_WORKERS = None  # None uses every core
+# variant -> (registry family shared with forecast_future.py / roberta_sentiment_forecast.py, regressor)
+VARIANTS = {'vanilla_prophet': ('prophet_vanilla', None), 'roberta_prophet': ('prophet_roberta', 'Sentiment_norm')}
+
+
+def forecast_ticker(ticker, df, family, regressor=None, periods=PERIODS, fallback_init=None):
+    # Refits warm-start from this ticker's previous version, new tickers from another ticker's fit
+    regressors = [regressor] if regressor else []
+    model, how = fit_series(f"{family}/{ticker}", df, regressors, fallback_init)
+
+    future = model.make_future_dataframe(periods=periods)
+    if regressor:
+        # Known history, then hold the last value over the horizon
+        future = future.merge(df[['ds', regressor]], on='ds', how='left')
+        future[regressor] = future[regressor].ffill()
+    with span('predict', model=f"{family}/{ticker}", rows=len(future)):
+        forecast = model.predict(future)[['ds', 'yhat', 'yhat_lower', 'yhat_upper']]
+    forecast.insert(0, TICKER_COL, ticker)
+    return forecast, how
+
+
+def main():
+    print("Loading price and sentiment panels...")
+    prices = read_table(PRICE_FILE, date_col='ds')
+
+    merged = read_table(SENTIMENT_FILE, columns=['Date', TICKER_COL, 'Close_norm', 'Sentiment_norm'])
+    merged['ds'] = merged['Date']
+    merged['y'] = merged['Close_norm']
+    panels = {'vanilla_prophet': split_tickers(prices, date_col='ds'), 'roberta_prophet': split_tickers(merged)}
+
+    # Every (variant, ticker) series goes to one pool
+    tasks, keys = [], []
+    for variant, (family, regressor) in VARIANTS.items():
+        seed = family_init(family)
+        columns = ['ds', 'y'] + ([regressor] if regressor else [])
+        for ticker, df in panels[variant].items():
+            tasks.append((forecast_ticker, {'ticker': ticker, 'df': df[columns], 'family': family,
+                                            'regressor': regressor, 'fallback_init': seed}))
+            keys.append(variant)
+
+    print(f"Fitting {len(tasks)} Prophet series ({', '.join(VARIANTS)}) in parallel...")
+    start = time.perf_counter()
+    results = run_tasks(tasks, MAX_WORKERS)
+    hows = pd.Series([how for _, how in results]).value_counts()
+    print(f" Done in {time.perf_counter() - start:.1f}s: "
+          + ', '.join(f"{hows.get(how, 0)} {how}" for how in ('reused', 'warm', 'cold')))
+
+    forecast = pd.concat([frame.assign(model=variant) for (frame, _), variant in zip(results, keys)],
+                         ignore_index=True)
+
+    # Save forecast
+    write_table(forecast, FORECAST_OUTPUT, date_col='ds')
+    print(f" Forecasts for {forecast[TICKER_COL].nunique()} tickers saved to {FORECAST_OUTPUT}")
+
+
+if __name__ == '__main__':
+    main()
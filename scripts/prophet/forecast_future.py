@@ -1,29 +1,34 @@
-import pandas as pd
-from prophet import Prophet
 import matplotlib.pyplot as plt
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.prophet_fit import fit_series
+from common.storage import read_table, write_table
+from common.telemetry import span
 
 # File paths
-INPUT_FILE = 'data/processed/prophet_ready.csv'
-FORECAST_OUTPUT = 'outputs/forecasts/vanilla_prophet_forecast.csv'
+INPUT_FILE = 'data/processed/prophet_ready'
+FORECAST_OUTPUT = 'outputs/forecasts/vanilla_prophet_forecast'
 PLOT_OUTPUT = 'outputs/charts/vanilla_prophet_forecast_plot.png'
+TICKER = 'TSLA'  # forecast_all_tickers.py covers the full panel
+MODEL_NAME = f"prophet_vanilla/{TICKER}"  # Shared with forecast_all_tickers.py
 
 print("Loading data...")
-df = pd.read_csv(INPUT_FILE)
-df['ds'] = pd.to_datetime(df['ds'])  # Ensure datetime format
+df = read_table(INPUT_FILE, columns=['ds', 'y'], tickers=[TICKER], date_col='ds')
 
-# Initialize Prophet
-print("Training vanilla Prophet model...")
-model = Prophet()
-model.fit(df)
+# Reuse the registered model when the history is unchanged; otherwise warm-start from it
+print(f"Fitting vanilla Prophet model for {TICKER}...")
+model, how = fit_series(MODEL_NAME, df)
+print(f" {MODEL_NAME}: {how}")
 
 # Create future dataframe (30-day forecast)
 future = model.make_future_dataframe(periods=30)
-forecast = model.predict(future)
+with span('predict', model=MODEL_NAME, rows=len(future)):
+    forecast = model.predict(future)
 
 # Save forecast
-os.makedirs(os.path.dirname(FORECAST_OUTPUT), exist_ok=True)
-forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].to_csv(FORECAST_OUTPUT, index=False)
+write_table(forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']], FORECAST_OUTPUT, date_col='ds')
 
 # Plot
 print("Saving plot...")
@@ -31,7 +36,7 @@ fig, ax = plt.subplots(figsize=(10, 5))
 ax.plot(df['ds'], df['y'], label='Actual', color='blue')
 ax.plot(forecast['ds'], forecast['yhat'], label='Forecast', color='green')
 ax.fill_between(forecast['ds'], forecast['yhat_lower'], forecast['yhat_upper'], color='green', alpha=0.2)
-ax.set_title("Vanilla Prophet Forecast (No Sentiment)")
+ax.set_title(f"Vanilla Prophet Forecast (No Sentiment) - {TICKER}")
 ax.set_xlabel("Date")
 ax.set_ylabel("Stock Price")
 ax.legend()
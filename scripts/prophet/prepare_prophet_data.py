@@ -1,20 +1,23 @@
 import pandas as pd
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.storage import write_table
 
 # File paths
 INPUT_FILE = 'data/raw/stock_yfinance_data.csv'
-OUTPUT_FILE = 'data/processed/prophet_ready.csv'
+OUTPUT_FILE = 'data/processed/prophet_ready'
 
 print("Loading stock data...")
 df = pd.read_csv(INPUT_FILE)
 df['Date'] = pd.to_datetime(df['Date'])
 
-# Rename columns for Prophet
-df = df[['Date', 'Close']].rename(columns={'Date': 'ds', 'Close': 'y'})
-df = df.sort_values('ds')
+# Rename columns for Prophet, keeping the ticker so each series can be fit separately
+df = df[['Date', 'Close', 'Stock Name']].rename(columns={'Date': 'ds', 'Close': 'y'})
+df = df.sort_values(['Stock Name', 'ds'])
 
 # Save formatted data
-os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-df.to_csv(OUTPUT_FILE, index=False)
+write_table(df, OUTPUT_FILE, date_col='ds')
 
 print(f" Prophet-ready data saved to {OUTPUT_FILE}")
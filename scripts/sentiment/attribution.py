@@ -0,0 +1,114 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+from tweet_stream import TICKER_COL
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.market_calendar import tweet_days
+
+SECTOR_FILE = 'data/external/ticker_sectors.csv'  # Stock Name, Sector
+CASHTAG = r'\$([A-Za-z]{1,6})\b'
+# Share classes and renames that should count as the ticker we track
+ALIASES = {'GOOGL': 'GOOG', 'FB': 'META'}
+SPLIT_MENTIONS = True  # A tweet tagging n tickers gives each 1/n of its weight
+# Columns of the scored tweet table that attribution reads
+TWEET_COLUMNS = ('Date', TICKER_COL, 'Tweet', 'roberta_positive', 'dup_weight')
+
+
+def mention_matrix(texts, tickers, fallback=None, split=False):
+    """Sparse (tweets x tickers) CSR matrix of the tickers each tweet's cashtags mention.
+
+    `fallback` is each tweet's collection ticker (the Stock Name column), counted
+    as a mention too. With `split`, each tweet's row sums to 1 instead of 1 per
+    ticker. Tweets that mention no known ticker have an empty row.
+    """
+    texts = pd.Series(np.asarray(texts, dtype=object))
+    tags = texts.str.findall(CASHTAG).explode().dropna()
+    codes = pd.Categorical(tags.str.upper().replace(ALIASES), categories=tickers).codes
+    rows, cols = tags.index.to_numpy()[codes >= 0], codes[codes >= 0]
+    if fallback is not None:
+        own = pd.Categorical(np.asarray(fallback), categories=tickers).codes
+        rows = np.concatenate([rows, np.flatnonzero(own >= 0)])
+        cols = np.concatenate([cols, own[own >= 0]])
+
+    matrix = sparse.csr_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(texts), len(tickers)))
+    matrix.sum_duplicates()
+    matrix.data[:] = 1.0  # A ticker tagged twice in one tweet is still one mention
+    if split:
+        per_tweet = np.diff(matrix.indptr)
+        matrix = sparse.diags(1.0 / np.maximum(per_tweet, 1)) @ matrix
+    return matrix
+
+
+def load_sectors(tickers, path=SECTOR_FILE):
+    """Sparse (tickers x sectors) indicator matrix and the sector names, or (None, None) without a sector file."""
+    if not os.path.exists(path):
+        return None, None
+    mapping = pd.read_csv(path).set_index(TICKER_COL)['Sector'].reindex(tickers)
+    codes, names = pd.factorize(mapping)
+    known = np.flatnonzero(codes >= 0)
+    matrix = sparse.csr_matrix((np.ones(len(known)), (known, codes[known])), shape=(len(tickers), len(names)))
+    return matrix, list(names)
+
+
+def attribute_sentiment(tweets, value_col, out_col, tickers, weight_col=None, split=False, sectors=None,
+                        sessions=None):
+    """Per-(ticker, day) average of `value_col` over the tweets that mention each ticker.
+
+    All tweets are aggregated with one sparse product: a (ticker-days x tweets)
+    matrix of mention weights times the score column. Tweets that mention no
+    known ticker count towards every ticker, as market-wide sentiment does in
+    merge_panel. With a (tickers x sectors) `sectors` matrix from load_sectors(),
+    `sector_<out_col>` is the average over the other tickers in the same sector.
+    With `sessions`, days are trading sessions rather than UTC calendar days.
+    """
+    tickers = list(tickers)
+    n = len(tweets)
+    mentions = mention_matrix(tweets['Tweet'], tickers, tweets[TICKER_COL] if TICKER_COL in tweets.columns else None,
+                              split).tocoo()
+    day_codes, day_index = pd.factorize(tweet_days(tweets['Date'], sessions), sort=True)
+    weights = np.ones(n) if weight_col is None else tweets[weight_col].to_numpy(dtype='float64')
+    values = tweets[value_col].to_numpy(dtype='float64')
+    # Tweets outside the calendar (factorized to -1) and failed scores carry no weight
+    weights = np.where(np.isnan(values) | (day_codes < 0), 0.0, weights)
+    day_codes = np.maximum(day_codes, 0)
+
+    # Unattributed tweets go to an extra "market" row block that is added to every ticker below
+    market = np.flatnonzero(np.diff(mentions.tocsr().indptr) == 0)
+    ticker_codes = np.concatenate([mentions.col, np.full(len(market), len(tickers))])
+    tweet_rows = np.concatenate([mentions.row, market])
+    share = np.concatenate([mentions.data, np.ones(len(market))])
+    attribution = sparse.csr_matrix(
+        (share * weights[tweet_rows], (ticker_codes * len(day_index) + day_codes[tweet_rows], tweet_rows)),
+        shape=((len(tickers) + 1) * len(day_index), n))
+    totals = attribution @ np.column_stack([np.nan_to_num(values), np.ones(n)])
+    totals = totals.reshape(len(tickers) + 1, len(day_index), 2)
+    sums, weight = totals[:-1, :, 0] + totals[-1, :, 0], totals[:-1, :, 1] + totals[-1, :, 1]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        columns = {out_col: sums / weight, 'mention_weight': weight}
+        if sectors is not None:
+            # Leave-one-out sector average: the sector's totals minus the ticker's own
+            peer_sums = sectors @ (sectors.T @ sums) - sums
+            peer_weight = sectors @ (sectors.T @ weight) - weight
+            columns[f'sector_{out_col}'] = np.where(peer_weight > 1e-9, peer_sums / peer_weight, np.nan)
+    grid = pd.MultiIndex.from_product([tickers, day_index], names=[TICKER_COL, 'Date'])
+    daily = pd.DataFrame({name: np.asarray(col).ravel() for name, col in columns.items()}, index=grid)
+    daily = daily[daily['mention_weight'] > 0].reset_index()
+    return daily[['Date', TICKER_COL] + list(columns)]
+
+
+def daily_roberta_sentiment(tweets, tickers, sessions=None, sector_path=SECTOR_FILE, split=SPLIT_MENTIONS):
+    """Daily roberta_positive_avg and mention_weight per ticker, plus sector spillover with a sector file.
+
+    Duplicate-weighted when the tweets have dup_weight. save_merged_sentiment.py and
+    incremental_update.py both aggregate through here, so their rows agree.
+    """
+    weight_col = 'dup_weight' if 'dup_weight' in tweets.columns else None
+    sectors, _ = load_sectors(tickers, sector_path)
+    return attribute_sentiment(tweets, 'roberta_positive', 'roberta_positive_avg', tickers, weight_col, split,
+                               sectors, sessions)
@@ -0,0 +1,185 @@
+import hashlib
+import re
+import sqlite3
+
+import numpy as np
+
+# MinHash with NUM_PERM hashes split into BANDS LSH bands; two tweets land in the same
+# bucket with high probability once their shingle Jaccard similarity is above
+# roughly (1 / BANDS) ** (BANDS / NUM_PERM), about 0.77 here
+NUM_PERM = 64
+BANDS = 8
+SHINGLE = 8  # Bytes per shingle, long enough to span word boundaries; each is read as one uint64
+SEED = 42
+
+_URL = re.compile(r'https?://\S+|www\.\S+')
+_CASHTAG = re.compile(r'\$[A-Za-z][A-Za-z0-9.]*')
+_MENTION = re.compile(r'(?:^rt\s+)?@\w+:?')
+
+# SQLite caps the number of bound parameters per statement
+_QUERY_CHUNK = 900
+
+
+def normalize_for_dedup(text):
+    """Lowercased tweet with URLs, cashtags, mentions and the retweet prefix removed."""
+    text = str(text).lower()
+    text = _URL.sub(' ', text)
+    text = _CASHTAG.sub(' ', text)
+    text = _MENTION.sub(' ', text)
+    return ' '.join(text.split())
+
+
+def _text_hash(text):
+    # Signed, so it fits an SQLite INTEGER key
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'little', signed=True)
+
+
+def minhash_signatures(texts, num_perm=NUM_PERM, seed=SEED):
+    """(n, num_perm) uint32 MinHash signatures over byte 8-gram shingles.
+
+    Every shingle of every text is hashed at once: the texts are laid end to end
+    and each 8-byte window is read as one integer, then hashed by `num_perm`
+    multiply-shift functions and reduced to a per-text minimum.
+    """
+    encoded = [t.encode('utf-8').ljust(SHINGLE) for t in texts]
+    lengths = np.fromiter((len(b) for b in encoded), dtype=np.int64, count=len(encoded))
+    data = np.frombuffer(b''.join(encoded), dtype=np.uint8).astype(np.uint64)
+    windows = data[:len(data) - SHINGLE + 1].copy()
+    for k in range(1, SHINGLE):
+        windows |= data[k:len(data) - SHINGLE + 1 + k] << np.uint64(8 * k)
+    # Drop the windows that straddle two texts
+    starts = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+    counts = lengths - SHINGLE + 1
+    valid = np.ones(len(windows), dtype=bool)
+    for k in range(1, SHINGLE):
+        edges = starts[1:] - k
+        valid[edges[edges >= 0]] = False
+    shingles = windows[valid]
+    offsets = np.concatenate([[0], np.cumsum(counts)[:-1]])
+
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | np.uint64(1)
+    b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+    signatures = np.empty((len(texts), num_perm), dtype=np.uint32)
+    with np.errstate(over='ignore'):
+        for i in range(num_perm):
+            hashed = ((a[i] * shingles + b[i]) >> np.uint64(32)).astype(np.uint32)
+            signatures[:, i] = np.minimum.reduceat(hashed, offsets)
+    return signatures
+
+
+def band_keys(signatures, bands=BANDS, seed=SEED):
+    """(n, bands) uint64 bucket keys, one per band of each signature."""
+    rows = signatures.shape[1] // bands
+    mix = np.random.default_rng(seed + 1).integers(1, 2 ** 63, size=rows, dtype=np.uint64) | np.uint64(1)
+    keys = np.empty((len(signatures), bands), dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        for band in range(bands):
+            block = signatures[:, band * rows:(band + 1) * rows].astype(np.uint64)
+            keys[:, band] = (block * mix).sum(axis=1) + np.uint64(band)
+    return keys
+
+
+class TweetDeduplicator:
+    """Streaming duplicate clustering: exact matches on normalized text, then MinHash/LSH.
+
+    Tweets are assigned greedily: a tweet joins the cluster of the first earlier
+    tweet it shares normalized text or an LSH bucket with, otherwise it starts a
+    new cluster. Tweets whose normalized text is empty (only URLs, cashtags and
+    mentions) are never clustered. The state (a 64-bit hash per distinct text,
+    its bucket keys, each cluster's size and, once scored, its scores) lives in
+    SQLite at `path`, so memory stays bounded by the chunk, not the corpus.
+    """
+
+    def __init__(self, path, num_perm=NUM_PERM, bands=BANDS):
+        self.num_perm = num_perm
+        self.bands = bands
+        self.num_clusters = 0
+        self.conn = sqlite3.connect(path)
+        for table, columns in (('texts', 'key INTEGER PRIMARY KEY, cluster INTEGER'),
+                               ('buckets', 'key INTEGER PRIMARY KEY, cluster INTEGER'),
+                               ('clusters', 'key INTEGER PRIMARY KEY, size INTEGER, scores BLOB')):
+            self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self.conn.execute(f"CREATE TABLE {table} ({columns})")
+
+    def _get(self, table, column, keys):
+        found = {}
+        keys = list(keys)
+        for start in range(0, len(keys), _QUERY_CHUNK):
+            chunk = keys[start:start + _QUERY_CHUNK]
+            found.update(self.conn.execute(
+                f"SELECT key, {column} FROM {table} WHERE key IN ({','.join('?' * len(chunk))})", chunk))
+        return found
+
+    def _new_cluster(self):
+        self.num_clusters += 1
+        return self.num_clusters - 1
+
+    def assign(self, texts):
+        """Cluster id for each text, continuing the numbering of earlier calls."""
+        normalized = [normalize_for_dedup(t) for t in texts]
+        hashes = [_text_hash(t) for t in normalized]
+        known = self._get('texts', 'cluster', {h for h, t in zip(hashes, normalized) if t})
+        clusters = np.empty(len(normalized), dtype=np.int64)
+        unseen = {}
+        for i, (text, h) in enumerate(zip(normalized, hashes)):
+            if not text:
+                # Nothing left to compare: unrelated link-only tweets must not share one score
+                clusters[i] = self._new_cluster()
+            elif h in known:
+                clusters[i] = known[h]
+            else:
+                unseen.setdefault(h, (text, []))[1].append(i)
+
+        if unseen:
+            keys = band_keys(minhash_signatures([text for text, _ in unseen.values()], self.num_perm),
+                             self.bands).view(np.int64).tolist()
+            buckets = self._get('buckets', 'cluster', {k for row in keys for k in row})
+            new_buckets, new_texts = [], []
+            for (h, (_, rows)), row in zip(unseen.items(), keys):
+                cluster = next((buckets[k] for k in row if k in buckets), None)
+                if cluster is None:
+                    cluster = self._new_cluster()
+                for k in row:
+                    if k not in buckets:
+                        buckets[k] = cluster
+                        new_buckets.append((k, cluster))
+                new_texts.append((h, cluster))
+                clusters[rows] = cluster
+            self.conn.executemany("INSERT INTO buckets VALUES (?, ?)", new_buckets)
+            self.conn.executemany("INSERT INTO texts VALUES (?, ?)", new_texts)
+
+        ids, counts = np.unique(clusters, return_counts=True)
+        self.conn.executemany("INSERT INTO clusters VALUES (?, ?, NULL) "
+                              "ON CONFLICT(key) DO UPDATE SET size = size + excluded.size",
+                              zip(ids.tolist(), counts.tolist()))
+        self.conn.commit()
+        return clusters
+
+    def sizes(self, clusters):
+        """Corpus-wide size of each cluster in `clusters` (final once every tweet was assigned)."""
+        found = self._get('clusters', 'size', np.unique(clusters).tolist())
+        return np.array([found[c] for c in clusters.tolist()], dtype=np.int64)
+
+    def scores(self, clusters, width):
+        """(n, width) float32 scores stored for each cluster, NaN rows for clusters not scored yet."""
+        found = self._get('clusters', 'scores', np.unique(clusters).tolist())
+        result = np.full((len(clusters), width), np.nan, dtype=np.float32)
+        for i, c in enumerate(clusters.tolist()):
+            if found[c] is not None:
+                result[i] = np.frombuffer(found[c], dtype=np.float32)
+        return result
+
+    def store_scores(self, clusters, scores):
+        scores = np.asarray(scores, dtype=np.float32)
+        self.conn.executemany("UPDATE clusters SET scores = ? WHERE key = ?",
+                              [(row.tobytes(), c) for c, row in zip(clusters.tolist(), scores)
+                               if not np.isnan(row).any()])
+        self.conn.commit()
+
+    def total(self):
+        """(tweets assigned, clusters) so far."""
+        return self.conn.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM clusters").fetchone()
+
+    def close(self):
+        self.conn.close()
@@ -1,13 +1,19 @@
 import pandas as pd
 from sklearn.metrics import mean_absolute_error, mean_squared_error
 import numpy as np
+import os
+import sys
 
-forecast_path = 'outputs/forecasts/roberta_prophet_forecast.csv'
-true_data_path = 'data/processed/merged_sentiment_stock.csv'
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.storage import read_table
+
+forecast_path = 'outputs/forecasts/roberta_prophet_forecast'
+true_data_path = 'data/processed/merged_sentiment_stock'
+TICKER = 'TSLA'  # Must match roberta_sentiment_forecast.py
 
 print("Loading data...")
-forecast = pd.read_csv(forecast_path)
-truth = pd.read_csv(true_data_path)
+forecast = read_table(forecast_path, columns=['ds', 'yhat'], date_col='ds')
+truth = read_table(true_data_path, columns=['Date', 'Close_norm'], tickers=[TICKER])
 
 # Match overlapping dates
 merged = pd.merge(forecast, truth, left_on='ds', right_on='Date')
@@ -1,14 +1,19 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
+import sys
 
-forecast_file = 'outputs/forecasts/roberta_prophet_forecast.csv'
-truth_file = 'data/processed/merged_sentiment_stock.csv'
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.storage import read_table
+
+forecast_file = 'outputs/forecasts/roberta_prophet_forecast'
+truth_file = 'data/processed/merged_sentiment_stock'
 output_file = 'outputs/charts/actual_vs_predicted_roberta.png'
+TICKER = 'TSLA'  # Must match roberta_sentiment_forecast.py
 
 print("Loading data...")
-forecast = pd.read_csv(forecast_file)
-truth = pd.read_csv(truth_file)
+forecast = read_table(forecast_file, date_col='ds')
+truth = read_table(truth_file, columns=['Date', 'Close_norm'], tickers=[TICKER])
 
 df = pd.merge(forecast, truth, left_on='ds', right_on='Date')
 
@@ -18,7 +23,7 @@ plt.figure(figsize=(10, 5))
 plt.plot(df['ds'], df['Close_norm'], label='Actual', color='blue')
 plt.plot(df['ds'], df['yhat'], label='Predicted', color='orange')
 plt.fill_between(df['ds'], df['yhat_lower'], df['yhat_upper'], color='orange', alpha=0.3)
-plt.title("Actual vs Predicted (RoBERTa + Prophet)")
+plt.title(f"Actual vs Predicted (RoBERTa + Prophet) - {TICKER}")
 plt.xlabel("Date")
 plt.ylabel("Normalized Price")
 plt.legend()
@@ -0,0 +1,258 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import torch
+import transformers
+from transformers import AutoConfig, AutoTokenizer, AutoModelForSequenceClassification
+
+MODEL_NAME = "cardiffnlp/twitter-roberta-base-sentiment"
+LABELS = ['negative', 'neutral', 'positive']
+SCORE_COLUMNS = [f"roberta_{l}" for l in LABELS]
+
+# Inference backends:
+#   torch        fp32 eager PyTorch (the reference)
+#   torch-int8   Linear layers dynamically quantized to int8 at load time
+#   onnx         graph exported once to ARTIFACT_DIR, run by ONNX Runtime
+#   onnx-int8    the exported graph with int8 weights
+BACKENDS = ['torch', 'torch-int8', 'onnx', 'onnx-int8']
+ARTIFACT_DIR = 'models/roberta'
+ONNX_OPSET = 17
+
+
+def model_revision(model_name=MODEL_NAME):
+    # Hub snapshots carry a commit hash; local checkouts fall back to the transformers version
+    config = AutoConfig.from_pretrained(model_name)
+    return getattr(config, '_commit_hash', None) or f"local-transformers-{transformers.__version__}"
+
+
+def artifact_path(model_name, backend):
+    name = os.path.basename(model_name.rstrip('/'))
+    return os.path.join(ARTIFACT_DIR, f"{name}-{model_revision(model_name)[:12]}-{backend}.onnx")
+
+
+class _LogitsOnly(torch.nn.Module):
+    # Plain tensor output keeps the exported graph free of HF output classes
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        return self.model(input_ids=input_ids, attention_mask=attention_mask).logits
+
+
+def export_onnx(model_name, backend='onnx'):
+    """Path of the ONNX artifact for `backend`, exporting (and quantizing) it on first use."""
+    path = artifact_path(model_name, backend)
+    if os.path.exists(path):
+        return path
+    os.makedirs(ARTIFACT_DIR, exist_ok=True)
+    # Written under a temporary name, so a concurrent worker never loads a half-written file
+    tmp = f"{path}.{os.getpid()}.tmp"
+    if backend == 'onnx-int8':
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(export_onnx(model_name, 'onnx'), tmp, weight_type=QuantType.QInt8)
+    else:
+        model = AutoModelForSequenceClassification.from_pretrained(model_name).eval()
+        example = AutoTokenizer.from_pretrained(model_name)(["an example tweet"], return_tensors='pt')
+        axes = {0: 'batch', 1: 'sequence'}
+        torch.onnx.export(_LogitsOnly(model), (example['input_ids'], example['attention_mask']), tmp,
+                          input_names=['input_ids', 'attention_mask'], output_names=['logits'],
+                          dynamic_axes={'input_ids': axes, 'attention_mask': axes, 'logits': {0: 'batch'}},
+                          opset_version=ONNX_OPSET, dynamo=False)
+    os.replace(tmp, path)
+    return path
+
+
+class TorchBackend:
+    """Eager PyTorch model; with `quantize`, its Linear layers run as dynamic int8."""
+
+    def __init__(self, model, quantize=False):
+        model.eval()
+        if quantize:
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model
+
+    def __call__(self, input_ids, attention_mask):
+        with torch.inference_mode():
+            return self.model(input_ids=input_ids, attention_mask=attention_mask).logits.float()
+
+
+class OnnxBackend:
+    """ONNX Runtime session over an exported graph."""
+
+    def __init__(self, path, num_threads=None):
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+
+    def __call__(self, input_ids, attention_mask):
+        logits, = self.session.run(['logits'], {'input_ids': input_ids.numpy(),
+                                                'attention_mask': attention_mask.numpy()})
+        return torch.from_numpy(logits)
+
+
+def load_backend(model_name, backend='torch', num_threads=None):
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}; expected one of {BACKENDS}")
+    if backend.startswith('onnx'):
+        return OnnxBackend(export_onnx(model_name, backend), num_threads)
+    model = AutoModelForSequenceClassification.from_pretrained(model_name)
+    return TorchBackend(model, quantize=backend == 'torch-int8')
+
+
+class RobertaScorer:
+    """Batched RoBERTa sentiment scorer with dynamic padding and length bucketing."""
+
+    def __init__(self, model_name=MODEL_NAME, batch_size=64, max_length=512, num_threads=None, backend='torch'):
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.backend = load_backend(model_name, backend, num_threads)
+
+    def _length_buckets(self, input_ids):
+        # Sorting by token length keeps padding inside each batch minimal
+        lengths = np.fromiter((len(ids) for ids in input_ids), dtype=np.int64, count=len(input_ids))
+        order = np.argsort(lengths, kind='stable')
+        for start in range(0, len(order), self.batch_size):
+            yield order[start:start + self.batch_size]
+
+    def score(self, texts):
+        texts = [str(t) for t in texts]
+        scores = np.full((len(texts), len(LABELS)), np.nan, dtype=np.float32)
+        if not texts:
+            return scores
+
+        encoded = self.tokenizer(texts, truncation=True, max_length=self.max_length)
+        input_ids = encoded['input_ids']
+        attention_mask = encoded['attention_mask']
+
+        for idx in self._length_buckets(input_ids):
+            batch = self.tokenizer.pad(
+                {'input_ids': [input_ids[i] for i in idx],
+                 'attention_mask': [attention_mask[i] for i in idx]},
+                return_tensors='pt'
+            )
+            try:
+                logits = self.backend(batch['input_ids'], batch['attention_mask'])
+                scores[idx] = torch.softmax(logits, dim=-1).numpy()
+            except RuntimeError as e:
+                print(f"Error processing batch of {len(idx)} tweets: {e}")
+        return scores
+
+
+# One scorer per worker process, created by the pool initializer
+_worker_scorer = None
+
+
+def _init_worker(model_name, batch_size, max_length, num_threads, backend):
+    global _worker_scorer
+    _worker_scorer = RobertaScorer(model_name, batch_size, max_length, num_threads, backend)
+
+
+def _score_shard(texts):
+    return _worker_scorer.score(texts)
+
+
+class ScoringEngine:
+    """Long-lived scorer: in-process, or a pool of `num_workers` processes when it is > 1.
+
+    The model (or worker pool) is only loaded on the first call to `score`, so
+    runs that are fully served from the score cache never touch torch.
+    """
+
+    def __init__(self, model_name=MODEL_NAME, batch_size=64, max_length=512,
+                 num_threads=None, num_workers=1, shard_size=4096, backend='torch'):
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.num_threads = num_threads
+        self.num_workers = num_workers
+        self.shard_size = shard_size
+        self._scorer = None
+        self._pool = None
+
+    def _start(self):
+        if self.num_workers <= 1:
+            self._scorer = RobertaScorer(self.model_name, self.batch_size, self.max_length, self.num_threads,
+                                         self.backend)
+            return
+        if self.backend.startswith('onnx'):
+            # Export once here rather than in every worker
+            export_onnx(self.model_name, self.backend)
+        # Split the intra-op thread budget between workers so they don't oversubscribe cores
+        threads_per_worker = self.num_threads or max(1, (os.cpu_count() or 1) // self.num_workers)
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.num_workers, initializer=_init_worker,
+            initargs=(self.model_name, self.batch_size, self.max_length, threads_per_worker, self.backend)
+        )
+
+    def score(self, texts):
+        """Return an (n, 3) float32 array of negative/neutral/positive probabilities.
+
+        Rows of batches that failed are NaN.
+        """
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, len(LABELS)), dtype=np.float32)
+        if self._scorer is None and self._pool is None:
+            self._start()
+        if self._scorer is not None:
+            return self._scorer.score(texts)
+        shards = [texts[i:i + self.shard_size] for i in range(0, len(texts), self.shard_size)]
+        return np.vstack(list(self._pool.map(_score_shard, shards)))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def score_texts(texts, model_name=MODEL_NAME, batch_size=64, max_length=512,
+                num_threads=None, num_workers=1, shard_size=4096, backend='torch'):
+    """One-shot helper around `ScoringEngine`."""
+    with ScoringEngine(model_name, batch_size, max_length, num_threads, num_workers, shard_size,
+                       backend) as engine:
+        return engine.score(texts)
+
+
+def parity_check(texts, backend, model_name=MODEL_NAME, batch_size=64, num_threads=None):
+    """Score `texts` with the fp32 reference and with `backend`, and report how far they drift.
+
+    Scores are compared per probability column; labels are the argmax class.
+    """
+    texts = [str(t) for t in texts]
+    if not texts:
+        raise ValueError("parity_check needs at least one text")
+    timings, scores = {}, {}
+    for name in ('torch', backend):
+        scorer = RobertaScorer(model_name, batch_size, num_threads=num_threads, backend=name)
+        scorer.score(texts[:batch_size])  # Warm-up, so one-time allocation isn't timed
+        start = time.perf_counter()
+        scores[name] = scorer.score(texts)
+        timings[name] = time.perf_counter() - start
+    reference, candidate = scores['torch'], scores[backend]
+    drift = np.abs(candidate - reference)
+    return {
+        'model': model_name, 'backend': backend, 'samples': len(texts),
+        'max_abs_drift': float(np.nanmax(drift)),
+        'mean_abs_drift': float(np.nanmean(drift)),
+        'max_abs_drift_by_label': dict(zip(LABELS, np.nanmax(drift, axis=0).tolist())),
+        'label_agreement': float(np.mean(reference.argmax(axis=1) == candidate.argmax(axis=1))),
+        'fp32_tweets_per_sec': len(texts) / timings['torch'],
+        'backend_tweets_per_sec': len(texts) / timings[backend],
+        'speedup': timings['torch'] / timings[backend],
+    }
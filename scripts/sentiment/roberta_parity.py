@@ -0,0 +1,52 @@
+import argparse
+import json
+import os
+
+import pandas as pd
+
+from roberta_engine import BACKENDS, MODEL_NAME, parity_check
+from tweet_stream import iter_tweet_chunks
+
+# Compares a faster backend against the fp32 PyTorch model on a sample of real tweets:
+#   python scripts/sentiment/roberta_parity.py --backend onnx-int8 --sample 2000
+INPUT_FILE = 'data/raw/stock_tweets.csv'
+OUTPUT_FILE = 'outputs/sentiment/roberta_parity.json'
+SAMPLE = 1000
+SEED = 42
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report score drift and speedup of a RoBERTa backend vs fp32.")
+    parser.add_argument('--backend', choices=BACKENDS[1:], default='onnx-int8')
+    parser.add_argument('--sample', type=int, default=SAMPLE, help="tweets to score with both backends")
+    parser.add_argument('--input', default=INPUT_FILE)
+    parser.add_argument('--model', default=MODEL_NAME)
+    parser.add_argument('--batch-size', type=int, default=64)
+    parser.add_argument('--threads', type=int, default=None)
+    args = parser.parse_args()
+
+    print(f"Sampling {args.sample} tweets from {args.input}...")
+    tweets = pd.concat(chunk['Tweet'] for chunk in iter_tweet_chunks(args.input))
+    texts = tweets.sample(min(args.sample, len(tweets)), random_state=SEED).tolist()
+
+    print(f"Scoring with fp32 torch and {args.backend}...")
+    report = parity_check(texts, args.backend, args.model, args.batch_size, args.threads)
+    print(f" Max abs score drift:  {report['max_abs_drift']:.5f} (mean {report['mean_abs_drift']:.5f})")
+    print(f" Label agreement:      {report['label_agreement']:.2%}")
+    print(f" Throughput:           {report['fp32_tweets_per_sec']:.1f} -> {report['backend_tweets_per_sec']:.1f} "
+          f"tweets/sec ({report['speedup']:.2f}x)")
+
+    # One entry per backend, so reports for different backends sit side by side
+    reports = {}
+    if os.path.exists(OUTPUT_FILE):
+        with open(OUTPUT_FILE) as f:
+            reports = json.load(f)
+    reports[args.backend] = report
+    os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
+    with open(OUTPUT_FILE, 'w') as f:
+        json.dump(reports, f, indent=2)
+    print(f" Report saved to {OUTPUT_FILE}")
+
+
+if __name__ == '__main__':
+    main()
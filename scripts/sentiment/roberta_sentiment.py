@@ -1,56 +1,116 @@
+import numpy as np
 import pandas as pd
-import torch
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
-from scipy.special import softmax
-from tqdm import tqdm
+import time
 import os
+import sys
+
+from dedup import TweetDeduplicator
+from roberta_engine import MODEL_NAME, SCORE_COLUMNS, ScoringEngine, model_revision
+from score_cache import CACHE_DIR, ScoreCache
+from tweet_stream import TICKER_COL, DailyAggregator, iter_tweet_chunks
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.market_calendar import load_sessions
+from common.storage import ChunkedTableWriter, write_table
+from common.telemetry import count, span
 
 # Setup
 INPUT_FILE = 'data/raw/stock_tweets.csv'
-OUTPUT_FILE = 'data/processed/roberta_sentiment_10k.csv'
-MAX_TWEETS = 10000
-
-print("Loading tweet data...")
-df = pd.read_csv(INPUT_FILE).dropna(subset=['Tweet'])
-df = df.head(MAX_TWEETS).copy()
-df['Tweet'] = df['Tweet'].astype(str)
-
-print(f"Using {len(df)} tweets for RoBERTa sentiment analysis")
-
-# Load RoBERTa model from Hugging Face
-MODEL_NAME = "cardiffnlp/twitter-roberta-base-sentiment"
-print(f"Loading model: {MODEL_NAME}")
-tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME)
-model = AutoModelForSequenceClassification.from_pretrained(MODEL_NAME)
-
-# Label mapping
-labels = ['negative', 'neutral', 'positive']
-
-# Sentiment function
-def get_roberta_sentiment(text):
-    encoded = tokenizer(text, return_tensors='pt', truncation=True, max_length=512)
-    with torch.no_grad():
-        output = model(**encoded)
-    scores = output.logits.detach().numpy()[0]
-    scores = softmax(scores)
-    return scores
-
-# Analyze with tqdm progress bar
-print("Scoring tweets...")
-sentiments = []
-for tweet in tqdm(df['Tweet'], desc="Analyzing"):
-    try:
-        scores = get_roberta_sentiment(tweet)
-        sentiments.append(scores)
-    except Exception as e:
-        sentiments.append([None, None, None])
-        print(f"Error processing tweet: {e}")
-
-# Attach scores
-scores_df = pd.DataFrame(sentiments, columns=[f"roberta_{l}" for l in labels])
-result_df = pd.concat([df[['Date', 'Tweet']], scores_df], axis=1)
-
-# Save
-os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-result_df.to_csv(OUTPUT_FILE, index=False)
-print(f" Saved RoBERTa sentiment scores to {OUTPUT_FILE}")
+OUTPUT_FILE = 'data/processed/roberta_sentiment_10k'  # Parquet, partitioned by month
+DAILY_OUTPUT_FILE = 'data/processed/roberta_sentiment_daily'
+STOCK_FILE = 'data/raw/stock_yfinance_data.csv'  # Its trading days align the daily file to sessions
+MAX_TWEETS = None  # None scores the full corpus
+CHUNK_SIZE = 20000  # Tweets held in memory at once
+CACHE_FILE = os.path.join(CACHE_DIR, 'roberta_scores.sqlite')
+DEDUP_FILE = os.path.join(CACHE_DIR, 'roberta_dedup.sqlite')        # Rebuilt by every run
+CLUSTER_FILE = os.path.join(CACHE_DIR, 'roberta_dedup_clusters.bin')  # Each tweet's cluster id, int64
+DEDUP = True  # Score one tweet per exact/near-duplicate cluster and weight members by 1 / cluster size
+
+# Inference settings
+BATCH_SIZE = 64
+NUM_THREADS = None  # Intra-op threads; None lets torch decide
+NUM_WORKERS = 1     # >1 shards tweets across worker processes
+BACKEND = 'torch'   # See roberta_engine.BACKENDS; check drift first with roberta_parity.py
+
+
+def cluster_tweets(dedup):
+    """Assign every tweet a duplicate cluster, spilling the ids to CLUSTER_FILE in tweet order."""
+    with span('dedup') as s, open(CLUSTER_FILE, 'wb') as f:
+        for chunk in iter_tweet_chunks(INPUT_FILE, CHUNK_SIZE, MAX_TWEETS, columns=['Tweet']):
+            dedup.assign(chunk['Tweet']).tofile(f)
+        total, num_clusters = dedup.total()
+        s.set(rows=total)
+    return total, num_clusters
+
+
+def main():
+    if DEDUP:
+        # A first pass over the text alone, so every tweet's weight reflects its whole cluster
+        print(f"Clustering duplicate tweets in {INPUT_FILE}...")
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        dedup = TweetDeduplicator(DEDUP_FILE)
+        total, num_clusters = cluster_tweets(dedup)
+        print(f" {total} tweets form {num_clusters} clusters ({1 - num_clusters / max(total, 1):.1%} fewer to score)")
+        count('dedup_clusters', num_clusters)
+        cluster_ids = open(CLUSTER_FILE, 'rb')
+
+    # Only tweets missing from the score cache reach the model
+    cache = ScoreCache(CACHE_FILE, MODEL_NAME, model_revision(MODEL_NAME), SCORE_COLUMNS, backend=BACKEND)
+    engine = ScoringEngine(MODEL_NAME, batch_size=BATCH_SIZE, num_threads=NUM_THREADS, num_workers=NUM_WORKERS,
+                           backend=BACKEND)
+    # Daily rows are trading sessions when the price file is there, else UTC calendar days
+    sessions = load_sessions(STOCK_FILE) if os.path.exists(STOCK_FILE) else None
+    daily = DailyAggregator(SCORE_COLUMNS, weight_col='dup_weight' if DEDUP else None, sessions=sessions)
+
+    print(f"Streaming tweets from {INPUT_FILE} in chunks of {CHUNK_SIZE}...")
+    print(f"Scoring with {MODEL_NAME} (batch size {BATCH_SIZE}, {NUM_WORKERS} worker(s), {BACKEND} backend)")
+    start = time.perf_counter()
+    with engine, ChunkedTableWriter(OUTPUT_FILE, partition_cols=('month',)) as writer:
+        for i, chunk in enumerate(iter_tweet_chunks(INPUT_FILE, CHUNK_SIZE, MAX_TWEETS)):
+            with span('score', model=MODEL_NAME, rows=len(chunk)):
+                if DEDUP:
+                    # Score each cluster's first tweet once; every member gets its scores
+                    ids = np.fromfile(cluster_ids, dtype=np.int64, count=len(chunk))
+                    scores = dedup.scores(ids, len(SCORE_COLUMNS))
+                    todo, first = np.unique(ids[np.isnan(scores[:, 0])], return_index=True)
+                    if len(todo):
+                        first = np.flatnonzero(np.isnan(scores[:, 0]))[first]
+                        rep_scores = cache.score(chunk['Tweet'].iloc[first], engine.score)
+                        dedup.store_scores(todo, rep_scores)
+                        scores = dedup.scores(ids, len(SCORE_COLUMNS))
+                else:
+                    scores = cache.score(chunk['Tweet'], engine.score)
+
+            # Attach scores
+            keep = ['Date'] + ([TICKER_COL] if TICKER_COL in chunk.columns else []) + ['Tweet']
+            result_df = pd.concat([chunk[keep], pd.DataFrame(scores, columns=SCORE_COLUMNS)], axis=1)
+            if DEDUP:
+                result_df['dup_cluster'] = ids
+                result_df['dup_count'] = dedup.sizes(ids)
+                result_df['dup_weight'] = 1.0 / result_df['dup_count']
+
+            writer.write(result_df)
+            with span('aggregate', rows=len(result_df)):
+                daily.update(result_df)
+            print(f"  chunk {i + 1}: {writer.rows} tweets scored so far")
+    elapsed = time.perf_counter() - start
+    print(cache.summary())
+    count('score_cache_hits', cache.hits)
+    count('score_cache_misses', cache.misses)
+    count('roberta_model_scored', cache.scored)
+    cache.close()
+    if DEDUP:
+        cluster_ids.close()
+        dedup.close()
+
+    # Daily file is emitted once all chunks are folded in
+    write_table(daily.to_frame(), DAILY_OUTPUT_FILE)
+
+    print(f" Processed {writer.rows} tweets ({cache.scored} scored by the model) in {elapsed:.1f}s "
+          f"({writer.rows / max(elapsed, 1e-9):.1f} tweets/sec)")
+    print(f" Saved RoBERTa sentiment scores to {OUTPUT_FILE}")
+    print(f" Saved daily RoBERTa sentiment to {DAILY_OUTPUT_FILE}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,39 +1,43 @@
 import pandas as pd
-from prophet import Prophet
 import matplotlib.pyplot as plt
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.prophet_fit import fit_series
+from common.storage import read_table, write_table
+from common.telemetry import span
 
 # File paths
-INPUT_FILE = 'data/processed/merged_sentiment_stock.csv'
-FORECAST_OUTPUT = 'outputs/forecasts/roberta_prophet_forecast.csv'
+INPUT_FILE = 'data/processed/merged_sentiment_stock'
+FORECAST_OUTPUT = 'outputs/forecasts/roberta_prophet_forecast'
 PLOT_OUTPUT = 'outputs/charts/roberta_prophet_forecast_plot.png'
+TICKER = 'TSLA'  # forecast_all_tickers.py covers the full panel
+MODEL_NAME = f"prophet_roberta/{TICKER}"  # Shared with forecast_all_tickers.py
+REGRESSOR = 'Sentiment_norm'
 
 print("Loading merged data...")
-df = pd.read_csv(INPUT_FILE)
+df = read_table(INPUT_FILE, columns=['Date', 'Close_norm', 'Sentiment_norm'], tickers=[TICKER])
 df['ds'] = pd.to_datetime(df['Date'])
 df['y'] = df['Close_norm']  # Target variable
 
-# Prophet setup
-print("Initializing Prophet model with sentiment regressor...")
-model = Prophet()
-model.add_regressor('Sentiment_norm')
-
-# Fit model
-print("Training model...")
-model.fit(df[['ds', 'y', 'Sentiment_norm']])
+# Reuse the registered model when the history is unchanged; otherwise warm-start from it
+print("Training Prophet model with sentiment regressor...")
+model, how = fit_series(MODEL_NAME, df, [REGRESSOR])
+print(f" {MODEL_NAME}: {how}")
 
 # Create future DataFrame
 print("Creating future dataframe...")
 future = model.make_future_dataframe(periods=30)
-future['Sentiment_norm'] = df['Sentiment_norm'].iloc[-1]  # Fill with last known value
+future[REGRESSOR] = df[REGRESSOR].iloc[-1]  # Fill with last known value
 
 # Forecast
 print("Generating forecast...")
-forecast = model.predict(future)
+with span('predict', model=MODEL_NAME, rows=len(future)):
+    forecast = model.predict(future)
 
 # Save forecast
-os.makedirs(os.path.dirname(FORECAST_OUTPUT), exist_ok=True)
-forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']].to_csv(FORECAST_OUTPUT, index=False)
+write_table(forecast[['ds', 'yhat', 'yhat_lower', 'yhat_upper']], FORECAST_OUTPUT, date_col='ds')
 
 # Plot using matplotlib
 print("Plotting and saving with Matplotlib...")
@@ -41,7 +45,7 @@ fig, ax = plt.subplots(figsize=(10, 5))
 ax.plot(df['ds'], df['y'], label='Actual', color='blue')
 ax.plot(forecast['ds'], forecast['yhat'], label='Forecast', color='orange')
 ax.fill_between(forecast['ds'], forecast['yhat_lower'], forecast['yhat_upper'], color='orange', alpha=0.3)
-ax.set_title("Prophet Forecast with RoBERTa Sentiment")
+ax.set_title(f"Prophet Forecast with RoBERTa Sentiment - {TICKER}")
 ax.set_xlabel("Date")
 ax.set_ylabel("Normalized Price")
 ax.legend()
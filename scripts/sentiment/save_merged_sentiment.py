@@ -1,34 +1,48 @@
-import pandas as pd
 import os
-from sklearn.preprocessing import MinMaxScaler
+import sys
 
-SENTIMENT_FILE = 'data/processed/roberta_sentiment_10k.csv'
+from attribution import SECTOR_FILE, TWEET_COLUMNS, daily_roberta_sentiment
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.market_calendar import trading_sessions
+from common.panel import load_prices, merge_panel, normalize_per_ticker
+from common.storage import read_table, table_columns, write_table
+
+SENTIMENT_FILE = 'data/processed/roberta_sentiment_10k'
 STOCK_FILE = 'data/raw/stock_yfinance_data.csv'
-OUTPUT_FILE = 'data/processed/merged_sentiment_stock.csv'
+OUTPUT_FILE = 'data/processed/merged_sentiment_stock'
+ATTRIBUTION_FILE = 'data/processed/sentiment_attribution'  # Mention weights and sector spillover
+
+print("Loading stock data...")
+stock_df = load_prices(STOCK_FILE)
+tickers = sorted(stock_df['Stock Name'].unique())
+# The price file's trading days are the calendar tweets are aligned to
+sessions = trading_sessions(stock_df['Date'])
 
 print("Loading sentiment data...")
-sentiment_df = pd.read_csv(SENTIMENT_FILE)
-sentiment_df['Date'] = pd.to_datetime(sentiment_df['Date']).dt.date
+# Only the keys, the text (for its cashtags), the positive score and the duplicate weight are needed
+sentiment_df = read_table(SENTIMENT_FILE, columns=[c for c in table_columns(SENTIMENT_FILE) if c in TWEET_COLUMNS])
 
-print("Aggregating daily RoBERTa positive sentiment...")
-daily_sentiment = sentiment_df.groupby('Date')['roberta_positive'].mean().reset_index()
-daily_sentiment.columns = ['Date', 'roberta_positive_avg']
+print("Attributing RoBERTa positive sentiment to every cashtagged ticker, per trading session...")
+# Duplicate-weighted when roberta_sentiment.py clustered the tweets, so spam floods count once
+daily = daily_roberta_sentiment(sentiment_df, tickers, sessions)
+has_sectors = 'sector_roberta_positive_avg' in daily.columns
+if has_sectors:
+    print(f" Sector spillover from {SECTOR_FILE}")
 
-print("Loading stock data...")
-stock_df = pd.read_csv(STOCK_FILE)
-stock_df['Date'] = pd.to_datetime(stock_df['Date']).dt.date
-stock_df = stock_df[['Date', 'Close']]  # Keep only needed columns
+print("Merging datasets on (Stock Name, Date)...")
+merged = merge_panel(stock_df, daily)
 
-print("Merging datasets on Date...")
-merged = pd.merge(stock_df, daily_sentiment, on='Date', how='inner')
+print("Normalizing columns per ticker for modeling...")
+merged = normalize_per_ticker(merged, ['Close', 'roberta_positive_avg'], ['Close_norm', 'Sentiment_norm'])
+if has_sectors:
+    merged = normalize_per_ticker(merged, ['sector_roberta_positive_avg'], ['Sector_Sentiment_norm'])
 
-print("Normalizing columns for modeling...")
-scaler = MinMaxScaler()
-merged[['Close_norm', 'Sentiment_norm']] = scaler.fit_transform(
-    merged[['Close', 'roberta_positive_avg']]
-)
+# The attribution columns get their own table, so the merged panel and every table derived from it keep their schema
+extra = [c for c in ('mention_weight', 'sector_roberta_positive_avg', 'Sector_Sentiment_norm') if c in merged.columns]
 
 # Save output
-os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-merged.to_csv(OUTPUT_FILE, index=False)
-print(f" Saved merged and normalized data to {OUTPUT_FILE}")
+write_table(merged.drop(columns=extra), OUTPUT_FILE)
+write_table(merged[['Date', 'Stock Name'] + extra], ATTRIBUTION_FILE)
+print(f" Saved merged and normalized data for {merged['Stock Name'].nunique()} tickers to {OUTPUT_FILE}")
+print(f" Mention weights and sector sentiment saved to {ATTRIBUTION_FILE}")
@@ -0,0 +1,136 @@
+import hashlib
+import os
+import sqlite3
+import unicodedata
+
+import numpy as np
+
+CACHE_DIR = 'data/cache'
+
+# SQLite caps the number of bound parameters per statement
+_QUERY_CHUNK = 900
+
+
+def normalize_text(text):
+    # Only whitespace/unicode-form changes: anything else could change the model's score
+    return ' '.join(unicodedata.normalize('NFKC', str(text)).split())
+
+
+class ScoreCache:
+    """Persistent per-tweet score cache keyed by hash(model, revision, backend, normalized text).
+
+    Rows live in one SQLite file, in a table per namespace (model, revision,
+    backend, score layout), so switching backend keeps the other backends'
+    scores. A namespace's rows are dropped once the same file is opened for a
+    different model name or revision.
+    """
+
+    def __init__(self, path, model_name, model_revision, columns, dtype=np.float32, backend=None):
+        self.path = path
+        self.columns = list(columns)
+        self.dtype = np.dtype(dtype)
+        # Non-default backends' scores drift slightly from eager fp32, so each gets its own namespace
+        variant = '' if backend in (None, 'torch') else f"+{backend}"
+        self.namespace = f"{model_name}@{model_revision}{variant}:{','.join(self.columns)}:{self.dtype.str}"
+        self.table = f"scores_{hashlib.blake2b(self.namespace.encode('utf-8'), digest_size=8).hexdigest()}"
+        self.hits = 0
+        self.misses = 0
+        self.scored = 0  # Texts actually sent to score_fn: misses minus repeats within a call
+        self.bytes_saved = 0
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS namespaces "
+                          "(name TEXT PRIMARY KEY, model TEXT, revision TEXT, tbl TEXT)")
+        self._migrate()
+        stale = self.conn.execute("SELECT name, tbl FROM namespaces WHERE model != ? OR revision != ?",
+                                  (model_name, model_revision)).fetchall()
+        for name, table in stale:
+            print(f"Score cache {path} has scores for {name}; invalidating them")
+            self.conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self.conn.execute("DELETE FROM namespaces WHERE name = ?", (name,))
+        self.conn.execute(f"CREATE TABLE IF NOT EXISTS {self.table} (key BLOB PRIMARY KEY, scores BLOB) WITHOUT ROWID")
+        self.conn.execute("INSERT OR IGNORE INTO namespaces VALUES (?, ?, ?, ?)",
+                          (self.namespace, model_name, model_revision, self.table))
+        self.conn.commit()
+
+    def _migrate(self):
+        # Files from before namespaced tables hold one `scores` table; keep it when it is this namespace's
+        tables = {name for (name,) in self.conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if 'meta' not in tables:
+            return
+        row = self.conn.execute("SELECT value FROM meta WHERE name = 'namespace'").fetchone()
+        if 'scores' in tables:
+            if row is not None and row[0] == self.namespace:
+                self.conn.execute(f"ALTER TABLE scores RENAME TO {self.table}")
+            else:
+                self.conn.execute("DROP TABLE scores")
+        self.conn.execute("DROP TABLE meta")
+
+    def key(self, text):
+        payload = f"{self.namespace}\x00{normalize_text(text)}".encode('utf-8')
+        return hashlib.blake2b(payload, digest_size=16).digest()
+
+    def _lookup(self, keys):
+        found = {}
+        for start in range(0, len(keys), _QUERY_CHUNK):
+            chunk = keys[start:start + _QUERY_CHUNK]
+            placeholders = ','.join('?' * len(chunk))
+            for key, blob in self.conn.execute(
+                    f"SELECT key, scores FROM {self.table} WHERE key IN ({placeholders})", chunk):
+                found[key] = np.frombuffer(blob, dtype=self.dtype)
+        return found
+
+    def _store(self, keys, scores):
+        scores = np.asarray(scores, dtype=self.dtype)
+        rows = [(key, row.tobytes()) for key, row in zip(keys, scores) if not np.isnan(row).any()]
+        self.conn.executemany(f"INSERT OR REPLACE INTO {self.table} VALUES (?, ?)", rows)
+        self.conn.commit()
+
+    def score(self, texts, score_fn):
+        """Return an (n, len(columns)) array, calling `score_fn` only on uncached texts.
+
+        `score_fn` takes a list of texts and returns an array of matching shape.
+        Failed (NaN) scores are returned but never cached.
+        """
+        texts = [str(t) for t in texts]
+        result, pending = self.lookup(texts)
+        if pending:
+            # Identical texts within the run are scored once
+            new_keys = list(pending)
+            new_scores = np.asarray(score_fn([texts[pending[k][0]] for k in new_keys]), dtype=self.dtype)
+            new_scores = new_scores.reshape(len(new_keys), len(self.columns))
+            self.scored += len(new_keys)
+            for key, row in zip(new_keys, new_scores):
+                result[pending[key]] = row
+            self._store(new_keys, new_scores)
+        return result
+
+    def lookup(self, texts):
+        """(scores with NaN rows for uncached texts, {key: row positions} of the uncached ones)."""
+        keys = [self.key(t) for t in texts]
+        cached = self._lookup(list(set(keys)))
+        result = np.full((len(texts), len(self.columns)), np.nan, dtype=self.dtype)
+        pending = {}
+        for i, (key, text) in enumerate(zip(keys, texts)):
+            if key in cached:
+                result[i] = cached[key]
+                self.hits += 1
+                self.bytes_saved += len(text.encode('utf-8'))
+            else:
+                pending.setdefault(key, []).append(i)
+                self.misses += 1
+        return result, pending
+
+    def store(self, texts, scores):
+        """Cache scores computed outside score(), e.g. by a pass that also aggregates them."""
+        self._store([self.key(str(t)) for t in texts], scores)
+
+    def summary(self):
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return (f"Score cache: {self.hits} hits, {self.misses} misses ({rate:.1%} hit rate), "
+                f"{self.bytes_saved / 1e6:.2f} MB of tweet text not re-scored")
+
+    def close(self):
+        self.conn.close()
@@ -1,28 +1,81 @@
-import pandas as pd
+import argparse
 import os
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
-import nltk
-nltk.download('vader_lexicon')
+import sys
+import time
 
-# Load tweets
+import numpy as np
+
+from score_cache import CACHE_DIR, ScoreCache
+from tweet_stream import TICKER_COL, DailyAggregator, iter_tweet_chunks
+from vader_engine import SCORE_COLUMNS, VaderEngine
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.market_calendar import load_sessions
+from common.storage import write_table
+from common.telemetry import count, span
+
+# Setup
 INPUT_FILE = 'data/raw/stock_tweets.csv'
-OUTPUT_FILE = 'data/processed/vader_sentiment_daily.csv'
+OUTPUT_FILE = 'data/processed/vader_sentiment_daily'
+STOCK_FILE = 'data/raw/stock_yfinance_data.csv'  # Its trading days align the daily file to sessions
+CACHE_FILE = os.path.join(CACHE_DIR, 'vader_scores.sqlite')
+CHUNK_SIZE = 20000  # Tweets held in memory at once
+SHARD_SIZE = 5000   # Tweets per worker task
+NUM_WORKERS = None  # None uses every core
+LEXICON_FILE = None  # None: $STOCKCAST_VADER_LEXICON, data/external/vader_lexicon.txt, then nltk_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score every tweet with VADER and aggregate per ticker and day.")
+    parser.add_argument('--input', default=INPUT_FILE)
+    parser.add_argument('--lexicon', default=LEXICON_FILE, help="path to vader_lexicon.txt")
+    parser.add_argument('--workers', type=int, default=NUM_WORKERS)
+    parser.add_argument('--no-cache', action='store_true', help="score every tweet, skipping the score cache")
+    args = parser.parse_args()
 
-df = pd.read_csv(INPUT_FILE)
-df['Date'] = pd.to_datetime(df['Date']).dt.date  # Truncate to date only
+    # Daily rows are trading sessions when the price file is there, else UTC calendar days
+    sessions = load_sessions(STOCK_FILE) if os.path.exists(STOCK_FILE) else None
+    engine = VaderEngine(args.lexicon, num_workers=args.workers, shard_size=SHARD_SIZE, sessions=sessions)
+    cache = None if args.no_cache else ScoreCache(CACHE_FILE, 'vader', engine.revision, SCORE_COLUMNS)
+    daily = DailyAggregator(SCORE_COLUMNS, sessions=sessions)
 
-# Initialize VADER
-sid = SentimentIntensityAnalyzer()
+    print(f"Streaming tweets from {args.input} in chunks of {CHUNK_SIZE}...")
+    print(f"Scoring with VADER ({engine.num_workers} worker(s), {len(engine.analyzer.lexicon)} lexicon entries)")
+    start, rows = time.perf_counter(), 0
+    with engine:
+        for chunk in iter_tweet_chunks(args.input, CHUNK_SIZE):
+            keep = ['Date', 'Tweet'] + ([TICKER_COL] if TICKER_COL in chunk.columns else [])
+            chunk = chunk[keep]
+            with span('score', model='vader', rows=len(chunk)):
+                if cache is None:
+                    _, state = engine.score_daily(chunk)
+                    daily.merge(state)
+                else:
+                    # Cached tweets are folded in here; the rest are scored and aggregated by the workers
+                    scores, pending = cache.lookup(chunk['Tweet'].tolist())
+                    missed = sorted(i for positions in pending.values() for i in positions)
+                    hit = np.setdiff1d(np.arange(len(chunk)), missed)
+                    daily.update(chunk.iloc[hit].assign(**dict(zip(SCORE_COLUMNS, scores[hit].T))))
+                    if missed:
+                        new_scores, state = engine.score_daily(chunk.iloc[missed])
+                        daily.merge(state)
+                        cache.store(chunk['Tweet'].iloc[missed], new_scores)
+            rows += len(chunk)
+    elapsed = time.perf_counter() - start
+    if cache is not None:
+        print(cache.summary())
+        count('score_cache_hits', cache.hits)
+        count('score_cache_misses', cache.misses)
+        cache.close()
 
-# Apply VADER to each tweet
-df['compound'] = df['Tweet'].apply(lambda x: sid.polarity_scores(str(x))['compound'])
+    # Daily means of all four scores; the compound mean keeps its original column name
+    daily_sentiment = daily.to_frame().rename(columns={'vader_compound_mean': 'VADER_Compound_Mean'})
+    daily_sentiment = daily_sentiment.drop(columns=[f'{c}_std' for c in SCORE_COLUMNS])
+    write_table(daily_sentiment, OUTPUT_FILE)
 
-# Daily aggregation
-daily_sentiment = df.groupby('Date')['compound'].mean().reset_index()
-daily_sentiment.columns = ['Date', 'VADER_Compound_Mean']
+    print(f" Scored {rows} tweets in {elapsed:.1f}s ({rows / max(elapsed, 1e-9):.1f} tweets/sec)")
+    print(f" Saved daily VADER sentiment to {OUTPUT_FILE}")
 
-# Save
-os.makedirs(os.path.dirname(OUTPUT_FILE), exist_ok=True)
-daily_sentiment.to_csv(OUTPUT_FILE, index=False)
 
-print(f"Saved daily VADER sentiment to {OUTPUT_FILE}")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
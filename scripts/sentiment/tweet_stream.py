@@ -0,0 +1,105 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.market_calendar import tweet_days
+
+TICKER_COL = 'Stock Name'
+CHUNK_SIZE = 20000
+
+
+def iter_tweet_chunks(path, chunksize=CHUNK_SIZE, max_tweets=None, columns=None):
+    """Yield bounded DataFrame chunks of non-empty tweets from a CSV archive.
+
+    `columns` limits what is read; the chunks hold the same tweets either way.
+    """
+    seen = 0
+    for chunk in pd.read_csv(path, chunksize=chunksize, usecols=columns):
+        chunk = chunk.dropna(subset=['Tweet'])
+        if max_tweets is not None:
+            chunk = chunk.head(max_tweets - seen)
+        if chunk.empty:
+            if max_tweets is not None and seen >= max_tweets:
+                break
+            continue
+        chunk = chunk.reset_index(drop=True)
+        chunk['Tweet'] = chunk['Tweet'].astype(str)
+        seen += len(chunk)
+        yield chunk
+        if max_tweets is not None and seen >= max_tweets:
+            break
+
+
+class DailyAggregator:
+    """Running per-(ticker, day) count / sum / sum-of-squares of score columns.
+
+    State is one row per (ticker, day), so memory is bounded by the calendar,
+    not by the number of tweets folded in. With `weight_col`, sums and means are
+    weighted by that column (e.g. dedup.py's duplicate weights). With `sessions`
+    (a market calendar), days are the trading sessions tweets precede; tweets
+    outside the calendar are left out.
+    """
+
+    def __init__(self, score_columns, ticker_col=TICKER_COL, weight_col=None, sessions=None):
+        self.score_columns = list(score_columns)
+        self.ticker_col = ticker_col
+        self.weight_col = weight_col
+        self.sessions = sessions
+        self.state = None
+
+    def _keys(self, chunk):
+        if self.sessions is None:
+            keys = [pd.to_datetime(chunk['Date']).dt.date.rename('Date')]
+        else:
+            keys = [tweet_days(chunk['Date'], self.sessions).rename('Date')]
+        if self.ticker_col in chunk.columns:
+            keys.insert(0, chunk[self.ticker_col].rename(self.ticker_col))
+        return keys
+
+    def update(self, chunk):
+        values = chunk[self.score_columns].astype('float64')
+        counts = values.notna()
+        parts = [counts.add_suffix('_count')]
+        if self.weight_col is None:
+            parts += [values.add_suffix('_sum'), (values ** 2).add_suffix('_sumsq')]
+        else:
+            weights = chunk[self.weight_col].astype('float64')
+            parts += [counts.mul(weights, axis=0).add_suffix('_weight'), values.mul(weights, axis=0).add_suffix('_sum'),
+                      (values ** 2).mul(weights, axis=0).add_suffix('_sumsq')]
+        # One groupby over counts, sums and squares, with the dates parsed once
+        stacked = pd.concat(parts, axis=1)
+        self.merge(stacked.groupby(self._keys(chunk)).sum())
+
+    def merge(self, state):
+        """Fold in another aggregator's state, e.g. one built by a worker process on its shard."""
+        if state is not None and len(state):
+            self.state = state if self.state is None else self.state.add(state, fill_value=0)
+
+    def to_frame(self):
+        """Daily means, sample standard deviations and tweet counts."""
+        if self.state is None:
+            return pd.DataFrame()
+        out = pd.DataFrame(index=self.state.index)
+        for col in self.score_columns:
+            n = self.state[f'{col}_count']
+            total = self.state[f'{col}_sum']
+            sumsq = self.state[f'{col}_sumsq']
+            if self.weight_col is None:
+                out[f'{col}_mean'] = total / n
+                var = (sumsq - total ** 2 / n) / (n - 1)
+            else:
+                # Weighted variance, scaled by n / (n - 1) as the unweighted sample variance is
+                weight = self.state[f'{col}_weight']
+                out[f'{col}_mean'] = total / weight
+                var = (sumsq - total ** 2 / weight) / weight * n / (n - 1)
+            out[f'{col}_std'] = np.sqrt(var.clip(lower=0)).where(n > 1)
+        out['tweet_count'] = self.state[[f'{c}_count' for c in self.score_columns]].max(axis=1).astype('int64')
+        if self.weight_col is not None:
+            out['weighted_count'] = self.state[[f'{c}_weight' for c in self.score_columns]].max(axis=1)
+        out = out.reset_index()
+        # Date first to match the rest of data/processed
+        front = ['Date'] + ([self.ticker_col] if self.ticker_col in out.columns else [])
+        return out[front + [c for c in out.columns if c not in front]].sort_values(front).reset_index(drop=True)
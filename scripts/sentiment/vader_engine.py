@@ -0,0 +1,162 @@
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import nltk
+import numpy as np
+from nltk.sentiment.vader import SentimentIntensityAnalyzer
+
+from tweet_stream import DailyAggregator
+
+# Looked up in this order; nothing is ever downloaded
+LEXICON_ENV = 'STOCKCAST_VADER_LEXICON'
+LEXICON_FILE = 'data/external/vader_lexicon.txt'
+NLTK_RESOURCE = 'sentiment/vader_lexicon.zip/vader_lexicon/vader_lexicon.txt'
+
+LABELS = ['neg', 'neu', 'pos', 'compound']
+SCORE_COLUMNS = [f"vader_{l}" for l in LABELS]
+
+
+class LocalVader(SentimentIntensityAnalyzer):
+    """nltk's VADER over a lexicon file anywhere on disk, or nltk_data's copy when `path` is None."""
+
+    def __init__(self, path=None):
+        if path is None:
+            super().__init__()
+            return
+        # nltk.data only opens files under its search path
+        directory = os.path.dirname(os.path.abspath(path))
+        if directory not in nltk.data.path:
+            nltk.data.path.append(directory)
+        super().__init__('file:' + os.path.abspath(path))
+
+    def make_lex_dict(self):
+        # Copies of the lexicon usually end with a newline, which nltk would parse as an entry
+        return {word: float(measure) for word, measure, *_ in
+                (line.strip().split('\t') for line in self.lexicon_file.split('\n') if line.strip())}
+
+
+def lexicon_path(path=None):
+    """The VADER lexicon file: `path`, $STOCKCAST_VADER_LEXICON or the repo copy; None for an installed nltk_data."""
+    for candidate in (path, os.environ.get(LEXICON_ENV), LEXICON_FILE):
+        if candidate and os.path.exists(candidate):
+            return candidate
+    try:
+        nltk.data.find(NLTK_RESOURCE)
+    except LookupError:
+        raise FileNotFoundError(
+            f"No VADER lexicon found. Copy vader_lexicon.txt to {LEXICON_FILE} or point {LEXICON_ENV} at it "
+            f"(on a connected machine: python -m nltk.downloader vader_lexicon)") from None
+    return None
+
+
+def load_analyzer(path=None):
+    return LocalVader(lexicon_path(path))
+
+
+def lexicon_revision(analyzer):
+    # The lexicon contents act as the model revision for the score cache
+    digest = hashlib.sha1(repr(sorted(analyzer.lexicon.items())).encode('utf-8')).hexdigest()[:12]
+    return f"nltk-{nltk.__version__}-{digest}"
+
+
+def polarity(analyzer, texts):
+    """(n, 4) float32 neg/neu/pos/compound scores."""
+    scores = analyzer.polarity_scores
+    flat = np.fromiter((s[l] for s in map(scores, map(str, texts)) for l in LABELS), dtype=np.float32,
+                       count=len(texts) * len(LABELS))
+    return flat.reshape(len(texts), len(LABELS))
+
+
+def score_daily(analyzer, tweets, sessions=None):
+    """Scores of a tweet frame plus its per-(ticker, day) aggregate state, in one pass.
+
+    With `sessions`, days are the trading sessions tweets precede (see DailyAggregator).
+    """
+    scores = polarity(analyzer, tweets['Tweet'].tolist())
+    daily = DailyAggregator(SCORE_COLUMNS, sessions=sessions)
+    keys = [c for c in ('Date', daily.ticker_col) if c in tweets.columns]
+    daily.update(tweets[keys].assign(**dict(zip(SCORE_COLUMNS, scores.T))))
+    return scores, daily.state
+
+
+# One analyzer per worker process, created by the pool initializer
+_worker_analyzer = None
+_worker_sessions = None
+
+
+def _init_worker(path, sessions):
+    global _worker_analyzer, _worker_sessions
+    _worker_analyzer = load_analyzer(path)
+    _worker_sessions = sessions
+
+
+def _score_shard(texts):
+    return polarity(_worker_analyzer, texts)
+
+
+def _score_daily_shard(tweets):
+    return score_daily(_worker_analyzer, tweets, _worker_sessions)
+
+
+class VaderEngine:
+    """Long-lived VADER scorer: in-process, or a pool of `num_workers` processes each holding the lexicon.
+
+    The lexicon is read once per process, and tweets travel to the workers in
+    shards of `shard_size`, so per-call overhead is amortized over thousands of texts.
+    """
+
+    def __init__(self, lexicon_file=None, num_workers=1, shard_size=5000, sessions=None):
+        self.lexicon_file = lexicon_file
+        self.sessions = sessions
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.shard_size = shard_size
+        self.analyzer = load_analyzer(lexicon_file)
+        self.revision = lexicon_revision(self.analyzer)
+        self._pool = None
+
+    def _map(self, func, items):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.num_workers, initializer=_init_worker,
+                                             initargs=(self.lexicon_file, self.sessions))
+        return list(self._pool.map(func, items))
+
+    def _shards(self, items):
+        return [items[i:i + self.shard_size] for i in range(0, len(items), self.shard_size)]
+
+    def score(self, texts):
+        """Return an (n, 4) float32 array of neg/neu/pos/compound scores."""
+        texts = list(texts)
+        if self.num_workers <= 1 or len(texts) <= self.shard_size:
+            return polarity(self.analyzer, texts)
+        return np.vstack(self._map(_score_shard, self._shards(texts)))
+
+    def score_daily(self, tweets):
+        """(scores, aggregate state) for a frame of [Date, Tweet(, Stock Name)].
+
+        Each worker scores its shard and folds it into per-(ticker, day) sums
+        before returning, so aggregation happens in the same pass as scoring.
+        The state goes to DailyAggregator.merge().
+        """
+        if len(tweets) == 0:
+            return np.empty((0, len(LABELS)), dtype=np.float32), None
+        if self.num_workers <= 1 or len(tweets) <= self.shard_size:
+            return score_daily(self.analyzer, tweets, self.sessions)
+        parts = self._map(_score_daily_shard, [tweets.iloc[i:i + self.shard_size]
+                                               for i in range(0, len(tweets), self.shard_size)])
+        # A shard whose tweets all fall outside the session calendar comes back with no state
+        daily = DailyAggregator(SCORE_COLUMNS)
+        for _, part in parts:
+            daily.merge(part)
+        return np.vstack([scores for scores, _ in parts]), daily.state
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,163 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from common.features import LGBM_ADVANCED_SPEC, build_features
+from common.panel import DATE_COL, TICKER_COL
+from common.prophet_fit import quiet_stan
+from common.registry import list_models, load_model
+from common.storage import read_table
+from common.telemetry import timed
+
+MERGED_FILE = 'data/processed/merged_sentiment_stock'
+LGBM_MODEL = 'lightgbm_panel'           # Registered per ticker by train_all_tickers.py
+PROPHET_MODELS = {'vanilla': 'prophet_vanilla', 'roberta': 'prophet_roberta'}
+PROPHET_REGRESSOR = 'Sentiment_norm'
+MAX_HORIZON = 30                        # Days precomputed per Prophet model
+MAX_REQUEST_DAYS = 365                  # Longest horizon a request may ask for; longer ones are rejected
+
+
+class LatencyStats:
+    """Thread-safe request counters with p50/p99 over the most recent requests."""
+
+    def __init__(self, window=10000):
+        self._lock = threading.Lock()
+        self._latencies = {}
+        self._counts = {}
+        self._errors = {}
+        self._window = window
+        self._started = time.perf_counter()
+
+    def record(self, endpoint, seconds, ok=True):
+        with self._lock:
+            self._latencies.setdefault(endpoint, deque(maxlen=self._window)).append(seconds)
+            self._counts[endpoint] = self._counts.get(endpoint, 0) + 1
+            if not ok:
+                self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+
+    def summary(self):
+        with self._lock:
+            uptime = time.perf_counter() - self._started
+            out = {'uptime_s': round(uptime, 3), 'endpoints': {}}
+            for endpoint, lat in self._latencies.items():
+                ms = np.asarray(lat) * 1000
+                out['endpoints'][endpoint] = {
+                    'requests': self._counts[endpoint], 'errors': self._errors.get(endpoint, 0),
+                    'p50_ms': round(float(np.percentile(ms, 50)), 3),
+                    'p99_ms': round(float(np.percentile(ms, 99)), 3),
+                    'throughput_rps': round(self._counts[endpoint] / max(uptime, 1e-9), 1),
+                }
+            return out
+
+
+class ForecastService:
+    """Registered LightGBM boosters and Prophet models held in memory, with precomputed answers.
+
+    refresh() rebuilds the latest advanced feature row per ticker, scores it
+    with each ticker's booster and precomputes MAX_HORIZON days from every
+    Prophet model, so requests are served from in-memory tables. Horizons
+    longer than MAX_HORIZON are predicted on demand in one batched call per
+    model and cached, up to `max_days`.
+    """
+
+    def __init__(self, merged_file=MERGED_FILE, max_horizon=MAX_HORIZON, max_days=MAX_REQUEST_DAYS):
+        self.merged_file = merged_file
+        self.max_horizon = max_horizon
+        self.max_days = max(max_days, max_horizon)
+        self.stats = LatencyStats()
+        self._lock = threading.Lock()
+        self.boosters, self.prophets = {}, {}
+        self.latest = pd.DataFrame()
+        self.next_day = {}
+        self.horizons = {}
+        self._last_sentiment = {}
+
+    @timed('load_models')
+    def load_models(self):
+        quiet_stan()
+        boosters, prophets = {}, {}
+        for meta in list_models():
+            family, _, ticker = meta['name'].partition('/')
+            if not ticker:
+                continue
+            if family == LGBM_MODEL:
+                boosters[ticker] = (load_model(meta['name'], meta['version'])[0], meta['features'])
+            for kind, prefix in PROPHET_MODELS.items():
+                if family == prefix:
+                    prophets[(kind, ticker)] = load_model(meta['name'], meta['version'])[0]
+        self.boosters, self.prophets = boosters, prophets
+        return self
+
+    def _latest_features(self):
+        merged = read_table(self.merged_file)
+        features = build_features(merged, LGBM_ADVANCED_SPEC, dropna=False, date_major=False)
+        names = [f.name for f in LGBM_ADVANCED_SPEC if f.kind != 'lead']
+        # The newest complete feature row per ticker; its target (next day) is what we forecast
+        complete = features[np.isfinite(features[names].to_numpy(dtype=np.float64)).all(axis=1)]
+        return complete.groupby(TICKER_COL, sort=True).tail(1).set_index(TICKER_COL), merged
+
+    def _prophet_path(self, kind, ticker, model, history, days):
+        future = model.make_future_dataframe(periods=days, include_history=False)
+        if kind == 'roberta':
+            # Hold the last known sentiment over the horizon, as the forecast scripts do
+            future[PROPHET_REGRESSOR] = history.get(ticker, np.nan)
+        forecast = model.predict(future)
+        # Stored as ready-to-serve records so requests only slice a list
+        return [{'ds': d.strftime('%Y-%m-%d'), 'yhat': float(y), 'yhat_lower': float(lo), 'yhat_upper': float(hi)}
+                for d, y, lo, hi in zip(forecast['ds'], forecast['yhat'], forecast['yhat_lower'],
+                                        forecast['yhat_upper'])]
+
+    @timed('refresh')
+    def refresh(self):
+        """Recompute the latest feature rows, next-day forecasts and Prophet horizons."""
+        latest, merged = self._latest_features()
+        next_day = {}
+        for ticker, (booster, features) in self.boosters.items():
+            if ticker in latest.index:
+                row = latest.loc[[ticker], features]
+                next_day[ticker] = {'ticker': ticker, 'as_of': latest.at[ticker, DATE_COL].strftime('%Y-%m-%d'),
+                                    'y_pred': float(booster.predict(row)[0])}
+
+        last_sentiment = merged.sort_values(DATE_COL).groupby(TICKER_COL)[PROPHET_REGRESSOR].last().to_dict()
+        horizons = {key: self._prophet_path(key[0], key[1], model, last_sentiment, self.max_horizon)
+                    for key, model in self.prophets.items()}
+        with self._lock:
+            self.latest, self.next_day, self.horizons = latest, next_day, horizons
+            self._last_sentiment = last_sentiment
+        return self
+
+    @property
+    def tickers(self):
+        return sorted(set(self.next_day) | {t for _, t in self.horizons})
+
+    def predict_next(self, tickers=None):
+        """Next-day LightGBM forecast of Close_norm for `tickers` (default: all)."""
+        tickers = self.tickers if tickers is None else tickers
+        unknown = [t for t in tickers if t not in self.next_day]
+        if unknown:
+            raise KeyError(f"No LightGBM model for: {', '.join(unknown)}")
+        return [self.next_day[t] for t in tickers]
+
+    def predict_horizon(self, tickers=None, days=7, kind='vanilla'):
+        """`days`-day Prophet forecast per ticker; 'vanilla' predicts Close, 'roberta' Close_norm."""
+        if kind not in PROPHET_MODELS:
+            raise ValueError(f"Unknown Prophet model '{kind}' (choose from {', '.join(PROPHET_MODELS)})")
+        if not 1 <= days <= self.max_days:
+            raise ValueError(f"days must be between 1 and {self.max_days}")
+        tickers = self.tickers if tickers is None else tickers
+        unknown = [t for t in tickers if (kind, t) not in self.prophets]
+        if unknown:
+            raise KeyError(f"No {kind} Prophet model for: {', '.join(unknown)}")
+
+        out = {}
+        for ticker in tickers:
+            path = self.horizons[(kind, ticker)]
+            if len(path) < days:
+                path = self._prophet_path(kind, ticker, self.prophets[(kind, ticker)], self._last_sentiment, days)
+                with self._lock:
+                    self.horizons[(kind, ticker)] = path
+            out[ticker] = path[:days]
+        return out
@@ -0,0 +1,117 @@
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from forecast_service import ForecastService
+from serve_forecasts import HOST, PORT
+
+# Drive the forecast service with concurrent clients and report client-side latency.
+#   python scripts/serving/load_test.py                  # against a running serve_forecasts.py
+#   python scripts/serving/load_test.py --in-process     # call ForecastService directly (no HTTP)
+CLIENTS = 8
+DURATION_S = 10
+HORIZON_SHARE = 0.3  # Fraction of requests asking for a multi-day horizon
+MAX_BATCH = 5        # Tickers per request, drawn uniformly from 1..MAX_BATCH
+
+
+def random_request(rng, tickers):
+    batch = rng.sample(tickers, rng.randint(1, min(MAX_BATCH, len(tickers))))
+    if rng.random() < HORIZON_SHARE:
+        return '/forecast/horizon', {'tickers': batch, 'days': rng.choice([1, 7, 14, 30]),
+                                     'model': rng.choice(['vanilla', 'roberta'])}
+    return '/forecast/next', {'tickers': batch}
+
+
+def http_client(host, port):
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+
+    def call(endpoint, args):
+        query = '&'.join(f"{k}={','.join(v) if isinstance(v, list) else v}" for k, v in args.items())
+        conn.request('GET', f"{endpoint}?{query}")
+        response = conn.getresponse()
+        response.read()
+        return response.status == 200
+    return call
+
+
+def in_process_client(service):
+    def call(endpoint, args):
+        if endpoint == '/forecast/next':
+            service.predict_next(args['tickers'])
+        else:
+            service.predict_horizon(args['tickers'], args['days'], args['model'])
+        return True
+    return call
+
+
+def run_clients(make_call, tickers, clients, duration, seed=0):
+    latencies, errors = [[] for _ in range(clients)], [0] * clients
+    deadline = time.perf_counter() + duration
+
+    def worker(i):
+        rng = random.Random(seed + i)
+        call = make_call()
+        while time.perf_counter() < deadline:
+            endpoint, args = random_request(rng, tickers)
+            start = time.perf_counter()
+            try:
+                ok = call(endpoint, args)
+            except Exception:
+                ok = False
+            latencies[i].append(time.perf_counter() - start)
+            errors[i] += not ok
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return np.concatenate([np.asarray(l) for l in latencies]), sum(errors), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the forecast service with concurrent clients.")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--clients', type=int, default=CLIENTS)
+    parser.add_argument('--duration', type=float, default=DURATION_S, help="seconds")
+    parser.add_argument('--in-process', action='store_true', help="call ForecastService directly")
+    args = parser.parse_args()
+
+    if args.in_process:
+        print("Loading models in-process...")
+        service = ForecastService().load_models().refresh()
+        tickers = service.tickers
+        make_call = lambda: in_process_client(service)
+    else:
+        conn = http.client.HTTPConnection(args.host, args.port, timeout=30)
+        conn.request('GET', '/tickers')
+        tickers = json.loads(conn.getresponse().read())['tickers']
+        make_call = lambda: http_client(args.host, args.port)
+
+    print(f"Running {args.clients} clients for {args.duration:.0f}s against {len(tickers)} tickers...")
+    latencies, errors, elapsed = run_clients(make_call, tickers, args.clients, args.duration)
+    ms = latencies * 1000
+    print(f" Requests:   {len(ms)} ({errors} errors)")
+    print(f" Throughput: {len(ms) / elapsed:.1f} req/s")
+    print(f" Latency:    p50 {np.percentile(ms, 50):.2f} ms, p99 {np.percentile(ms, 99):.2f} ms, "
+          f"max {ms.max():.2f} ms")
+
+    if not args.in_process:
+        conn = http.client.HTTPConnection(args.host, args.port, timeout=30)
+        conn.request('GET', '/stats')
+        print(" Server-side stats:")
+        print(json.dumps(json.loads(conn.getresponse().read()), indent=2))
+
+
+if __name__ == '__main__':
+    main()
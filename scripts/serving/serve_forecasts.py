@@ -0,0 +1,105 @@
+import argparse
+import json
+import os
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from forecast_service import MAX_HORIZON, MAX_REQUEST_DAYS, ForecastService
+
+HOST = '127.0.0.1'
+PORT = 8765
+
+# Endpoints (GET, JSON responses):
+#   /forecast/next?tickers=TSLA,AAPL                    next-day LightGBM forecast (Close_norm)
+#   /forecast/horizon?tickers=TSLA&days=7&model=roberta  Prophet path ('vanilla': Close, 'roberta': Close_norm)
+#   /tickers, /stats, /health
+
+
+def _tickers(query):
+    values = [t for v in query.get('tickers', []) + query.get('ticker', []) for t in v.split(',') if t]
+    return values or None
+
+
+def make_handler(service):
+    class ForecastHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive, so load-test clients reuse connections
+        disable_nagle_algorithm = True  # Otherwise small responses wait on delayed ACKs (~40 ms)
+
+        def _send(self, status, body):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def do_GET(self):
+            start = time.perf_counter()
+            url = urlparse(self.path)
+            query = parse_qs(url.query)
+            status = 200
+            try:
+                if url.path == '/forecast/next':
+                    body = {'forecasts': service.predict_next(_tickers(query))}
+                elif url.path == '/forecast/horizon':
+                    days = int(query.get('days', ['7'])[0])
+                    kind = query.get('model', ['vanilla'])[0]
+                    body = {'model': kind, 'days': days,
+                            'forecasts': service.predict_horizon(_tickers(query), days, kind)}
+                elif url.path == '/tickers':
+                    body = {'tickers': service.tickers}
+                elif url.path == '/stats':
+                    body = service.stats.summary()
+                elif url.path == '/health':
+                    body = {'status': 'ok', 'lightgbm_models': len(service.boosters),
+                            'prophet_models': len(service.prophets)}
+                else:
+                    status, body = 404, {'error': f"Unknown endpoint {url.path}"}
+            except KeyError as e:
+                status, body = 404, {'error': e.args[0]}
+            except ValueError as e:
+                status, body = 400, {'error': str(e)}
+            self._send(status, body)
+            if url.path.startswith('/forecast/'):
+                service.stats.record(url.path, time.perf_counter() - start, ok=status == 200)
+
+        def log_message(self, format, *args):
+            pass  # Per-request logging would dominate latency
+
+    return ForecastHandler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve next-day and multi-day forecasts from in-memory models.")
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--max-horizon', type=int, default=MAX_HORIZON, help="days precomputed per Prophet model")
+    parser.add_argument('--max-days', type=int, default=MAX_REQUEST_DAYS,
+                        help="longest horizon a request may ask for (longer ones get a 400)")
+    args = parser.parse_args()
+
+    print("Loading registered models...")
+    start = time.perf_counter()
+    service = ForecastService(max_horizon=args.max_horizon, max_days=args.max_days).load_models()
+    print(f" {len(service.boosters)} LightGBM and {len(service.prophets)} Prophet models loaded")
+    print("Precomputing latest features and forecasts...")
+    service.refresh()
+    print(f" Ready in {time.perf_counter() - start:.1f}s for {len(service.tickers)} tickers")
+
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service))
+    server.daemon_threads = True
+    print(f"Serving on http://{args.host}:{args.port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(json.dumps(service.stats.summary(), indent=2))
+
+
+if __name__ == '__main__':
+    main()
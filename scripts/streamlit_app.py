@@ -1,6 +1,13 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'dashboard'))
+from common.registry import list_models, load_model
+from dashboard_store import load_manifest, query_metrics, query_series
 
 # Set Streamlit to light theme and wide layout
 st.set_page_config(
@@ -30,18 +37,45 @@ Explore how sentiment affects stock trends. View predictions, compare models, an
     """)
 
 # ----------------------------- Data Loading -----------------------------
+# Charts are answered from the precomputed store (scripts/dashboard/build_dashboard_store.py).
+# Its manifest version is part of every cache key, so rebuilding the store invalidates them.
+manifest = load_manifest()
+version = manifest["version"] if manifest else None
+
+PROPHET_MODELS = ["actual", "vanilla_prophet", "roberta_prophet"]
+LGBM_MODELS = ["actual", "lightgbm_panel", "lightgbm_recursive", "lightgbm_direct"]
+
+
 @st.cache_data
-def load_forecast(file_path):
-    try:
-        return pd.read_csv(file_path)
-    except Exception as e:
-        st.error(f"Error loading {file_path}: {e}")
-        return pd.DataFrame()
-
-vanilla_df = load_forecast("outputs/forecasts/vanilla_prophet_forecast.csv")
-roberta_df = load_forecast("outputs/forecasts/roberta_prophet_forecast.csv")
-lgbm_adv_df = load_forecast("outputs/forecasts/lightgbm_advanced_preds.csv")
-lgbm_comp_df = load_forecast("outputs/forecasts/lightgbm_sentiment_preds.csv")
+def load_series(version, ticker, models, start=None, end=None, max_horizon=None):
+    return query_series(ticker, list(models), start, end, max_horizon)
+
+
+@st.cache_data
+def load_metrics(version, ticker):
+    return query_metrics(ticker)
+
+
+def series_chart(df, title):
+    fig = px.line(df, x="Date", y="value", color="model", title=title,
+                  labels={"value": "Close", "model": "Series"})
+    st.plotly_chart(fig, use_container_width=True)
+
+
+if manifest is None:
+    st.warning("No dashboard store yet. Run `python scripts/pipeline.py dashboard_store` to build it.")
+    st.stop()
+
+tickers = sorted(manifest["tickers"])
+with st.sidebar:
+    st.markdown("### Filters")
+    ticker = st.selectbox("Ticker", tickers, index=tickers.index("TSLA") if "TSLA" in tickers else 0)
+    date_range = st.date_input("Show forecasts between", value=())
+    max_horizon = st.slider("Forecast horizon (days ahead)", 1, max(manifest["max_horizon"], 1),
+                            max(manifest["max_horizon"], 1))
+    st.caption(f"Store built {manifest['built_at']} from {len(manifest['sources'])} pipeline outputs")
+start, end = (date_range if len(date_range) == 2 else (None, None))
+available = manifest["tickers"][ticker]
 
 # ----------------------------- Prophet Forecast Section -----------------------------
 st.header("🧙 Prophet Forecasting")
@@ -50,21 +84,12 @@ Prophet is a time-series forecasting model developed by Facebook.
 We compare vanilla Prophet (price-only) with sentiment-enriched forecasts.
 """)
 
-tab1, tab2 = st.tabs(["Vanilla Prophet", "Prophet + Sentiment"])
-
-with tab1:
-    if {"ds", "yhat"}.issubset(vanilla_df.columns):
-        fig = px.line(vanilla_df, x="ds", y="yhat", title="Vanilla Prophet Forecast")
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.warning("Missing required columns in Vanilla Prophet forecast.")
-
-with tab2:
-    if {"ds", "yhat"}.issubset(roberta_df.columns):
-        fig = px.line(roberta_df, x="ds", y="yhat", title="Prophet + RoBERTa Sentiment Forecast")
-        st.plotly_chart(fig, use_container_width=True)
-    else:
-        st.warning("Missing required columns in RoBERTa Prophet forecast.")
+prophet_models = tuple(m for m in PROPHET_MODELS if m in available)
+if len(prophet_models) > 1:
+    series_chart(load_series(version, ticker, prophet_models, start, end, max_horizon),
+                 f"{ticker}: Vanilla Prophet vs Prophet + RoBERTa Sentiment")
+else:
+    st.warning(f"No Prophet forecasts for {ticker} in the store.")
 
 # ----------------------------- LightGBM Forecast Section -----------------------------
 st.header("⚡ LightGBM Forecasting")
@@ -72,27 +97,68 @@ st.markdown("""
 LightGBM enables feature-rich forecasting including lag features and sentiment averages.
 """)
 
-if {"date", "y_true", "y_pred"}.issubset(lgbm_adv_df.columns):
-    fig = px.line(lgbm_adv_df, x="date", y=["y_true", "y_pred"], title="LightGBM Advanced Forecast vs Actual")
-    st.plotly_chart(fig, use_container_width=True)
-elif {"y_true", "y_pred"}.issubset(lgbm_adv_df.columns):
-    fig = px.line(lgbm_adv_df.reset_index(), x="index", y=["y_true", "y_pred"], title="LightGBM Advanced Forecast vs Actual")
-    st.plotly_chart(fig, use_container_width=True)
+lgbm_models = tuple(m for m in LGBM_MODELS if m in available)
+if len(lgbm_models) > 1:
+    series_chart(load_series(version, ticker, lgbm_models, start, end, max_horizon),
+                 f"{ticker}: LightGBM next-day and multi-horizon forecasts vs actual")
 else:
-    st.warning("Missing columns in LightGBM advanced forecast.")
+    st.warning(f"No LightGBM forecasts for {ticker} in the store.")
 
 # ----------------------------- Model Comparison Section -----------------------------
 st.header("📊 Model Comparison")
-st.markdown("Compare how different LightGBM variants perform against actual market behavior.")
+st.markdown("Compare every model's forecasts and walk-forward backtest accuracy against actual market behavior.")
 
-if {"date", "y_true", "y_pred"}.issubset(lgbm_comp_df.columns):
-    fig = px.line(lgbm_comp_df, x="date", y=["y_true", "y_pred"], title="LightGBM Sentiment Forecast vs Actual")
-    st.plotly_chart(fig, use_container_width=True)
-elif {"y_true", "y_pred"}.issubset(lgbm_comp_df.columns):
-    fig = px.line(lgbm_comp_df.reset_index(), x="index", y=["y_true", "y_pred"], title="LightGBM Sentiment Forecast vs Actual")
+chosen = st.multiselect("Series", available, default=[m for m in available if m.startswith(("actual", "backtest_"))])
+if chosen:
+    series_chart(load_series(version, ticker, tuple(chosen), start, end, max_horizon),
+                 f"{ticker}: selected models")
+
+metrics_df = load_metrics(version, ticker)
+if metrics_df.empty:
+    st.info("Run the backtest stage to see accuracy per model and horizon.")
+else:
+    metrics_df = metrics_df[metrics_df["horizon"] <= max_horizon]
+    fig = px.line(metrics_df, x="horizon", y="mae", color="model", markers=True,
+                  title=f"{ticker}: walk-forward MAE by horizon")
     st.plotly_chart(fig, use_container_width=True)
+    summary = metrics_df.groupby("model")[["mae", "rmse", "mape", "directional_accuracy"]].mean()
+    st.dataframe(summary.sort_values("mae"), use_container_width=True)
+
+# ----------------------------- Model Registry Section -----------------------------
+st.header("🗃️ Model Registry")
+st.markdown("Fitted models are saved once and loaded here instead of being retrained.")
+
+
+@st.cache_data
+def load_registry(version):
+    return pd.DataFrame([
+        {"model": m["name"], "kind": m["kind"], "version": m["version"],
+         "trained on": f"{m['train_start']} → {m['train_end']}", **m["metrics"]}
+        for m in list_models()
+    ])
+
+
+@st.cache_resource
+def load_registered_model(name, version):
+    return load_model(name, version)[0]
+
+
+# The stages that register models also write the store's sources, so retraining bumps the manifest version
+registry_df = load_registry(version)
+if registry_df.empty:
+    st.info("No registered models yet. Run the training scripts to populate models/.")
 else:
-    st.warning("Missing columns in LightGBM sentiment forecast.")
+    st.dataframe(registry_df, use_container_width=True)
+    lgbm_models = registry_df[registry_df["kind"] == "lightgbm"]
+    if not lgbm_models.empty:
+        choice = st.selectbox("Feature importance for", lgbm_models["model"])
+        model_version = lgbm_models.loc[lgbm_models["model"] == choice, "version"].iloc[0]
+        booster = load_registered_model(choice, model_version)
+        importance = pd.DataFrame({"feature": booster.feature_name(),
+                                   "gain": booster.feature_importance(importance_type="gain")})
+        fig = px.bar(importance.sort_values("gain"), x="gain", y="feature", orientation="h",
+                     title=f"{choice}: feature importance (gain)")
+        st.plotly_chart(fig, use_container_width=True)
 
 # ----------------------------- Footer -----------------------------
 st.markdown("---")
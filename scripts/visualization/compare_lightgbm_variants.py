@@ -1,26 +1,26 @@
-import pandas as pd
 import matplotlib.pyplot as plt
 import os
+import sys
 
-# Load each model's predictions
-print("Loading predictions...")
-base = pd.read_csv('outputs/forecasts/lightgbm_sentiment_preds.csv')
-nosent = pd.read_csv('outputs/forecasts/lightgbm_nosentiment_preds.csv')
-advanced = pd.read_csv('outputs/forecasts/lightgbm_advanced_preds.csv')
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.storage import read_table
+
+RESULTS_FILE = 'outputs/ablation/lightgbm_ablation_results'  # Written by lightgbm/run_ablation.py
+PRED_FILE = 'outputs/ablation/lightgbm_ablation_preds'
 
-# All have the same y_true
-y_true = base['y_true'].values
-y_base = base['y_pred'].values
-y_nosent = nosent['y_pred'].values
-y_adv = advanced['y_pred'].values
+# Load the ablation run's predictions, one column per variant on the shared test rows
+print("Loading predictions...")
+preds = read_table(PRED_FILE)
+wide = preds.pivot_table(index=['Date', 'Stock Name'], columns='variant', values='y_pred', sort=True)
+y_true = preds.drop_duplicates(['Date', 'Stock Name']).set_index(['Date', 'Stock Name'])['y_true'].reindex(wide.index)
 
 # Plot
 print("Plotting comparisons...")
 plt.figure(figsize=(12, 6))
-plt.plot(y_true, label='Actual', color='black')
-plt.plot(y_base, label='Predicted: LightGBM + Sentiment', linestyle='--')
-plt.plot(y_nosent, label='Predicted: LightGBM (No Sentiment)', linestyle='--')
-plt.plot(y_adv, label='Predicted: Advanced Features', linestyle='-')
+plt.plot(y_true.values, label='Actual', color='black')
+plt.plot(wide['sentiment'].values, label='Predicted: LightGBM + Sentiment', linestyle='--')
+plt.plot(wide['no_sentiment'].values, label='Predicted: LightGBM (No Sentiment)', linestyle='--')
+plt.plot(wide['all'].values, label='Predicted: Advanced Features', linestyle='-')
 plt.title("Model Comparison: LightGBM Variants")
 plt.xlabel("Test Sample Index")
 plt.ylabel("Normalized Close Price")
@@ -33,4 +33,20 @@ os.makedirs(os.path.dirname(out_path), exist_ok=True)
 plt.savefig(out_path)
 plt.close()
 
+# MAE of every feature subset relative to using all features
+results = read_table(RESULTS_FILE).sort_values('mae_delta')
+plt.figure(figsize=(10, max(4, 0.3 * len(results))))
+plt.barh(results['variant'], results['mae_delta'],
+         color=['tab:green' if d <= 0 else 'tab:red' for d in results['mae_delta']])
+plt.axvline(0, color='black', linewidth=0.8)
+plt.gca().invert_yaxis()
+plt.title("LightGBM Feature Ablation: MAE vs All Features")
+plt.xlabel("MAE delta (negative is better)")
+plt.tight_layout()
+
+ablation_path = 'outputs/charts/lightgbm_ablation.png'
+plt.savefig(ablation_path)
+plt.close()
+
 print(f" Comparison chart saved to {out_path}")
+print(f" Ablation chart saved to {ablation_path}")
@@ -1,17 +1,22 @@
 import pandas as pd
 import matplotlib.pyplot as plt
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from common.storage import read_table
 
 # File paths
-vanilla_path = 'outputs/forecasts/vanilla_prophet_forecast.csv'
-roberta_path = 'outputs/forecasts/roberta_prophet_forecast.csv'
-true_data_path = 'data/processed/merged_sentiment_stock.csv'
+vanilla_path = 'outputs/forecasts/vanilla_prophet_forecast'
+roberta_path = 'outputs/forecasts/roberta_prophet_forecast'
+true_data_path = 'data/processed/merged_sentiment_stock'
 output_plot = 'outputs/charts/vanilla_vs_roberta_forecast.png'
+TICKER = 'TSLA'  # Must match the single-ticker Prophet scripts
 
 print("Loading forecast and true data...")
-vanilla = pd.read_csv(vanilla_path)
-roberta = pd.read_csv(roberta_path)
-truth = pd.read_csv(true_data_path)
+vanilla = read_table(vanilla_path, date_col='ds')
+roberta = read_table(roberta_path, date_col='ds')
+truth = read_table(true_data_path, columns=['Date', 'Close_norm'], tickers=[TICKER])
 
 # Align dates
 vanilla['ds'] = pd.to_datetime(vanilla['ds'])